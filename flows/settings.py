@@ -26,8 +26,30 @@ INTEGRADOR_APP_SECRET = env('INTEGRADOR_APP_SECRET')
 IMOBILIARIAS_BASE_URL = env('IMOBILIARIAS_BASE_URL')
 SUPERLOGICA_API_BASE = env('SUPERLOGICA_API_BASE', default='https://api.superlogica.net')
 URL_PARA_APP_TOKEN = env('URL_PARA_APP_TOKEN', default='https://{license}.superlogica.net/clients/financeiro/login')
+SUPERLOGICA_IMOBILIARIA_API = env('SUPERLOGICA_IMOBILIARIA_API', default='http://apps.superlogica.net/imobiliaria/api')
 SUPERLOGICA_HEALTHCHECK_PATH = env('SUPERLOGICA_HEALTHCHECK_PATH', default='/imobiliarias/v2/clientes?limit=1')
 INTEGRADOR_ENCRYPTION_KEY = env('INTEGRADOR_ENCRYPTION_KEY')
+# chaves anteriores, só para decifrar durante a rotação (manage.py rotacionar_chave)
+INTEGRADOR_OLD_ENCRYPTION_KEYS = env.list('INTEGRADOR_OLD_ENCRYPTION_KEYS', default=[])
+
+# Sessão HTTP do Superlógica (integrador/http_client.py)
+SUPERLOGICA_CONNECT_TIMEOUT = env.float('SUPERLOGICA_CONNECT_TIMEOUT', default=5.0)
+SUPERLOGICA_READ_TIMEOUT = env.float('SUPERLOGICA_READ_TIMEOUT', default=30.0)
+SUPERLOGICA_MAX_RETRIES = env.int('SUPERLOGICA_MAX_RETRIES', default=3)
+SUPERLOGICA_RETRY_BACKOFF = env.float('SUPERLOGICA_RETRY_BACKOFF', default=0.5)
+SUPERLOGICA_POOL_HOSTS = env.int('SUPERLOGICA_POOL_HOSTS', default=4)
+SUPERLOGICA_POOL_MAXSIZE = env.int('SUPERLOGICA_POOL_MAXSIZE', default=20)
+# Cache (no banco) das páginas já importadas, por ETag/hash (integrador/cache_respostas.py)
+SUPERLOGICA_CACHE_PAGINAS = env.bool('SUPERLOGICA_CACHE_PAGINAS', default=True)
+
+# Token bucket compartilhado (integrador/ratelimit.py); 0 desliga o limite
+SUPERLOGICA_RATE_GLOBAL = env.float('SUPERLOGICA_RATE_GLOBAL', default=20.0)
+SUPERLOGICA_RATE_LICENCA = env.float('SUPERLOGICA_RATE_LICENCA', default=5.0)
+SUPERLOGICA_RATE_BURST = env.float('SUPERLOGICA_RATE_BURST', default=10.0)
+
+# Circuit breaker (integrador/circuito.py): abre após N falhas seguidas e testa de novo após X s
+SUPERLOGICA_CIRCUITO_FALHAS = env.int('SUPERLOGICA_CIRCUITO_FALHAS', default=5)
+SUPERLOGICA_CIRCUITO_ESPERA = env.float('SUPERLOGICA_CIRCUITO_ESPERA', default=30.0)
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -59,6 +81,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     #apps
     'kanban',
@@ -1,6 +1,22 @@
 from django.contrib import admin
-from .models import ContratoLocacao, Cliente
+from .models import ContratoLocacao, Cliente, JobImportacao, CheckpointImportacao, ItemRejeitado, AgregadoCliente
 
 # Register your models here.
 admin.site.register(ContratoLocacao)
 admin.site.register(Cliente)
+admin.site.register(JobImportacao)
+admin.site.register(CheckpointImportacao)
+
+
+@admin.register(ItemRejeitado)
+class ItemRejeitadoAdmin(admin.ModelAdmin):
+    list_display = ("licenca", "endpoint", "identificador", "erro", "tentativas", "resolvido_em", "data_ult_modificacao")
+    list_filter = ("endpoint", "resolvido_em")
+    search_fields = ("identificador", "erro")
+
+
+
+@admin.register(AgregadoCliente)
+class AgregadoClienteAdmin(admin.ModelAdmin):
+    list_display = ("cliente", "contratos_inquilino", "contratos_proprietario", "contratos_ativos", "aluguel_total", "ultimo_inicio")
+    raw_id_fields = ("cliente",)
@@ -0,0 +1,105 @@
+# importador_erp/agregados.py
+"""
+Manutenção de AgregadoCliente (contratos por papel, aluguel somado, ativos/inativos e
+início mais recente de cada Cliente).
+
+Cada papel é agregado a partir da sua tabela intermediária, agrupada por cliente, e o
+resultado é gravado com um upsert por bloco. Assim não há o produto inquilino ×
+proprietário que inflava as somas quando os dois M2M eram agregados na mesma query.
+
+Quem chama: sincronizar_vinculos (import), os signals de vínculo/contrato e o
+comando `manage.py atualizar_agregados_clientes` (recalcula tudo).
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Max, Q, Sum
+
+CHUNK_SIZE = 500
+CAMPOS = [
+    "contratos_inquilino", "contratos_proprietario", "contratos_ativos", "contratos_inativos",
+    "aluguel_inquilino", "aluguel_proprietario", "aluguel_total", "ultimo_inicio", "data_ult_modificacao",
+]
+
+
+def _gravar_bloco(bloco: list[int]) -> int:
+    from .models import AgregadoCliente, ContratoLocacao
+
+    valores = {
+        cliente_id: {
+            "contratos_inquilino": 0, "contratos_proprietario": 0, "contratos_ativos": 0, "contratos_inativos": 0,
+            "aluguel_inquilino": Decimal("0"), "aluguel_proprietario": Decimal("0"), "ultimo_inicio": None,
+        }
+        for cliente_id in bloco
+    }
+    for papel, through in (
+        ("inquilino", ContratoLocacao.inquilinos.through),
+        ("proprietario", ContratoLocacao.proprietarios.through),
+    ):
+        linhas = (
+            through.objects.filter(cliente_id__in=bloco)
+            .values("cliente_id")
+            .annotate(
+                n=Count("id"),
+                ativos=Count("id", filter=Q(contratolocacao__contrato_ativo=True)),
+                aluguel=Sum("contratolocacao__valor_aluguel"),
+                ultimo=Max("contratolocacao__data_inicio"),
+            )
+            .order_by()
+        )
+        for linha in linhas:
+            v = valores[linha["cliente_id"]]
+            v[f"contratos_{papel}"] = linha["n"]
+            v[f"aluguel_{papel}"] = linha["aluguel"] or Decimal("0")
+            v["contratos_ativos"] += linha["ativos"]
+            v["contratos_inativos"] += linha["n"] - linha["ativos"]
+            if linha["ultimo"] and (v["ultimo_inicio"] is None or linha["ultimo"] > v["ultimo_inicio"]):
+                v["ultimo_inicio"] = linha["ultimo"]
+
+    AgregadoCliente.objects.bulk_create(
+        [
+            AgregadoCliente(cliente_id=cliente_id, aluguel_total=v["aluguel_inquilino"] + v["aluguel_proprietario"], **v)
+            for cliente_id, v in valores.items()
+        ],
+        batch_size=CHUNK_SIZE,
+        update_conflicts=True,
+        unique_fields=["cliente"],
+        update_fields=CAMPOS,
+    )
+    return len(bloco)
+
+
+def atualizar_agregados(cliente_ids) -> int:
+    """Recalcula o agregado destes clientes (cria a linha de quem ainda não tem)."""
+    ids = sorted({i for i in cliente_ids if i})
+    return sum(_gravar_bloco(ids[i:i + CHUNK_SIZE]) for i in range(0, len(ids), CHUNK_SIZE))
+
+
+def clientes_dos_contratos(contrato_ids) -> set[int]:
+    """Inquilinos e proprietários atuais destes contratos."""
+    from .models import ContratoLocacao
+
+    ids = sorted(set(contrato_ids))
+    clientes: set[int] = set()
+    for through in (ContratoLocacao.proprietarios.through, ContratoLocacao.inquilinos.through):
+        for i in range(0, len(ids), CHUNK_SIZE):
+            clientes.update(
+                through.objects.filter(contratolocacao_id__in=ids[i:i + CHUNK_SIZE]).values_list("cliente_id", flat=True)
+            )
+    return clientes
+
+
+def recalcular_todos(lote: int = CHUNK_SIZE, progresso=None) -> int:
+    """Recalcula o agregado de todos os clientes, em blocos de `lote` por pk."""
+    from .models import Cliente
+
+    total = 0
+    ultimo_pk = 0
+    while True:
+        bloco = list(Cliente.objects.filter(pk__gt=ultimo_pk).order_by("pk").values_list("pk", flat=True)[:lote])
+        if not bloco:
+            break
+        ultimo_pk = bloco[-1]
+        total += _gravar_bloco(bloco)
+        if progresso:
+            progresso(total)
+    return total
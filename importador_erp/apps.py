@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ImportadorErpConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'importador_erp'
+
+    def ready(self):
+        import importador_erp.signals  # noqa
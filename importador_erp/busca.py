@@ -0,0 +1,205 @@
+# importador_erp/busca.py
+"""
+Busca textual das listas de clientes e contratos.
+
+Cada Cliente e ContratoLocacao guarda em `busca` um texto já normalizado (minúsculo,
+sem acento, documento/telefone só com dígitos), recalculado no save() e nos caminhos
+em lote do import. No Postgres a coluna tem índice GIN com gin_trgm_ops, então o
+LIKE '%termo%' usa o índice em vez de varrer a tabela inteira.
+
+A busca de contratos por cliente (nome, email, documento de inquilinos/proprietários)
+procura primeiro os clientes pelo índice deles e depois os contratos pelas tabelas
+intermediárias, sem join que multiplica linhas.
+
+No Postgres os contratos têm também um documento de busca textual
+(ContratoLocacao.documento_busca, tsvector com índice GIN): o `busca` do contrato com
+peso A e o `busca` dos inquilinos/proprietários com peso B. buscar_contratos() usa esse
+documento com prefixo em cada palavra para ordenar por relevância. Prefixo não acha
+pedaço do meio de uma palavra (CPF parcial, "gmail" em um email, "silva" em
+"dasilva"), então o LIKE '%termo%' (trigrama) entra sempre junto, com OR: o conjunto
+encontrado não depende dos dados, só a ordem. O documento é refeito
+só para os contratos afetados: ao gravar/revincular contratos (sincronizar_vinculos)
+e ao mudar os dados de um cliente.
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast
+
+CONFIG_BUSCA = "simple"  # sem stemming: os textos já vêm normalizados e o prefixo precisa casar com a palavra gravada
+_CHUNK = 500
+
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_NAO_DIGITO = re.compile(r"\D")
+_RE_DOCUMENTO = re.compile(r"[\d\s./()-]+")  # termo que parece CPF/CNPJ/telefone
+_RE_PALAVRA = re.compile(r"[^\W_]+")
+
+
+def normalizar(texto) -> str:
+    """Minúsculo, sem acentos e com espaços colapsados."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _RE_ESPACOS.sub(" ", texto.lower()).strip()
+
+
+def digitos(texto) -> str:
+    return _RE_NAO_DIGITO.sub("", str(texto or ""))
+
+
+def texto_cliente(nome, email, cpf_cnpj, telefone) -> str:
+    return " ".join(p for p in (normalizar(nome), normalizar(email), digitos(cpf_cnpj), digitos(telefone)) if p)
+
+
+def texto_contrato(nome_do_imovel, identificador_contrato, status_contrato, tipo_imovel, tipo_contrato) -> str:
+    partes = (nome_do_imovel, identificador_contrato, status_contrato, tipo_imovel, tipo_contrato)
+    return " ".join(p for p in (normalizar(v) for v in partes) if p)
+
+
+def termos(q: str) -> list[str]:
+    """
+    Palavras da busca já normalizadas; todas precisam aparecer. Um termo com cara de
+    documento ("123.456.789-00", "(11) 9999-0000") vira só os dígitos, como está gravado.
+    """
+    q = (q or "").strip()
+    if _RE_DOCUMENTO.fullmatch(q) and digitos(q):
+        return [digitos(q)]
+    palavras = (digitos(p) if _RE_DOCUMENTO.fullmatch(p) else p for p in normalizar(q).split())
+    return [p for p in palavras if p]
+
+
+def filtro(q: str, campo: str = "busca") -> Q:
+    """Q com `campo__contains` para cada termo (a coluna já está em minúsculas)."""
+    resultado = Q()
+    for termo in termos(q):
+        resultado &= Q(**{f"{campo}__contains": termo})
+    return resultado
+
+
+def filtrar_clientes(qs, q: str):
+    return qs.filter(filtro(q)) if termos(q) else qs
+
+
+def filtrar_contratos(qs, q: str):
+    """
+    Contratos cujo próprio texto, ou o de algum inquilino/proprietário, contém todos
+    os termos (cada termo pode estar em qualquer um deles, como no icontains antigo
+    com OR entre os campos, só que por palavra).
+    """
+    for termo in termos(q):
+        qs = qs.filter(_contem(termo))
+    return qs
+
+
+def _contem(termo: str) -> Q:
+    """Contrato com `termo` no próprio texto ou no de algum inquilino/proprietário."""
+    from .models import Cliente, ContratoLocacao
+
+    clientes = Cliente.objects.filter(busca__contains=termo).values("pk")
+    return (
+        Q(busca__contains=termo)
+        | Q(pk__in=ContratoLocacao.inquilinos.through.objects.filter(cliente_id__in=clientes).values("contratolocacao_id"))
+        | Q(pk__in=ContratoLocacao.proprietarios.through.objects.filter(cliente_id__in=clientes).values("contratolocacao_id"))
+    )
+
+
+# --------- busca textual de contratos (Postgres) ---------
+def _postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def _partes(through):
+    """`busca` dos clientes de uma relação do contrato, concatenados."""
+    return Subquery(
+        through.objects.filter(contratolocacao_id=OuterRef("pk"))
+        .values("contratolocacao_id")
+        .annotate(texto=StringAgg("cliente__busca", " "))
+        .values("texto")
+    )
+
+
+def documento_contrato(ContratoLocacao) -> SearchVector:
+    """Expressão do documento de busca de um contrato, para usar em update()."""
+    return (
+        SearchVector("busca", weight="A", config=CONFIG_BUSCA)
+        + SearchVector(_partes(ContratoLocacao.proprietarios.through), weight="B", config=CONFIG_BUSCA)
+        + SearchVector(_partes(ContratoLocacao.inquilinos.through), weight="B", config=CONFIG_BUSCA)
+    )
+
+
+def atualizar_documentos(contrato_ids) -> int:
+    """Refaz documento_busca destes contratos (no-op fora do Postgres)."""
+    from .models import ContratoLocacao
+
+    ids = sorted(set(contrato_ids))
+    if not ids or not _postgres():
+        return 0
+    total = 0
+    for i in range(0, len(ids), _CHUNK):
+        total += ContratoLocacao.objects.filter(pk__in=ids[i:i + _CHUNK]).update(
+            documento_busca=documento_contrato(ContratoLocacao)
+        )
+    return total
+
+
+def atualizar_documentos_de_clientes(cliente_ids) -> int:
+    """Refaz o documento dos contratos em que estes clientes são inquilinos ou proprietários."""
+    from .models import ContratoLocacao
+
+    ids = sorted(set(cliente_ids))
+    if not ids or not _postgres():
+        return 0
+    contratos: set[int] = set()
+    for through in (ContratoLocacao.proprietarios.through, ContratoLocacao.inquilinos.through):
+        for i in range(0, len(ids), _CHUNK):
+            contratos.update(
+                through.objects.filter(cliente_id__in=ids[i:i + _CHUNK]).values_list("contratolocacao_id", flat=True)
+            )
+    return atualizar_documentos(contratos)
+
+
+def _palavra(termo: str) -> bool:
+    """Termo que o documento de busca acha por prefixo: uma palavra só, com alguma letra."""
+    return _RE_PALAVRA.fullmatch(termo) is not None and not termo.isdigit()
+
+
+def consulta(q: str) -> SearchQuery | None:
+    """
+    SearchQuery com as palavras de `q`, cada uma como prefixo (digitação parcial). Termos
+    só de dígitos ou com pontuação ficam de fora (ver buscar_contratos).
+    """
+    palavras = [t for t in termos(q) if _palavra(t)]
+    if not palavras:
+        return None
+    return SearchQuery(" & ".join(f"{p}:*" for p in palavras), search_type="raw", config=CONFIG_BUSCA)
+
+
+def buscar_contratos(qs, q: str):
+    """
+    Contratos que casam com `q`, anotados com `relevancia`. No Postgres um contrato
+    entra se o documento de busca casa (palavras por prefixo, demais termos no LIKE) ou
+    se todos os termos aparecem como substring (filtrar_contratos); a relevância é o
+    SearchRank de quem casa pelo documento e 0 para quem só casa por substring. Fora
+    do Postgres é só filtrar_contratos, com relevância 0.
+    """
+    sem_relevancia = Value(0.0, output_field=FloatField())
+    query = consulta(q) if _postgres() else None
+    if query is None:
+        return filtrar_contratos(qs, q).annotate(relevancia=sem_relevancia)
+    documento = Q(documento_busca=query)
+    substring = Q()
+    for termo in termos(q):
+        substring &= _contem(termo)
+        if not _palavra(termo):
+            documento &= _contem(termo)
+    # no resultado os termos que não são palavra já casaram de um jeito ou de outro.
+    # ts_rank é real (float4); o cursor da paginação compara com um parâmetro float8,
+    # então a relevância sai já como float8 para o valor voltar idêntico.
+    relevancia = Cast(
+        Case(When(documento_busca=query, then=SearchRank(F("documento_busca"), query)), default=sem_relevancia),
+        FloatField(),
+    )
+    return qs.filter(documento | substring).annotate(relevancia=relevancia).defer("documento_busca")
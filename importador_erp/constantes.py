@@ -6,6 +6,18 @@ TIPOS_CLIENTE_LOCACAO = (
 
 SEXO_MAP = {"1": "M", "2": "F", "3": "I"}
 
+TIPOS_IMPORTACAO = (
+    ("CONTRATOS", "Contratos"),
+    ("PROPRIETARIOS", "Proprietários"),
+)
+
+STATUS_IMPORTACAO = (
+    ("PENDENTE", "Pendente"),
+    ("EXECUTANDO", "Executando"),
+    ("CONCLUIDO", "Concluído"),
+    ("FALHOU", "Falhou"),
+)
+
 mapa_tipos_imovel = {
     '1': 'Casa',
     '2': 'Garagem',
@@ -1,14 +1,22 @@
 # app/services/ingest_contratos.py
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from django.db import transaction
+from django.utils import timezone
 from django.utils.timezone import make_naive
-from .models import ContratoLocacao, Cliente  # ajuste o import conforme seu app
+from .models import ContratoLocacao, Cliente, ItemRejeitado  # ajuste o import conforme seu app
 from clientes.models import ClienteLicense  # ajuste conforme seu app
+from . import agregados, busca
 from .constantes import mapa_tipos_imovel, mapa_tipos_contrato, mapa_categoricos, mapa_garantias, mapa_aluguel_garantido, SEXO_MAP
-from typing import Iterable, List
+from typing import Callable, Iterable
+import hashlib
+import json
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 # --------- helpers mínimos ---------
 def _parse_date(s: str | None):
     if not s:
@@ -34,6 +42,95 @@ def _from_map(m: dict, key, default=""):
 def _to_bool(v) -> bool:
     return str(v).strip() not in ("", "0", "False", "false", "None", "null")
 
+# --------- parser compilado (caminho rápido) ---------
+# Mesmas saídas dos helpers acima, mas com memoização e detecção de formato por regex.
+# Qualquer entrada fora do caminho comum cai no helper original, então o resultado é
+# sempre idêntico (ver `manage.py bench_parser`).
+_RE_DATA = re.compile(r"(\d\d)/(\d\d)/(\d{4})(?: (\d\d):(\d\d):(\d\d))?")
+_BOOL_STR = {"": False, "0": False, "1": True, "False": False, "false": False, "None": False, "null": False}
+
+@lru_cache(maxsize=16384)
+def _data_rapida(s: str):
+    m = _RE_DATA.fullmatch(s)
+    if m:
+        mes, dia, ano, h, mi, seg = m.groups()
+        if h is None or (int(h) < 24 and int(mi) < 60 and int(seg) < 60):
+            try:
+                return date(int(ano), int(mes), int(dia))
+            except ValueError:
+                pass
+    return _parse_date(s)
+
+@lru_cache(maxsize=4096)
+def _decimal_rapido(s: str):
+    try:
+        return Decimal(s)
+    except Exception:
+        return _DECIMAL_INVALIDO
+
+_DECIMAL_INVALIDO = object()
+
+def _conversor(tipo, chaves: tuple[str, ...]):
+    """Monta a função item -> valor de um campo do esquema."""
+    if len(chaves) == 1:
+        chave = chaves[0]
+        ler = lambda item: item.get(chave)
+    else:
+        def ler(item):
+            for chave in chaves[:-1]:
+                v = item.get(chave)
+                if v:
+                    return v
+            return item.get(chaves[-1])
+
+    if tipo == "texto":
+        return lambda item: ler(item) or ""
+    if tipo == "data":
+        def converter(item):
+            v = ler(item)
+            if not v:
+                return None
+            return _data_rapida(v) if type(v) is str else _parse_date(v)
+        return converter
+    if tipo == "bool":
+        def converter(item):
+            v = ler(item)
+            if type(v) is str:
+                r = _BOOL_STR.get(v)
+                if r is not None:
+                    return r
+            return _to_bool(v)
+        return converter
+    if tipo[0] == "decimal":
+        default = tipo[1]
+        def converter(item):
+            v = ler(item)
+            if type(v) is str and v:
+                r = _decimal_rapido(v)
+                return default if r is _DECIMAL_INVALIDO else r
+            return _parse_decimal(v, default)
+        return converter
+    if tipo[0] == "mapa":
+        mapa = tipo[1]
+        def converter(item):
+            v = ler(item)
+            return mapa.get(v, "") if type(v) is str else _from_map(mapa, v)
+        return converter
+    raise ValueError(f"tipo de campo desconhecido: {tipo!r}")
+
+def compilar_parser(esquema: tuple) -> Callable[[dict], dict]:
+    """
+    Transforma um esquema (campo, tipo, chaves do payload) numa função que converte um
+    item do Superlógica num dict de campos, com uma única passada pelo esquema.
+    Com várias chaves, vale a primeira com valor (como `a or b` no código original).
+    """
+    conversores = tuple((campo, _conversor(tipo, chaves)) for campo, tipo, chaves in esquema)
+
+    def parse(item: dict) -> dict:
+        return {campo: converter(item) for campo, converter in conversores}
+
+    return parse
+
 
 def _email_placeholder(nome: str, ident: str | int) -> str:
     base = re.sub(r"[^a-z0-9]+", "-", (nome or "").lower()).strip("-") or "sem-nome"
@@ -101,68 +198,470 @@ def _upsert_cliente(nome: str | None, documento: str | None, tipo: str, ident_pe
     return obj
 
 # --------- mapeamento e persistência ---------
+CHUNK_SIZE = 500  # limite de itens por IN (...) / bulk_create
+
+
+def _chunks(seq: list, size: int = CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+# campo do model, tipo, chaves no JSON do Superlógica
+ESQUEMA_CONTRATO = (
+    ("nome_do_imovel", "texto", ("st_imovel_imo", "st_endereco_imo")),
+    ("data_inicio", "data", ("dt_inicio_con",)),
+    ("data_fim", "data", ("dt_fim_con",)),
+    ("aluguel_garantido", "bool", ("nm_repassegarantido_con", "fl_tiporepassegarantido_con")),
+    ("tipo_garantia", ("mapa", mapa_garantias), ("fl_garantia_con",)),
+    ("data_inicio_garantia", "data", ("dt_garantiainicio_con",)),
+    ("data_fim_garantia", "data", ("dt_garantiafim_con",)),
+    ("data_inicio_seguro_incendio", "data", ("dt_seguroincendioinicio_con",)),
+    ("data_fim_seguro_incendio", "data", ("dt_seguroincendiofim_con",)),
+    ("data_ultimo_reajuste", "data", ("dt_ultimoreajuste_con",)),
+    ("valor_aluguel", ("decimal", Decimal("0")), ("vl_aluguel_con",)),
+    ("taxa_administracao", ("decimal", Decimal("0")), ("tx_adm_con",)),
+    ("taxa_locacao", ("decimal", Decimal("0")), ("tx_locacao_con",)),
+    ("valor_venda_imovel", ("decimal", None), ("vl_venda_imo",)),
+    ("valor_garantia_parcela", ("decimal", None), ("vl_garantiaparcela_con",)),
+    ("valor_seguro_incendio", ("decimal", None), ("vl_seguroincendio_con",)),
+    ("tipo_imovel", ("mapa", mapa_tipos_imovel), ("st_tipo_imo",)),
+    ("tipo_contrato", ("mapa", mapa_tipos_contrato), ("id_tipo_con",)),
+    ("status_contrato", ("mapa", mapa_categoricos), ("fl_status_con",)),
+    ("contrato_ativo", "bool", ("fl_ativo_con",)),
+    ("renovacao_automatica", "bool", ("fl_renovacaoautomatica_con",)),
+)
+
+_campos_contrato = compilar_parser(ESQUEMA_CONTRATO)
+CAMPOS_CONTRATO = [campo for campo, _, _ in ESQUEMA_CONTRATO]
+
+def _pessoas_do_item(item: dict) -> tuple[list[tuple], list[tuple]]:
+    """
+    Extrai (ident_pessoa, nome, documento, tipo) dos proprietários e inquilinos do item,
+    na mesma ordem usada por salvar_contrato.
+    """
+    proprietarios = [
+        (_ident_from(p), p.get("st_nome_pes") or p.get("st_fantasia_pes"), p.get("st_cnpj_pes"), "PROPRIETARIO")
+        for p in item.get("proprietarios_beneficiarios", [])
+    ]
+    inquilinos = [
+        (_ident_from(i), i.get("st_nomeinquilino") or i.get("st_fantasia_pes"), i.get("st_cnpj_pes"), "INQUILINO")
+        for i in item.get("inquilinos", [])
+    ]
+    return proprietarios, inquilinos
+
+def _hash_payload(item: dict) -> str:
+    """Hash estável do JSON bruto do contrato (ordem das chaves não importa)."""
+    bruto = json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(bruto.encode()).hexdigest()
+
 def salvar_contrato(item: dict, licenca: ClienteLicense) -> ContratoLocacao:
     ident = int(item["id_contrato_con"])
 
     contrato, _ = ContratoLocacao.objects.update_or_create(
         licenca=licenca,
         identificador_contrato=ident,
-        defaults={
-            "nome_do_imovel": item.get("st_imovel_imo") or item.get("st_endereco_imo") or "",
-            "data_inicio": _parse_date(item.get("dt_inicio_con")),
-            "data_fim": _parse_date(item.get("dt_fim_con")),
-            "aluguel_garantido": _to_bool(item.get("nm_repassegarantido_con") or item.get("fl_tiporepassegarantido_con")),
-            "tipo_garantia": _from_map(mapa_garantias, item.get("fl_garantia_con")),
-            "data_inicio_garantia": _parse_date(item.get("dt_garantiainicio_con")),
-            "data_fim_garantia": _parse_date(item.get("dt_garantiafim_con")),
-            "data_inicio_seguro_incendio": _parse_date(item.get("dt_seguroincendioinicio_con")),
-            "data_fim_seguro_incendio": _parse_date(item.get("dt_seguroincendiofim_con")),
-            "data_ultimo_reajuste": _parse_date(item.get("dt_ultimoreajuste_con")),
-            "valor_aluguel": _parse_decimal(item.get("vl_aluguel_con"), Decimal("0")),
-            "taxa_administracao": _parse_decimal(item.get("tx_adm_con"), Decimal("0")),
-            "taxa_locacao": _parse_decimal(item.get("tx_locacao_con"), Decimal("0")),
-            "valor_venda_imovel": _parse_decimal(item.get("vl_venda_imo")),
-            "valor_garantia_parcela": _parse_decimal(item.get("vl_garantiaparcela_con")),
-            "valor_seguro_incendio": _parse_decimal(item.get("vl_seguroincendio_con")),
-            "tipo_imovel": _from_map(mapa_tipos_imovel, item.get("st_tipo_imo")),
-            "tipo_contrato": _from_map(mapa_tipos_contrato, item.get("id_tipo_con")),
-            "status_contrato": _from_map(mapa_categoricos, item.get("fl_status_con")),
-            "contrato_ativo": _to_bool(item.get("fl_ativo_con")),
-            "renovacao_automatica": _to_bool(item.get("fl_renovacaoautomatica_con")),
-        },
+        defaults={**_campos_contrato(item), "hash_payload": _hash_payload(item)},
+    )
+
+    proprietarios, inquilinos = _pessoas_do_item(item)
+    sincronizar_vinculos(
+        {contrato.pk: {
+            _upsert_cliente(nome, documento, tipo=tipo, ident_pessoa=ident_pessoa).pk
+            for ident_pessoa, nome, documento, tipo in proprietarios
+        }},
+        {contrato.pk: {
+            _upsert_cliente(nome, documento, tipo=tipo, ident_pessoa=ident_pessoa).pk
+            for ident_pessoa, nome, documento, tipo in inquilinos
+        }},
     )
+    return contrato
+
+# --------- persistência em lote ---------
+class MapaClientes:
+    """
+    Identity map de Cliente por identificador_pessoa, válido durante um import.
+
+    Guarda só (pk, cpf_cnpj, nome, tipo, email, telefone) de cada pessoa já resolvida, então quem aparece
+    em vários contratos/páginas é consultado no banco uma única vez. Se a transação de
+    uma página falhar, chame limpar(): o mapa pode conter pks/valores revertidos.
+    """
+    LIMITE = 200_000  # entradas; acima disso o mapa recomeça vazio
+
+    def __init__(self):
+        self._por_ident: dict[int, tuple[int, str, str, str, str, str]] = {}
+        self.acertos = 0
+        self.faltas = 0
+
+    def limpar(self):
+        self._por_ident.clear()
 
-    proprietarios = []
-    for p in item.get("proprietarios_beneficiarios", []):
-        ident_pessoa = _ident_from(p)
-        proprietarios.append(
-            _upsert_cliente(
-                p.get("st_nome_pes") or p.get("st_fantasia_pes"),
-                p.get("st_cnpj_pes"),
-                tipo="PROPRIETARIO",
-                ident_pessoa=ident_pessoa,
+    def resolver(self, pessoas: list[tuple]) -> tuple[dict[int, int], int, int]:
+        """
+        Aplica em lote a mesma regra de _upsert_cliente para todas as pessoas do lote.
+        Retorna ({identificador_pessoa: pk}, criados, atualizados).
+        """
+        # consolida na ordem do payload: a última ocorrência de cada pessoa prevalece
+        desejados: dict[int, dict] = {}
+        for ident_pessoa, nome, documento, tipo in pessoas:
+            if not ident_pessoa:
+                raise ValueError("ident_pessoa ausente para cliente")
+            nome = (nome or "").strip() or "Sem nome"
+            cpf_cnpj = _digits(documento)
+            atual = desejados.get(ident_pessoa)
+            if atual is None:
+                desejados[ident_pessoa] = {"nome": nome, "cpf_cnpj": cpf_cnpj, "tipo": tipo}
+            else:
+                atual["nome"] = nome
+                atual["tipo"] = tipo
+                if cpf_cnpj:
+                    atual["cpf_cnpj"] = cpf_cnpj
+
+        if len(self._por_ident) + len(desejados) > self.LIMITE:
+            self.limpar()
+
+        faltando = [ident for ident in desejados if ident not in self._por_ident]
+        self.acertos += len(desejados) - len(faltando)
+        self.faltas += len(faltando)
+        for bloco in _chunks(faltando):
+            for pk, ident, cpf_cnpj, nome, tipo, email, telefone in Cliente.objects.filter(identificador_pessoa__in=bloco).values_list(
+                "id", "identificador_pessoa", "cpf_cnpj", "nome", "tipo", "email", "telefone"
+            ):
+                self._por_ident[ident] = (pk, cpf_cnpj, nome, tipo, email, telefone)
+
+        novos: list[Cliente] = []
+        alterados: list[Cliente] = []
+        for ident_pessoa, d in desejados.items():
+            conhecido = self._por_ident.get(ident_pessoa)
+            if conhecido is None:
+                novos.append(Cliente(
+                    identificador_pessoa=ident_pessoa,
+                    cpf_cnpj=d["cpf_cnpj"],
+                    rg="",
+                    sexo="I",
+                    nome=d["nome"],
+                    email=_email_placeholder(d["nome"], str(ident_pessoa)),
+                    telefone="",
+                    tipo=d["tipo"],
+                ))
+                continue
+            # atualizações mínimas sem sobrescrever à toa (cpf vazio não apaga o existente)
+            pk, cpf_atual, nome_atual, tipo_atual, email, telefone = conhecido
+            cpf_cnpj = d["cpf_cnpj"] or cpf_atual
+            if (cpf_atual, nome_atual, tipo_atual) != (cpf_cnpj, d["nome"], d["tipo"]):
+                alterados.append(Cliente(
+                    pk=pk, identificador_pessoa=ident_pessoa, cpf_cnpj=cpf_cnpj, nome=d["nome"], tipo=d["tipo"],
+                    email=email, telefone=telefone,
+                ))
+
+        # bulk_create/bulk_update não passam pelo save(): a coluna de busca é montada aqui
+        for obj in novos + alterados:
+            obj.atualizar_busca()
+
+        if novos:
+            # update_conflicts cobre outro import que criou a mesma pessoa nesse meio-tempo
+            Cliente.objects.bulk_create(
+                novos,
+                batch_size=CHUNK_SIZE,
+                update_conflicts=True,
+                unique_fields=["identificador_pessoa"],
+                update_fields=["cpf_cnpj", "nome", "tipo", "busca"],
             )
-        )
+            sem_pk = [obj.identificador_pessoa for obj in novos if not obj.pk]
+            pks = {}
+            for bloco in _chunks(sem_pk):
+                pks.update(Cliente.objects.filter(identificador_pessoa__in=bloco).values_list("identificador_pessoa", "id"))
+            for obj in novos:
+                obj.pk = obj.pk or pks[obj.identificador_pessoa]
+        if alterados:
+            Cliente.objects.bulk_update(alterados, ["cpf_cnpj", "nome", "tipo", "busca"], batch_size=CHUNK_SIZE)
+            busca.atualizar_documentos_de_clientes(obj.pk for obj in alterados)
+
+        for obj in novos + alterados:
+            self._por_ident[obj.identificador_pessoa] = (obj.pk, obj.cpf_cnpj, obj.nome, obj.tipo, obj.email, obj.telefone)
 
-    inquilinos = []
-    for i in item.get("inquilinos", []):
-        ident_pessoa = _ident_from(i)
-        inquilinos.append(
-            _upsert_cliente(
-                i.get("st_nomeinquilino") or i.get("st_fantasia_pes"),
-                i.get("st_cnpj_pes"),
-                tipo="INQUILINO",
-                ident_pessoa=ident_pessoa,
+        return {ident: self._por_ident[ident][0] for ident in desejados}, len(novos), len(alterados)
+
+def _sincronizar_m2m(through, desejado: dict[int, set[int]], desvinculados: set[int] | None = None) -> tuple[int, int]:
+    """
+    Deixa a tabela intermediária de um M2M ContratoLocacao → Cliente igual a `desejado`
+    para os contratos informados: um SELECT (por bloco de CHUNK_SIZE contratos), um
+    bulk_create e um DELETE filtrado. Retorna (adicionados, removidos); os clientes
+    que perderam vínculo entram em `desvinculados`.
+    """
+    adicionar = []
+    remover = []
+    for bloco in _chunks(list(desejado)):
+        atuais: dict[int, dict[int, int]] = {}
+        for row_id, contrato_id, cliente_id in through.objects.filter(
+            contratolocacao_id__in=bloco
+        ).values_list("id", "contratolocacao_id", "cliente_id"):
+            atuais.setdefault(contrato_id, {})[cliente_id] = row_id
+
+        for contrato_id in bloco:
+            existentes = atuais.get(contrato_id, {})
+            alvo = desejado[contrato_id]
+            adicionar.extend(
+                through(contratolocacao_id=contrato_id, cliente_id=cliente_id)
+                for cliente_id in alvo - existentes.keys()
             )
+            for cliente_id, row_id in existentes.items():
+                if cliente_id not in alvo:
+                    remover.append(row_id)
+                    if desvinculados is not None:
+                        desvinculados.add(cliente_id)
+
+    if remover:
+        through.objects.filter(id__in=remover).delete()
+    if adicionar:
+        through.objects.bulk_create(adicionar, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+    return len(adicionar), len(remover)
+
+def sincronizar_vinculos(proprietarios: dict[int, set[int]], inquilinos: dict[int, set[int]]) -> dict:
+    """
+    Substitui os .set() de proprietarios/inquilinos para um lote de contratos de uma vez.
+    Recebe {contrato_id: {cliente_id, ...}} por relação; contratos fora dos dicts não
+    são tocados. O custo é O(1) queries por relação para uma página de contratos.
+    """
+    resumo = {"vinculos_adicionados": 0, "vinculos_removidos": 0}
+    desvinculados: set[int] = set()
+    for through, desejado in (
+        (ContratoLocacao.proprietarios.through, proprietarios),
+        (ContratoLocacao.inquilinos.through, inquilinos),
+    ):
+        adicionados, removidos = _sincronizar_m2m(through, desejado, desvinculados)
+        resumo["vinculos_adicionados"] += adicionados
+        resumo["vinculos_removidos"] += removidos
+    # contratos gravados/revinculados: documento de busca com os dados e as partes atuais
+    busca.atualizar_documentos(proprietarios.keys() | inquilinos.keys())
+    # e os agregados de todos os clientes envolvidos, inclusive os que saíram
+    agregados.atualizar_agregados(desvinculados.union(*proprietarios.values(), *inquilinos.values()))
+    return resumo
+
+# --------- itens rejeitados (dead-letter) ---------
+class ItemInvalido(ValueError):
+    """Item do Superlógica que não dá para gravar; vai para ItemRejeitado."""
+
+
+def _identificador_item(endpoint: str, item) -> str:
+    if not isinstance(item, dict):
+        return ""
+    if endpoint == "contratos":
+        ident = item.get("id_contrato_con")
+    else:
+        ident = item.get("id_pessoa_pes") or item.get("id_proprietario_pes")
+    return str(ident or "")[:50]
+
+
+def registrar_rejeitados(licenca: ClienteLicense, endpoint: str, rejeitados: list[tuple[dict, str]]) -> int:
+    """
+    Grava (item, erro) em ItemRejeitado. Um item que já estava pendente com o mesmo
+    identificador é atualizado (payload, erro, tentativas) em vez de duplicado.
+    """
+    if not rejeitados:
+        return 0
+    idents = {_identificador_item(endpoint, item) for item, _ in rejeitados}
+    pendentes: dict[str, ItemRejeitado] = {}
+    for r in ItemRejeitado.objects.filter(
+        licenca=licenca, endpoint=endpoint, resolvido_em__isnull=True, identificador__in=idents
+    ):
+        # sem identificador, o próprio JSON é a chave
+        chave = r.identificador or json.dumps(r.payload, sort_keys=True, default=str)
+        pendentes[chave] = r
+    novos, alterados = [], []
+    for item, erro in rejeitados:
+        ident = _identificador_item(endpoint, item)
+        existente = pendentes.get(ident or json.dumps(item, sort_keys=True, default=str))
+        if existente is None:
+            novos.append(ItemRejeitado(licenca=licenca, endpoint=endpoint, identificador=ident, payload=item, erro=erro))
+        else:
+            existente.payload, existente.erro = item, erro
+            existente.tentativas += 1
+            existente.data_ult_modificacao = timezone.now()
+            alterados.append(existente)
+    ItemRejeitado.objects.bulk_create(novos, batch_size=CHUNK_SIZE)
+    ItemRejeitado.objects.bulk_update(alterados, ["payload", "erro", "tentativas", "data_ult_modificacao"], batch_size=CHUNK_SIZE)
+    return len(rejeitados)
+
+
+def resolver_rejeitados(licenca: ClienteLicense, endpoint: str, identificadores: Iterable) -> int:
+    """Marca como resolvidos os rejeitados pendentes destes itens (gravados com sucesso agora)."""
+    idents = [str(i) for i in identificadores]
+    resolvidos = 0
+    for bloco in _chunks(idents):
+        resolvidos += ItemRejeitado.objects.filter(
+            licenca=licenca, endpoint=endpoint, resolvido_em__isnull=True, identificador__in=bloco
+        ).update(resolvido_em=timezone.now())
+    return resolvidos
+
+
+def _somar(resumo: dict, parcial: dict):
+    for chave, valor in parcial.items():
+        resumo[chave] += valor
+
+
+def _isolar(gravar_lote: Callable[[list], dict], itens: list, rejeitados: list, mapa: "MapaClientes | None" = None) -> dict:
+    """
+    Tenta gravar `itens` num savepoint só; se o lote falhar, grava item a item (cada um
+    no seu savepoint) e manda para `rejeitados` só os que falharem. Assim um item ruim
+    não derruba a página inteira.
+    """
+    antes = len(rejeitados)
+    try:
+        with transaction.atomic():
+            return gravar_lote(itens)
+    except Exception:
+        del rejeitados[antes:]  # a tentativa item a item classifica de novo
+        logger.warning("Lote de %s itens falhou; gravando item a item", len(itens), exc_info=True)
+    if mapa is not None:
+        mapa.limpar()  # o savepoint revertido pode ter levado clientes que o mapa já conhecia
+    resumo = None
+    for item in itens:
+        antes = len(rejeitados)
+        try:
+            with transaction.atomic():
+                r = gravar_lote([item])
+        except Exception as e:
+            del rejeitados[antes:]
+            if mapa is not None:
+                mapa.limpar()
+            rejeitados.append((item, f"{type(e).__name__}: {e}"))
+            continue
+        if resumo is None:
+            resumo = r
+        else:
+            _somar(resumo, r)
+    return resumo if resumo is not None else gravar_lote([])
+
+
+def _gravar_contratos(itens: list[dict], licenca: ClienteLicense, mapa: MapaClientes, rejeitados: list) -> dict:
+    """Corpo de salvar_contratos; itens inválidos vão para `rejeitados` e o resto é gravado."""
+    acertos, faltas = mapa.acertos, mapa.faltas
+    # consolida por identificador (a última ocorrência prevalece, como no update_or_create)
+    por_ident: dict[int, dict] = {}
+    for item in itens:
+        try:
+            por_ident[int(item["id_contrato_con"])] = item
+        except (KeyError, TypeError, ValueError):
+            rejeitados.append((item, "id_contrato_con ausente ou inválido"))
+
+    existentes: dict[int, str] = {}
+    for bloco in _chunks(list(por_ident)):
+        for ident, licenca_id, h in ContratoLocacao.objects.filter(identificador_contrato__in=bloco).values_list(
+            "identificador_contrato", "licenca_id", "hash_payload"
+        ):
+            if licenca_id != licenca.pk:
+                # o identificador é único no banco todo: nunca toma o contrato de outra licença
+                rejeitados.append((por_ident.pop(ident), f"contrato {ident} pertence a outra licença"))
+                continue
+            existentes[ident] = h
+
+    # só os alterados são convertidos/validados (os demais já foram gravados antes)
+    alterados: dict[int, tuple[dict, str, dict]] = {}
+    vinculos: dict[int, tuple[list[tuple], list[tuple]]] = {}
+    pessoas: list[tuple] = []
+    ignorados = 0
+    for ident, item in por_ident.items():
+        h = _hash_payload(item)
+        if existentes.get(ident) == h:
+            ignorados += 1
+            continue
+        try:
+            campos = _campos_contrato(item)
+            faltando = [c for c in ("data_inicio", "data_fim") if campos[c] is None]
+            if faltando:
+                raise ItemInvalido(f"campos obrigatórios ausentes ou inválidos: {', '.join(faltando)}")
+            proprietarios, inquilinos = _pessoas_do_item(item)
+            if any(not p[0] for p in proprietarios + inquilinos):
+                raise ItemInvalido("ident_pessoa ausente para cliente")
+        except Exception as e:
+            rejeitados.append((item, str(e) if isinstance(e, ItemInvalido) else f"{type(e).__name__}: {e}"))
+            continue
+        alterados[ident] = (item, h, campos)
+        vinculos[ident] = (proprietarios, inquilinos)
+        pessoas.extend(proprietarios)
+        pessoas.extend(inquilinos)
+
+    resumo = {
+        "contratos": len(por_ident),
+        "criados": sum(1 for ident in alterados if ident not in existentes),
+        "atualizados": sum(1 for ident in alterados if ident in existentes),
+        "ignorados": ignorados,
+        "clientes_criados": 0,
+        "clientes_atualizados": 0,
+        "clientes_cache_acertos": 0,
+        "clientes_cache_faltas": 0,
+        "vinculos_adicionados": 0,
+        "vinculos_removidos": 0,
+    }
+    if not alterados:
+        return resumo
+
+    cliente_pks, resumo["clientes_criados"], resumo["clientes_atualizados"] = mapa.resolver(pessoas)
+    resumo["clientes_cache_acertos"] = mapa.acertos - acertos
+    resumo["clientes_cache_faltas"] = mapa.faltas - faltas
+
+    contratos = [
+        ContratoLocacao(
+            licenca=licenca,
+            identificador_contrato=ident,
+            hash_payload=h,
+            **campos,
         )
+        for ident, (item, h, campos) in alterados.items()
+    ]
+    for c in contratos:
+        c.atualizar_busca()
+    ContratoLocacao.objects.bulk_create(
+        contratos,
+        batch_size=CHUNK_SIZE,
+        update_conflicts=True,
+        unique_fields=["identificador_contrato"],
+        update_fields=CAMPOS_CONTRATO + ["hash_payload", "busca"],
+    )
+
+    contrato_pks = {c.identificador_contrato: c.pk for c in contratos if c.pk}
+    faltando = [ident for ident in alterados if ident not in contrato_pks]
+    for bloco in _chunks(faltando):
+        contrato_pks.update(
+            ContratoLocacao.objects.filter(identificador_contrato__in=bloco).values_list("identificador_contrato", "id")
+        )
+
+    desejado_prop: dict[int, set[int]] = {}
+    desejado_inq: dict[int, set[int]] = {}
+    for ident, (proprietarios, inquilinos) in vinculos.items():
+        contrato_id = contrato_pks[ident]
+        desejado_prop[contrato_id] = {cliente_pks[p[0]] for p in proprietarios}
+        desejado_inq[contrato_id] = {cliente_pks[i[0]] for i in inquilinos}
+
+    resumo.update(sincronizar_vinculos(desejado_prop, desejado_inq))
+    return resumo
 
-    contrato.proprietarios.set(proprietarios or [])
-    contrato.inquilinos.set(inquilinos or [])
-    return contrato
 
 @transaction.atomic
-def salvar_contratos(itens: list[dict], licenca: ClienteLicense) -> list[ContratoLocacao]:
-    return [salvar_contrato(item, licenca) for item in itens]
+def salvar_contratos(itens: list[dict], licenca: ClienteLicense, mapa: MapaClientes | None = None) -> dict:
+    """
+    Versão em lote de salvar_contrato: pré-carrega contratos e clientes por blocos,
+    grava com bulk_create(update_conflicts=True) e sincroniza proprietários/inquilinos
+    direto nas tabelas intermediárias. O número de queries cresce por bloco, não por item.
+
+    Contratos cujo payload tem o mesmo hash_payload já gravado são ignorados por completo
+    (nem o contrato, nem seus clientes e vínculos são reescritos). Passe o mesmo `mapa`
+    entre páginas de um import para reaproveitar os clientes já resolvidos.
+
+    Itens inválidos (sem identificador, sem datas obrigatórias, pessoa sem id, ou que o
+    banco recusa) vão para ItemRejeitado e não impedem a gravação do resto do lote;
+    o total fica em resumo["rejeitados"].
+    """
+    mapa = mapa if mapa is not None else MapaClientes()
+    rejeitados: list[tuple[dict, str]] = []
+    resumo = _isolar(lambda lote: _gravar_contratos(lote, licenca, mapa, rejeitados), list(itens), rejeitados, mapa)
+
+    rejeitados_ids = {_identificador_item("contratos", item) for item, _ in rejeitados}
+    resumo["contratos"] = len({_identificador_item("contratos", item) for item in itens} - {""})
+    resumo["rejeitados"] = registrar_rejeitados(licenca, "contratos", rejeitados)
+    resolver_rejeitados(licenca, "contratos", {
+        _identificador_item("contratos", item) for item in itens
+    } - rejeitados_ids - {""})
+    return resumo
 
 
 def _digits(s: str | None) -> str:
@@ -175,60 +674,108 @@ def _email_or_placeholder(email: str | None, ident: int) -> str:
     email = (email or "").strip()
     return email if email else f"noemail-{ident}@invalid.local"
 
-@transaction.atomic
-def salvar_proprietarios(proprietarios: Iterable[dict]) -> List[Cliente]:
-    """
-    Recebe a lista item['proprietarios_beneficiarios'] do JSON e
-    retorna a lista de objetos Cliente (PROPRIETARIO) salvos/atualizados.
-    """
-    salvos: list[Cliente] = []
+CAMPOS_PROPRIETARIO = ["cpf_cnpj", "rg", "sexo", "nome", "email", "telefone", "tipo"]
+
+def _campos_proprietario(p: dict, ident: int) -> dict:
+    return {
+        "cpf_cnpj": _digits(p.get("st_cnpj_pes")),
+        "rg": (p.get("st_rg_pes") or "").strip(),
+        "sexo": _sexo(p.get("st_sexo_pes")),
+        "nome": (p.get("st_nome_pes") or p.get("st_fantasia_pes") or "").strip() or "Sem nome",
+        "email": _email_or_placeholder(p.get("st_email_pes"), ident),
+        "telefone": _digits(p.get("st_celular_pes") or p.get("st_telefone_pes")),
+        "tipo": "PROPRIETARIO",  # garante o tipo correto
+    }
 
-    for p in proprietarios or []:
+def _gravar_proprietarios(proprietarios: list[dict], rejeitados: list) -> dict:
+    """Corpo de salvar_proprietarios: normaliza o lote, um IN por bloco e bulk_create/bulk_update."""
+    # consolida por identificador (a última ocorrência prevalece)
+    desejados: dict[int, dict] = {}
+    for p in proprietarios:
         # chave única do Superlógica
         ident_str = p.get("id_pessoa_pes") or p.get("id_proprietario_pes")
         if not ident_str:
-            # sem identificador não dá pra manter consistência — pula
+            # sem identificador não dá pra manter consistência — vai para os rejeitados
+            rejeitados.append((p, "id_pessoa_pes ausente"))
             continue
-        ident = int(str(ident_str))
-
-        nome = (p.get("st_nome_pes") or p.get("st_fantasia_pes") or "").strip() or "Sem nome"
-        cpf_cnpj = _digits(p.get("st_cnpj_pes"))
-        rg = (p.get("st_rg_pes") or "").strip()
-        sexo = _sexo(p.get("st_sexo_pes"))
-        email = _email_or_placeholder(p.get("st_email_pes"), ident)
-        telefone = _digits(p.get("st_celular_pes") or p.get("st_telefone_pes"))
-
-        obj, created = Cliente.objects.get_or_create(
-            identificador_pessoa=ident,
-            defaults=dict(
-                cpf_cnpj=cpf_cnpj,
-                rg=rg,
-                sexo=sexo,
-                nome=nome,
-                email=email,
-                telefone=telefone,
-                tipo="PROPRIETARIO",
-            ),
+        try:
+            ident = int(str(ident_str))
+        except ValueError:
+            rejeitados.append((p, f"id_pessoa_pes inválido: {ident_str!r}"))
+            continue
+        desejados[ident] = _campos_proprietario(p, ident)
+
+    existentes: dict[int, Cliente] = {}
+    for bloco in _chunks(list(desejados)):
+        existentes.update((c.identificador_pessoa, c) for c in Cliente.objects.filter(identificador_pessoa__in=bloco))
+
+    novos: list[Cliente] = []
+    alterados: list[Cliente] = []
+    mudaram: set[str] = set()
+    for ident, campos in desejados.items():
+        obj = existentes.get(ident)
+        if obj is None:
+            novos.append(Cliente(identificador_pessoa=ident, **campos))
+            continue
+        # se já existia, atualiza campos voláteis (valor vazio não apaga o existente)
+        diferentes = [f for f, v in campos.items() if v not in (None, "") and getattr(obj, f) != v]
+        if diferentes:
+            for f in diferentes:
+                setattr(obj, f, campos[f])
+            mudaram.update(diferentes)
+            alterados.append(obj)
+
+    # bulk_create/bulk_update não passam pelo save(): a coluna de busca é montada aqui
+    for obj in novos:
+        obj.atualizar_busca()
+    if mudaram & set(Cliente.CAMPOS_BUSCA):
+        mudaram.add("busca")
+        for obj in alterados:
+            obj.atualizar_busca()
+
+    if novos:
+        # update_conflicts cobre outro import que criou a mesma pessoa nesse meio-tempo
+        Cliente.objects.bulk_create(
+            novos,
+            batch_size=CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=["identificador_pessoa"],
+            update_fields=CAMPOS_PROPRIETARIO + ["busca"],
         )
+    if alterados:
+        Cliente.objects.bulk_update(alterados, [f for f in CAMPOS_PROPRIETARIO + ["busca"] if f in mudaram], batch_size=CHUNK_SIZE)
+        if "busca" in mudaram:
+            busca.atualizar_documentos_de_clientes(obj.pk for obj in alterados)
+
+    return {
+        "proprietarios": len(desejados),
+        "criados": len(novos),
+        "atualizados": len(alterados),
+        "inalterados": len(desejados) - len(novos) - len(alterados),
+    }
+
+@transaction.atomic
+def salvar_proprietarios(proprietarios: Iterable[dict], licenca: ClienteLicense | None = None) -> dict:
+    """
+    Grava em lote os proprietários de uma página de /proprietarios (ou a lista
+    item['proprietarios_beneficiarios'] do JSON) como Cliente PROPRIETARIO: um IN por
+    bloco para achar os existentes, bulk_create dos novos e bulk_update só das colunas
+    que mudaram. Retorna {"proprietarios", "criados", "atualizados", "inalterados", "rejeitados"}.
+
+    Itens que não podem ser gravados não derrubam o lote: com `licenca`, vão para
+    ItemRejeitado; sem ela, são só registrados no log.
+    """
+    rejeitados: list[tuple[dict, str]] = []
+    itens = list(proprietarios or [])
+    resumo = _isolar(lambda lote: _gravar_proprietarios(lote, rejeitados), itens, rejeitados)
 
-        # se já existia, atualiza campos voláteis
-        if not created:
-            changed = False
-            for field, value in [
-                ("cpf_cnpj", cpf_cnpj),
-                ("rg", rg),
-                ("sexo", sexo),
-                ("nome", nome),
-                ("email", email),
-                ("telefone", telefone),
-                ("tipo", "PROPRIETARIO"),  # garante o tipo correto
-            ]:
-                if getattr(obj, field) != value and value not in (None, ""):
-                    setattr(obj, field, value)
-                    changed = True
-            if changed:
-                obj.save()
-
-        salvos.append(obj)
-
-    return salvos
\ No newline at end of file
+    rejeitados_ids = {_identificador_item("proprietarios", item) for item, _ in rejeitados}
+    gravados = {_identificador_item("proprietarios", item) for item in itens} - rejeitados_ids - {""}
+    resumo["proprietarios"] = len(gravados)
+    resumo["rejeitados"] = len(rejeitados)
+    if licenca is not None:
+        registrar_rejeitados(licenca, "proprietarios", rejeitados)
+        resolver_rejeitados(licenca, "proprietarios", gravados)
+    elif rejeitados:
+        logger.warning("%s proprietários rejeitados: %s", len(rejeitados), [erro for _, erro in rejeitados][:5])
+    return resumo
@@ -0,0 +1,215 @@
+# importador_erp/jobs.py
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from clientes.models import ClienteLicense
+from integrador.models import LicenseIntegration
+from . import services
+from .models import JobImportacao
+
+logger = logging.getLogger(__name__)
+
+IMPORTADORES = {
+    "CONTRATOS": services.importar_contratos,
+    "PROPRIETARIOS": services.importar_proprietarios,
+}
+# chave do resumo de cada importador que conta as linhas gravadas
+CHAVE_LINHAS = {
+    "CONTRATOS": "contratos",
+    "PROPRIETARIOS": "importados",
+}
+# o worker renova o lease a cada INTERVALO_HEARTBEAT; um job cujo lease venceu
+# (worker morto) pode ser liberado por liberar_orfaos
+LEASE = timedelta(minutes=2)
+INTERVALO_HEARTBEAT = 30  # segundos
+
+
+class JobAbandonado(Exception):
+    """O lease do job venceu e ele foi liberado: este worker não deve continuar."""
+
+
+def renovar_lease(job_id: int) -> bool:
+    """Estende o lease de um job EXECUTANDO; False se ele já não está mais executando."""
+    return bool(
+        JobImportacao.objects.filter(pk=job_id, status="EXECUTANDO").update(lease_expira_em=timezone.now() + LEASE)
+    )
+
+
+class Heartbeat(threading.Thread):
+    """Renova o lease do job em segundo plano enquanto o import roda (páginas lentas incluídas)."""
+
+    def __init__(self, job_id: int, intervalo: float = INTERVALO_HEARTBEAT):
+        super().__init__(name=f"heartbeat-job-{job_id}", daemon=True)
+        self.job_id = job_id
+        self.intervalo = intervalo
+        self.perdido = threading.Event()  # o job foi liberado por outro processo
+        self._parar = threading.Event()
+
+    def run(self):
+        try:
+            while not self._parar.wait(self.intervalo):
+                try:
+                    if not renovar_lease(self.job_id):
+                        self.perdido.set()
+                        return
+                except Exception:
+                    logger.warning("Falha ao renovar o lease do job %s", self.job_id, exc_info=True)
+        finally:
+            connection.close()  # conexão própria desta thread
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def _ativo(licenca: ClienteLicense, tipo: str) -> JobImportacao | None:
+    return JobImportacao.objects.filter(
+        licenca=licenca, tipo=tipo, status__in=("PENDENTE", "EXECUTANDO")
+    ).order_by(Case(When(status="PENDENTE", then=Value(0)), default=Value(1))).first()  # o PENDENTE antes do EXECUTANDO
+
+
+def enfileirar(licenca: ClienteLicense, tipo: str, usuario=None) -> JobImportacao:
+    """
+    Cria um job PENDENTE, ou devolve o que já está na fila/executando para a mesma licença
+    e tipo. Dois pedidos simultâneos não criam dois jobs: a constraint
+    um_job_pendente_por_licenca_tipo recusa o segundo, que devolve o do primeiro.
+    """
+    ativo = _ativo(licenca, tipo)
+    if ativo:
+        return ativo
+    try:
+        with transaction.atomic():
+            return JobImportacao.objects.create(licenca=licenca, tipo=tipo, criado_por=usuario)
+    except IntegrityError:
+        ativo = _ativo(licenca, tipo)
+        if ativo is None:
+            raise
+        return ativo
+
+
+def reservar(job: JobImportacao) -> bool:
+    """
+    Passa um job PENDENTE para EXECUTANDO. Devolve False se outro worker já o pegou
+    ou se a licença já tem um job executando (constraint um_job_executando_por_licenca).
+    """
+    agora = timezone.now()
+    try:
+        with transaction.atomic():
+            n = JobImportacao.objects.filter(pk=job.pk, status="PENDENTE").update(
+                status="EXECUTANDO", data_inicio=agora, data_ult_modificacao=agora, lease_expira_em=agora + LEASE,
+            )
+    except IntegrityError:
+        return False
+    if not n:
+        return False
+    job.refresh_from_db()
+    return True
+
+
+def reservar_proximo() -> JobImportacao | None:
+    """
+    Reserva o job PENDENTE mais antigo cuja licença não tem nada executando.
+    select_for_update(skip_locked) evita que dois workers disputem o mesmo job.
+    """
+    with transaction.atomic():
+        ocupadas = JobImportacao.objects.filter(status="EXECUTANDO").values("licenca_id")
+        job = (
+            JobImportacao.objects.select_for_update(skip_locked=True)
+            .filter(status="PENDENTE")
+            .exclude(licenca_id__in=ocupadas)
+            .order_by("data_criacao")
+            .first()
+        )
+        if job is None or not reservar(job):
+            return None
+    return job
+
+
+def liberar_orfaos(timeout: timedelta) -> int:
+    """
+    Marca como FALHOU os jobs EXECUTANDO cujo lease venceu (o worker parou de renová-lo,
+    ou seja, morreu). Um import longo e vivo mantém o lease e nunca é liberado.
+    `timeout` vale só para jobs sem lease, reservados antes de ele existir.
+    """
+    agora = timezone.now()
+    return JobImportacao.objects.filter(
+        Q(lease_expira_em__lt=agora) | Q(lease_expira_em__isnull=True, data_ult_modificacao__lt=agora - timeout),
+        status="EXECUTANDO",
+    ).update(
+        status="FALHOU",
+        ultimo_erro="Lease do worker vencido; job abandonado.",
+        data_fim=agora,
+        data_ult_modificacao=agora,
+        lease_expira_em=None,
+    )
+
+
+def executar(job: JobImportacao, **opcoes) -> JobImportacao:
+    """Roda um job já reservado; `opcoes` (ex.: max_rps) são repassadas ao importador."""
+    chave = CHAVE_LINHAS[job.tipo]
+    heartbeat = Heartbeat(job.pk)
+
+    def progresso(resumo: dict):
+        agora = timezone.now()
+        atualizado = JobImportacao.objects.filter(pk=job.pk, status="EXECUTANDO").update(
+            paginas=resumo["paginas"],
+            linhas=resumo[chave],
+            erros=resumo["falhas"],
+            resumo=resumo,
+            data_ult_modificacao=agora,
+            lease_expira_em=agora + LEASE,
+        )
+        if not atualizado:
+            heartbeat.perdido.set()
+            raise JobAbandonado(f"Job {job.pk} liberado por lease vencido; interrompendo este worker.")
+
+    heartbeat.start()
+    try:
+        integ = LicenseIntegration.objects.select_related("license").get(license=job.licenca, is_active=True)
+        resumo = IMPORTADORES[job.tipo](integ, progresso=progresso, **opcoes)
+        if heartbeat.perdido.is_set():
+            raise JobAbandonado(f"Job {job.pk} liberado por lease vencido antes de terminar.")
+    except Exception as e:
+        logger.exception("Job de importação %s falhou", job.pk)
+        job.refresh_from_db(fields=["erros"])
+        campos = {"status": "FALHOU", "erros": job.erros + 1, "ultimo_erro": str(e)}
+    else:
+        campos = {
+            "status": "CONCLUIDO",
+            "paginas": resumo["paginas"],
+            "linhas": resumo[chave],
+            "erros": resumo["falhas"],
+            "resumo": resumo,
+        }
+    finally:
+        heartbeat.parar()
+    agora = timezone.now()
+    campos.update(data_fim=agora, data_ult_modificacao=agora, lease_expira_em=None)
+    # só fecha o job se ele ainda é deste worker: liberado por liberar_orfaos, fica como está
+    if not JobImportacao.objects.filter(pk=job.pk, status="EXECUTANDO").update(**campos):
+        logger.warning("Job %s foi liberado antes de terminar; o resultado deste worker foi descartado", job.pk)
+    job.refresh_from_db()
+    return job
+
+
+def status_json(job: JobImportacao) -> dict:
+    return {
+        "id": job.pk,
+        "tipo": job.tipo,
+        "status": job.status,
+        "licenca": job.licenca.license_name,
+        "paginas": job.paginas,
+        "linhas": job.linhas,
+        "linhas_por_segundo": job.linhas_por_segundo(),
+        "erros": job.erros,
+        "ultimo_erro": job.ultimo_erro,
+        "resumo": job.resumo,
+        "data_criacao": job.data_criacao,
+        "data_inicio": job.data_inicio,
+        "data_fim": job.data_fim,
+    }
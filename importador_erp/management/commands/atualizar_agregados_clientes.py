@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from importador_erp.agregados import recalcular_todos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula AgregadoCliente (contratos e aluguel por papel) de todos os clientes. "
+        "O import mantém o agregado sozinho; use após cargas feitas fora dele."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        def progresso(n: int):
+            if n % 10_000 < opts["lote"]:  # ~a cada 10 mil
+                self.stderr.write(f"{n} clientes recalculados")
+
+        total = recalcular_todos(lote=opts["lote"], progresso=progresso)
+        self.stdout.write(self.style.SUCCESS(f"{total} agregados recalculados."))
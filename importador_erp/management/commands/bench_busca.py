@@ -0,0 +1,205 @@
+import json
+import statistics
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from clientes.models import ClienteLicense
+from importador_erp import busca
+from importador_erp.management.commands.bench_importacao import ID_INICIAL, _Rollback
+from importador_erp.models import Cliente, ContratoLocacao
+
+NOMES = ["João", "Maria", "José", "Ana", "Conceição", "Antônio", "Luíza", "Sérgio", "Márcia", "Paulo"]
+SOBRENOMES = ["Silva", "Souza", "Araújo", "Gonçalves", "Lima", "Pereira", "Assunção", "Müller", "Oliveira", "Ribeiro"]
+LOTE = 5000
+
+
+def nome_sintetico(i: int) -> str:
+    return f"{NOMES[i % len(NOMES)]} {SOBRENOMES[(i // len(NOMES)) % len(SOBRENOMES)]} {i}"
+
+
+def legado_clientes(qs, q):
+    """Filtro das listas antes da coluna de busca (referência)."""
+    return qs.filter(
+        Q(nome__icontains=q) | Q(email__icontains=q) | Q(cpf_cnpj__icontains=q) | Q(telefone__icontains=q)
+    )
+
+
+def legado_contratos(qs, q):
+    return qs.filter(
+        Q(nome_do_imovel__icontains=q)
+        | Q(identificador_contrato__icontains=q)
+        | Q(status_contrato__icontains=q)
+        | Q(tipo_imovel__icontains=q)
+        | Q(tipo_contrato__icontains=q)
+        | Q(inquilinos__nome__icontains=q)
+        | Q(proprietarios__nome__icontains=q)
+        | Q(inquilinos__email__icontains=q)
+        | Q(proprietarios__email__icontains=q)
+        | Q(inquilinos__cpf_cnpj__icontains=q)
+        | Q(proprietarios__cpf_cnpj__icontains=q)
+    ).distinct()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a latência da busca de clientes e contratos (count + primeira página, como "
+        "as listas fazem) com o filtro antigo (icontains), com a coluna normalizada e, para "
+        "contratos, com a busca textual (tsvector) ordenada por relevância. "
+        "Os dados sintéticos são revertidos ao final de cada tamanho."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tamanhos", type=int, nargs="+", default=[100_000, 1_000_000], help="Quantidade de clientes.")
+        parser.add_argument("--contratos-por-cliente", type=float, default=0.1)
+        parser.add_argument("--repeticoes", type=int, default=10)
+        parser.add_argument("--sem-legado", action="store_true", help="Não mede o filtro antigo (lento em 1M).")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        resultados = []
+        for tamanho in opts["tamanhos"]:
+            resultados += self._rodada(tamanho, opts)
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+        self.stdout.write(
+            f"{'clientes':>9} {'lista':<9} {'filtro':<7} {'termo':<22} {'achados':>8} {'mediana ms':>11} {'p95 ms':>8} {'índice':>7}"
+        )
+        for r in resultados:
+            self.stdout.write(
+                f"{r['clientes']:>9} {r['lista']:<9} {r['filtro']:<7} {r['termo']:<22} {r['achados']:>8} "
+                f"{r['mediana_ms']:>11.1f} {r['p95_ms']:>8.1f} {r['usa_indice'] if r['usa_indice'] is not None else '-':>7}"
+            )
+
+    def _rodada(self, tamanho: int, opts) -> list[dict]:
+        resultados = []
+        try:
+            with transaction.atomic():
+                t = time.perf_counter()
+                self._popular(tamanho, min(int(tamanho * opts["contratos_por_cliente"]), tamanho // 3))
+                self.stderr.write(f"{tamanho} clientes gerados em {time.perf_counter() - t:.1f}s")
+
+                meio = tamanho // 2
+                contrato = min(int(tamanho * opts["contratos_por_cliente"]), tamanho // 3) // 2
+                termos = {
+                    "clientes": [
+                        "conceicao",                                    # sem acento acha "Conceição"
+                        busca.normalizar(nome_sintetico(meio).split(" ", 1)[1]),  # duas palavras, um resultado
+                        f"cliente{meio}@",                              # email
+                        f"{(meio * 7919) % 10**11:011d}"[:7],           # começo do CPF
+                    ],
+                    # imóvel, proprietário (cliente 3n) por email e inquilino por nome
+                    "contratos": [f"imovel {contrato}", f"cliente{3 * contrato}@", "assuncao"],
+                }
+                # (nome, filtro, ordenação) por lista; "texto" é a busca textual com relevância
+                filtros = {
+                    "clientes": [
+                        ("legado", legado_clientes, ["nome"]),
+                        ("novo", busca.filtrar_clientes, ["nome"]),
+                    ],
+                    "contratos": [
+                        ("legado", legado_contratos, ["-data_inicio"]),
+                        ("novo", busca.filtrar_contratos, ["-data_inicio"]),
+                        ("texto", busca.buscar_contratos, ["-relevancia", "-data_inicio"]),
+                    ],
+                }
+                bases = {"clientes": Cliente.objects.all(), "contratos": ContratoLocacao.objects.all()}
+                for lista, variantes in filtros.items():
+                    for termo in termos[lista]:
+                        for nome, filtrar, ordem in variantes:
+                            if nome == "legado" and opts["sem_legado"]:
+                                continue
+                            qs = filtrar(bases[lista], termo).order_by(*ordem)
+                            resultados.append({
+                                "clientes": tamanho, "lista": lista, "filtro": nome, "termo": termo,
+                                **self._medir(qs, opts["repeticoes"]),
+                            })
+                raise _Rollback
+        except _Rollback:
+            pass
+        return resultados
+
+    def _popular(self, tamanho: int, contratos: int):
+        usuario = User.objects.create(username=f"bench-busca-{tamanho}")
+        licenca = ClienteLicense.objects.create(cliente=usuario.pessoa, license_name=f"bench-busca-{tamanho}")
+
+        for inicio in range(0, tamanho, LOTE):
+            lote = []
+            for i in range(inicio, min(inicio + LOTE, tamanho)):
+                c = Cliente(
+                    identificador_pessoa=ID_INICIAL + i,
+                    nome=nome_sintetico(i),
+                    email=f"cliente{i}@exemplo.com.br",
+                    cpf_cnpj=f"{(i * 7919) % 10**11:011d}",
+                    telefone=f"119{i % 10**8:08d}",
+                    rg="", sexo="I", tipo="PROPRIETARIO",
+                )
+                c.atualizar_busca()
+                lote.append(c)
+            Cliente.objects.bulk_create(lote, batch_size=LOTE)
+
+        Proprietarios = ContratoLocacao.proprietarios.through
+        Inquilinos = ContratoLocacao.inquilinos.through
+        for inicio in range(0, contratos, LOTE):
+            lote = []
+            for n in range(inicio, min(inicio + LOTE, contratos)):
+                c = ContratoLocacao(
+                    identificador_contrato=ID_INICIAL + n,
+                    nome_do_imovel=f"Imóvel {n}",
+                    data_inicio=date(2020 + n % 5, 1 + n % 12, 1),
+                    data_fim=date(2026 + n % 5, 1 + n % 12, 1),
+                    tipo_garantia="", valor_aluguel=1000, taxa_administracao=10, taxa_locacao=100,
+                    tipo_imovel="Apartamento", tipo_contrato="Residencial", status_contrato="Ativo",
+                    licenca=licenca,
+                )
+                c.atualizar_busca()
+                lote.append(c)
+            ContratoLocacao.objects.bulk_create(lote, batch_size=LOTE)
+            fim = inicio + len(lote)
+            pks = ContratoLocacao.objects.filter(
+                identificador_contrato__gte=ID_INICIAL + inicio, identificador_contrato__lt=ID_INICIAL + fim
+            ).values_list("pk", "identificador_contrato")
+            clientes = dict(Cliente.objects.filter(
+                identificador_pessoa__gte=ID_INICIAL + 3 * inicio, identificador_pessoa__lt=ID_INICIAL + 3 * fim
+            ).values_list("identificador_pessoa", "pk"))
+            # contrato n: proprietário = cliente 3n, inquilino = cliente 3n + 1
+            Proprietarios.objects.bulk_create(
+                [Proprietarios(contratolocacao_id=pk, cliente_id=clientes[ID_INICIAL + 3 * (ident - ID_INICIAL)]) for pk, ident in pks],
+                batch_size=LOTE,
+            )
+            Inquilinos.objects.bulk_create(
+                [Inquilinos(contratolocacao_id=pk, cliente_id=clientes[ID_INICIAL + 3 * (ident - ID_INICIAL) + 1]) for pk, ident in pks],
+                batch_size=LOTE,
+            )
+            busca.atualizar_documentos(pk for pk, _ in pks)
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Cliente, ContratoLocacao, Proprietarios, Inquilinos):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def _medir(self, qs, repeticoes: int) -> dict:
+        """count() + primeira página (12 itens), como a ListView paginada."""
+        tempos = []
+        for _ in range(repeticoes):
+            t = time.perf_counter()
+            achados = qs.count()
+            list(qs[:12])
+            tempos.append((time.perf_counter() - t) * 1000)
+        usa_indice = None
+        if connection.vendor == "postgresql":
+            plano = qs.explain()
+            usa_indice = "_busca_trgm" in plano
+        tempos.sort()
+        return {
+            "achados": achados,
+            "mediana_ms": round(statistics.median(tempos), 2),
+            "p95_ms": round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 2),
+            "usa_indice": usa_indice,
+        }
@@ -0,0 +1,138 @@
+import json
+import resource
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from clientes.models import ClienteLicense
+from importador_erp import services
+from integrador.models import LicenseIntegration
+from integrador.simulador import Simulador
+
+ID_INICIAL = 1_500_000_000  # longe dos identificadores reais do Superlógica
+
+# endpoint -> (importador, chave de gravados no resumo, chave de ignorados/inalterados)
+IMPORTADORES = {
+    "contratos": (services.importar_contratos, "contratos", "ignorados"),
+    "proprietarios": (services.importar_proprietarios, "importados", "inalterados"),
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class ContadorQueries:
+    """execute_wrapper que só conta (não guarda o SQL, para não pesar em 100k linhas)."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+def pico_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o import de contratos (ou proprietários) ponta a ponta contra o Superlógica simulado "
+        "(linhas/s, queries/linha, pico de RSS). Tudo é revertido ao final de cada rodada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+        parser.add_argument("--endpoint", choices=sorted(IMPORTADORES), default="contratos")
+        parser.add_argument("--itens-por-pagina", type=int, default=50)
+        parser.add_argument("--concorrencia", type=int, default=4)
+        parser.add_argument("--latencia-ms", type=float, default=20)
+        parser.add_argument("--taxa-erro", type=float, default=0)
+        parser.add_argument("--taxa-429", type=float, default=0)
+        parser.add_argument("--com-rate-limit", action="store_true", help="Mantém o token bucket configurado.")
+        parser.add_argument("--sem-reimport", action="store_true", help="Não mede o segundo import (sem mudanças).")
+        parser.add_argument("--sem-cache", action="store_true", help="Desliga o cache de páginas (ETag/hash).")
+        parser.add_argument("--sem-etag", action="store_true", help="Simulador sem ETag: o cache compara o hash do corpo.")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        sim = Simulador(
+            latencia_ms=opts["latencia_ms"], taxa_erro=opts["taxa_erro"], taxa_429=opts["taxa_429"], id_inicial=ID_INICIAL,
+            etag=not opts["sem_etag"],
+        )
+        base = sim.iniciar()
+        ajustes = {
+            "SUPERLOGICA_API_BASE": base,
+            "SUPERLOGICA_IMOBILIARIA_API": f"{base}/imobiliaria/api",
+            "SUPERLOGICA_CACHE_PAGINAS": not opts["sem_cache"],  # fica no banco: revertido com o resto
+        }
+        if not opts["com_rate_limit"]:
+            ajustes.update(SUPERLOGICA_RATE_GLOBAL=0, SUPERLOGICA_RATE_LICENCA=0)
+
+        resultados = []
+        try:
+            with override_settings(**ajustes):
+                for tamanho in opts["tamanhos"]:
+                    sim.colecoes[opts["endpoint"]].total = tamanho
+                    resultados += self._rodada(tamanho, opts)
+        finally:
+            sim.parar()
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+        self.stdout.write(f"{opts['endpoint']:>13} {'rodada':<10} {'segundos':>9} {'linhas/s':>9} {'queries/linha':>14} {'pico RSS MB':>12}")
+        for r in resultados:
+            self.stdout.write(
+                f"{r['itens']:>13} {r['rodada']:<10} {r['segundos']:>9.2f} {r['linhas_por_segundo']:>9.0f} "
+                f"{r['queries_por_linha']:>14.2f} {r['pico_rss_mb']:>12.0f}"
+            )
+
+    def _rodada(self, tamanho: int, opts) -> list[dict]:
+        resultados = []
+        importar, chave_gravados, chave_ignorados = IMPORTADORES[opts["endpoint"]]
+        try:
+            with transaction.atomic():
+                usuario = User.objects.create(username=f"bench-importacao-{tamanho}")
+                licenca = ClienteLicense.objects.create(cliente=usuario.pessoa, license_name=f"bench-{tamanho}")
+                integracao = LicenseIntegration.objects.create(
+                    license=licenca,
+                    access_token="token-simulado",
+                    import_concurrency=opts["concorrencia"],
+                    import_page_size=opts["itens_por_pagina"],
+                )
+                rodadas = ["import"] if opts["sem_reimport"] else ["import", "reimport"]
+                for rodada in rodadas:
+                    contador = ContadorQueries()
+                    t = time.perf_counter()
+                    with connection.execute_wrapper(contador):
+                        resumo = importar(integracao)
+                    segundos = time.perf_counter() - t
+                    if resumo["falhas"]:
+                        self.stderr.write(self.style.WARNING(f"{tamanho} ({rodada}): {resumo['falhas']} páginas com falha"))
+                    resultados.append({
+                        "endpoint": opts["endpoint"],
+                        "itens": tamanho,
+                        "rodada": rodada,
+                        "segundos": round(segundos, 3),
+                        "linhas": tamanho,
+                        "gravados": resumo[chave_gravados],
+                        "ignorados": resumo[chave_ignorados],
+                        "paginas_inalteradas": resumo["paginas_inalteradas"],
+                        "linhas_por_segundo": round(tamanho / segundos, 1) if segundos else 0,
+                        "queries_por_linha": round(contador.total / tamanho, 3),
+                        "pico_rss_mb": round(pico_rss_mb(), 1),
+                    })
+                    self.stderr.write(
+                        f"{tamanho} ({rodada}): {resumo[chave_gravados]} {opts['endpoint']} gravados, "
+                        f"{resumo['paginas_inalteradas']} páginas inalteradas, {segundos:.1f}s"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+        return resultados
@@ -0,0 +1,123 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from importador_erp import ingest
+from importador_erp.constantes import mapa_tipos_imovel, mapa_tipos_contrato, mapa_categoricos, mapa_garantias
+from importador_erp.ingest import _parse_date, _parse_decimal, _from_map, _to_bool
+
+
+def _campos_contrato_legado(item: dict) -> dict:
+    """Conversão original de salvar_contrato, usada como referência."""
+    return {
+        "nome_do_imovel": item.get("st_imovel_imo") or item.get("st_endereco_imo") or "",
+        "data_inicio": _parse_date(item.get("dt_inicio_con")),
+        "data_fim": _parse_date(item.get("dt_fim_con")),
+        "aluguel_garantido": _to_bool(item.get("nm_repassegarantido_con") or item.get("fl_tiporepassegarantido_con")),
+        "tipo_garantia": _from_map(mapa_garantias, item.get("fl_garantia_con")),
+        "data_inicio_garantia": _parse_date(item.get("dt_garantiainicio_con")),
+        "data_fim_garantia": _parse_date(item.get("dt_garantiafim_con")),
+        "data_inicio_seguro_incendio": _parse_date(item.get("dt_seguroincendioinicio_con")),
+        "data_fim_seguro_incendio": _parse_date(item.get("dt_seguroincendiofim_con")),
+        "data_ultimo_reajuste": _parse_date(item.get("dt_ultimoreajuste_con")),
+        "valor_aluguel": _parse_decimal(item.get("vl_aluguel_con"), Decimal("0")),
+        "taxa_administracao": _parse_decimal(item.get("tx_adm_con"), Decimal("0")),
+        "taxa_locacao": _parse_decimal(item.get("tx_locacao_con"), Decimal("0")),
+        "valor_venda_imovel": _parse_decimal(item.get("vl_venda_imo")),
+        "valor_garantia_parcela": _parse_decimal(item.get("vl_garantiaparcela_con")),
+        "valor_seguro_incendio": _parse_decimal(item.get("vl_seguroincendio_con")),
+        "tipo_imovel": _from_map(mapa_tipos_imovel, item.get("st_tipo_imo")),
+        "tipo_contrato": _from_map(mapa_tipos_contrato, item.get("id_tipo_con")),
+        "status_contrato": _from_map(mapa_categoricos, item.get("fl_status_con")),
+        "contrato_ativo": _to_bool(item.get("fl_ativo_con")),
+        "renovacao_automatica": _to_bool(item.get("fl_renovacaoautomatica_con")),
+    }
+
+
+def _data(rnd: random.Random):
+    r = rnd.random()
+    if r < 0.05:
+        return rnd.choice([None, "", "13/45/2024", "02/30/2023", "2024-01-02", "01/02/2024 24:00:00", "1/2/2024"])
+    d = f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/{rnd.randint(2015, 2030)}"
+    return d if r < 0.6 else f"{d} 00:00:00"
+
+
+def _valor(rnd: random.Random):
+    r = rnd.random()
+    if r < 0.05:
+        return rnd.choice([None, "", "abc", 0, 1200, "1.2e3", "NaN"])
+    return f"{rnd.randint(300, 20000)}.{rnd.randint(0, 99):02d}"
+
+
+def gerar_itens(n: int, semente: int = 42) -> list[dict]:
+    rnd = random.Random(semente)
+    itens = []
+    for i in range(n):
+        itens.append({
+            "id_contrato_con": str(i + 1),
+            "st_imovel_imo": rnd.choice(["", None, f"Imóvel {i}"]),
+            "st_endereco_imo": f"Rua {i}",
+            "dt_inicio_con": _data(rnd),
+            "dt_fim_con": _data(rnd),
+            "nm_repassegarantido_con": rnd.choice(["", "0", "1", None]),
+            "fl_tiporepassegarantido_con": rnd.choice(["", "0", "1", "2", None, 1, 0.0]),
+            "fl_garantia_con": rnd.choice(["0", "1", "3", 3, None, ""]),
+            "dt_garantiainicio_con": _data(rnd),
+            "dt_garantiafim_con": _data(rnd),
+            "dt_seguroincendioinicio_con": _data(rnd),
+            "dt_seguroincendiofim_con": _data(rnd),
+            "dt_ultimoreajuste_con": _data(rnd),
+            "vl_aluguel_con": _valor(rnd),
+            "tx_adm_con": _valor(rnd),
+            "tx_locacao_con": _valor(rnd),
+            "vl_venda_imo": _valor(rnd),
+            "vl_garantiaparcela_con": _valor(rnd),
+            "vl_seguroincendio_con": _valor(rnd),
+            "st_tipo_imo": str(rnd.randint(1, 31)),
+            "id_tipo_con": rnd.choice(["1", "2", "3", 7, None]),
+            "fl_status_con": rnd.choice(["0", "1", "2", "4"]),
+            "fl_ativo_con": rnd.choice(["0", "1", 1, True, False, None, " 1 "]),
+            "fl_renovacaoautomatica_con": rnd.choice(["0", "1", "false", "null"]),
+        })
+    return itens
+
+
+class Command(BaseCommand):
+    help = "Compara o parser compilado de contratos com os helpers originais (tempo e saída)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=10_000)
+        parser.add_argument("--repeticoes", type=int, default=5)
+
+    def handle(self, *args, **opts):
+        itens = gerar_itens(opts["linhas"])
+
+        divergentes = [
+            item["id_contrato_con"] for item in itens
+            if repr(_campos_contrato_legado(item)) != repr(ingest._campos_contrato(item))
+        ]
+        if divergentes:
+            raise CommandError(f"Parser compilado diverge dos helpers em {len(divergentes)} itens: {divergentes[:10]}")
+
+        def medir(fn, limpar_cache=False):
+            tempos = []
+            for _ in range(opts["repeticoes"]):
+                if limpar_cache:
+                    ingest._data_rapida.cache_clear()
+                    ingest._decimal_rapido.cache_clear()
+                t = time.perf_counter()
+                for item in itens:
+                    fn(item)
+                tempos.append(time.perf_counter() - t)
+            return min(tempos) * 10_000 / len(itens) * 1000  # ms por 10k linhas
+
+        legado = medir(_campos_contrato_legado)
+        frio = medir(ingest._campos_contrato, limpar_cache=True)
+        quente = medir(ingest._campos_contrato)
+
+        self.stdout.write(f"{len(itens)} linhas, saídas idênticas.")
+        self.stdout.write(f"helpers originais:         {legado:8.1f} ms / 10k linhas")
+        self.stdout.write(f"parser compilado (frio):   {frio:8.1f} ms / 10k linhas ({legado / frio:.1f}x)")
+        self.stdout.write(f"parser compilado (quente): {quente:8.1f} ms / 10k linhas ({legado / quente:.1f}x)")
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from importador_erp import jobs
+
+
+class Command(BaseCommand):
+    help = "Consome a fila de importações do ERP (JobImportacao) fora do ciclo de requisição."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uma-vez", action="store_true", help="Processa os jobs pendentes e sai.")
+        parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos entre consultas à fila vazia.")
+        parser.add_argument(
+            "--timeout-orfao", type=int, default=30,
+            help="Minutos sem progresso para considerar abandonado um job EXECUTANDO sem lease "
+                 "(os demais são liberados quando o lease vence).",
+        )
+
+    def handle(self, *args, **opts):
+        timeout = timedelta(minutes=opts["timeout_orfao"])
+        self.stdout.write("Worker de importação iniciado.")
+        try:
+            while True:
+                liberados = jobs.liberar_orfaos(timeout)
+                if liberados:
+                    self.stdout.write(self.style.WARNING(f"{liberados} job(s) abandonado(s) marcados como FALHOU."))
+
+                job = jobs.reservar_proximo()
+                if job is None:
+                    if opts["uma_vez"]:
+                        break
+                    time.sleep(opts["intervalo"])
+                    continue
+
+                self.stdout.write(f"Executando job {job.pk} ({job.tipo} - {job.licenca.license_name})...")
+                job = jobs.executar(job)
+                estilo = self.style.SUCCESS if job.status == "CONCLUIDO" else self.style.ERROR
+                self.stdout.write(estilo(
+                    f"Job {job.pk}: {job.status} - {job.paginas} páginas, {job.linhas} linhas, "
+                    f"{job.linhas_por_segundo()} linhas/s, {job.erros} erros"
+                ))
+        except KeyboardInterrupt:
+            self.stdout.write("Worker interrompido.")
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from importador_erp.orquestrador import importar_todas
+
+
+class Command(BaseCommand):
+    help = "Importa todas as licenças com integração ativa em paralelo (para agendar no cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tipo", choices=["CONTRATOS", "PROPRIETARIOS"], default="CONTRATOS")
+        parser.add_argument("--processos", type=int, default=4, help="Máximo de licenças importando ao mesmo tempo.")
+        parser.add_argument("--rps", type=float, default=None, help="Máximo de requisições/s por licença.")
+        parser.add_argument("--licenca", action="append", dest="licencas", help="Restringe a esta licença (repetível).")
+        parser.add_argument("--json", action="store_true", help="Imprime o resumo consolidado em JSON.")
+
+    def handle(self, *args, **opts):
+        def ao_terminar(r):
+            nome = r.get("licenca") or r.get("licenca_id")
+            estilo = self.style.SUCCESS if r.get("status") == "CONCLUIDO" else self.style.WARNING
+            self.stderr.write(estilo(
+                f"{nome}: {r.get('status')} - {r.get('paginas', 0)} páginas, {r.get('linhas', 0)} linhas"
+                + (f" ({r['ultimo_erro']})" if r.get("ultimo_erro") else "")
+            ))
+
+        resumo = importar_todas(
+            tipo=opts["tipo"],
+            processos=opts["processos"],
+            max_rps=opts["rps"],
+            licencas=opts["licencas"],
+            ao_terminar=ao_terminar,
+        )
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(resumo, default=str, ensure_ascii=False, indent=2))
+            return
+        t = resumo["total"]
+        self.stdout.write(
+            f"{t['licencas']} licenças: {t['concluidas']} concluídas, {t['falhas']} com falha, "
+            f"{t['ocupadas']} já em execução - {t['paginas']} páginas, {t['linhas']} linhas, {t['erros']} erros."
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from importador_erp.services import reprocessar_rejeitados
+
+
+class Command(BaseCommand):
+    help = "Tenta gravar de novo os itens rejeitados nos imports (ItemRejeitado pendentes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--licenca", action="append", dest="licencas", help="Restringe a esta licença (repetível).")
+        parser.add_argument("--endpoint", choices=["contratos", "proprietarios"])
+        parser.add_argument("--lote", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        r = reprocessar_rejeitados(opts["licencas"], opts["endpoint"], opts["lote"])
+        estilo = self.style.SUCCESS if not r["pendentes"] else self.style.WARNING
+        self.stdout.write(estilo(
+            f"{r['processados']} itens reprocessados: {r['resolvidos']} resolvidos, {r['pendentes']} ainda pendentes."
+        ))
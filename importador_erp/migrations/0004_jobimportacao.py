@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0003_alter_contratolocacao_taxa_administracao_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobImportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('CONTRATOS', 'Contratos'), ('PROPRIETARIOS', 'Proprietários')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDO', 'Concluído'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=20)),
+                ('paginas', models.PositiveIntegerField(default=0)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('erros', models.PositiveIntegerField(default=0)),
+                ('ultimo_erro', models.TextField(blank=True, default='')),
+                ('resumo', models.JSONField(blank=True, default=dict)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_inicio', models.DateTimeField(blank=True, null=True)),
+                ('data_fim', models.DateTimeField(blank=True, null=True)),
+                ('data_ult_modificacao', models.DateTimeField(auto_now=True)),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('licenca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs_importacao', to='clientes.clientelicense')),
+            ],
+            options={
+                'ordering': ['data_criacao'],
+                'indexes': [models.Index(fields=['status', 'data_criacao'], name='importador__status_5e96d9_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'EXECUTANDO')), fields=('licenca',), name='um_job_executando_por_licenca')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importador_erp', '0004_jobimportacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contratolocacao',
+            name='hash_payload',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
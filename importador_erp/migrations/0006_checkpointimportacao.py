@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0005_contratolocacao_hash_payload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointImportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=50)),
+                ('itens_por_pagina', models.PositiveSmallIntegerField()),
+                ('ultima_pagina', models.PositiveIntegerField(default=0)),
+                ('data_inicio', models.DateTimeField()),
+                ('data_ult_modificacao', models.DateTimeField(auto_now=True)),
+                ('licenca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints_importacao', to='clientes.clientelicense')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('licenca', 'endpoint'), name='checkpoint_por_licenca_endpoint')],
+            },
+        ),
+    ]
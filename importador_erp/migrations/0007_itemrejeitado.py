@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0006_checkpointimportacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemRejeitado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=50)),
+                ('identificador', models.CharField(blank=True, default='', max_length=50)),
+                ('payload', models.JSONField()),
+                ('erro', models.TextField()),
+                ('tentativas', models.PositiveIntegerField(default=1)),
+                ('resolvido_em', models.DateTimeField(blank=True, null=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_ult_modificacao', models.DateTimeField(auto_now=True)),
+                ('licenca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_rejeitados', to='clientes.clientelicense')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['licenca', 'endpoint', 'identificador'], name='importador__licenca_a99e3b_idx')],
+            },
+        ),
+    ]
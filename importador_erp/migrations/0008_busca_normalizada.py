@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:55
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# cópia de importador_erp.busca nesta data: a migração não pode mudar junto com o módulo
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', texto.lower()).strip()
+
+
+def digitos(texto):
+    return re.sub(r'\D', '', str(texto or ''))
+
+
+def texto_cliente(nome, email, cpf_cnpj, telefone):
+    return ' '.join(p for p in (normalizar(nome), normalizar(email), digitos(cpf_cnpj), digitos(telefone)) if p)
+
+
+def texto_contrato(*partes):
+    return ' '.join(p for p in (normalizar(v) for v in partes) if p)
+
+
+def preencher_busca(apps, schema_editor):
+    Cliente = apps.get_model('importador_erp', 'Cliente')
+    ContratoLocacao = apps.get_model('importador_erp', 'ContratoLocacao')
+    for model, texto, campos in (
+        (Cliente, texto_cliente, ('nome', 'email', 'cpf_cnpj', 'telefone')),
+        (ContratoLocacao, texto_contrato, ('nome_do_imovel', 'identificador_contrato', 'status_contrato', 'tipo_imovel', 'tipo_contrato')),
+    ):
+        lote = []
+        for obj in model.objects.only(*campos).iterator(chunk_size=2000):
+            obj.busca = texto(*(getattr(obj, c) for c in campos))
+            lote.append(obj)
+            if len(lote) == 2000:
+                model.objects.bulk_update(lote, ['busca'])
+                lote = []
+        model.objects.bulk_update(lote, ['busca'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0007_itemrejeitado'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='cliente',
+            name='busca',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='contratolocacao',
+            name='busca',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        # preenche antes de criar os índices: montar o GIN de uma vez é bem mais rápido
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busca'], name='cliente_busca_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contratolocacao',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busca'], name='contrato_busca_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
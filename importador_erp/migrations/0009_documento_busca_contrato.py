@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:59
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def _partes(through):
+    return Subquery(
+        through.objects.filter(contratolocacao_id=OuterRef('pk'))
+        .values('contratolocacao_id')
+        .annotate(texto=StringAgg('cliente__busca', ' '))
+        .values('texto')
+    )
+
+
+def preencher_documentos(apps, schema_editor):
+    # mesmo documento de importador_erp.busca.documento_contrato nesta data
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    ContratoLocacao = apps.get_model('importador_erp', 'ContratoLocacao')
+    ContratoLocacao.objects.update(
+        documento_busca=(
+            SearchVector('busca', weight='A', config='simple')
+            + SearchVector(_partes(ContratoLocacao.proprietarios.through), weight='B', config='simple')
+            + SearchVector(_partes(ContratoLocacao.inquilinos.through), weight='B', config='simple')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0008_busca_normalizada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contratolocacao',
+            name='documento_busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(preencher_documentos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contratolocacao',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['documento_busca'], name='contrato_documento_gin'),
+        ),
+    ]
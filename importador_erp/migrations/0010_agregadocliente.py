@@ -0,0 +1,83 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:02
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def preencher_agregados(apps, schema_editor):
+    # mesma conta de importador_erp.agregados nesta data; a tabela é nova, então só insere
+    Cliente = apps.get_model('importador_erp', 'Cliente')
+    AgregadoCliente = apps.get_model('importador_erp', 'AgregadoCliente')
+    ContratoLocacao = apps.get_model('importador_erp', 'ContratoLocacao')
+    ultimo_pk = 0
+    while True:
+        bloco = list(Cliente.objects.filter(pk__gt=ultimo_pk).order_by('pk').values_list('pk', flat=True)[:500])
+        if not bloco:
+            break
+        ultimo_pk = bloco[-1]
+        valores = {
+            pk: {
+                'contratos_inquilino': 0, 'contratos_proprietario': 0, 'contratos_ativos': 0, 'contratos_inativos': 0,
+                'aluguel_inquilino': Decimal('0'), 'aluguel_proprietario': Decimal('0'), 'ultimo_inicio': None,
+            }
+            for pk in bloco
+        }
+        for papel, through in (
+            ('inquilino', ContratoLocacao.inquilinos.through),
+            ('proprietario', ContratoLocacao.proprietarios.through),
+        ):
+            linhas = (
+                through.objects.filter(cliente_id__in=bloco)
+                .values('cliente_id')
+                .annotate(
+                    n=Count('id'),
+                    ativos=Count('id', filter=Q(contratolocacao__contrato_ativo=True)),
+                    aluguel=Sum('contratolocacao__valor_aluguel'),
+                    ultimo=Max('contratolocacao__data_inicio'),
+                )
+                .order_by()
+            )
+            for linha in linhas:
+                v = valores[linha['cliente_id']]
+                v[f'contratos_{papel}'] = linha['n']
+                v[f'aluguel_{papel}'] = linha['aluguel'] or Decimal('0')
+                v['contratos_ativos'] += linha['ativos']
+                v['contratos_inativos'] += linha['n'] - linha['ativos']
+                if linha['ultimo'] and (v['ultimo_inicio'] is None or linha['ultimo'] > v['ultimo_inicio']):
+                    v['ultimo_inicio'] = linha['ultimo']
+        AgregadoCliente.objects.bulk_create([
+            AgregadoCliente(cliente_id=pk, aluguel_total=v['aluguel_inquilino'] + v['aluguel_proprietario'], **v)
+            for pk, v in valores.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importador_erp', '0009_documento_busca_contrato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregadoCliente',
+            fields=[
+                ('cliente', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='agregado', serialize=False, to='importador_erp.cliente')),
+                ('contratos_inquilino', models.PositiveIntegerField(default=0)),
+                ('contratos_proprietario', models.PositiveIntegerField(default=0)),
+                ('contratos_ativos', models.PositiveIntegerField(default=0)),
+                ('contratos_inativos', models.PositiveIntegerField(default=0)),
+                ('aluguel_inquilino', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('aluguel_proprietario', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('aluguel_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ultimo_inicio', models.DateField(blank=True, null=True)),
+                ('data_ult_modificacao', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contratos_inquilino', 'contratos_proprietario'], name='agregado_contratos_idx'), models.Index(fields=['contratos_proprietario'], name='agregado_prop_idx'), models.Index(fields=['aluguel_total'], name='agregado_aluguel_idx'), models.Index(fields=['contratos_ativos'], name='agregado_ativos_idx'), models.Index(fields=['ultimo_inicio'], name='agregado_inicio_idx')],
+            },
+        ),
+        migrations.RunPython(preencher_agregados, migrations.RunPython.noop),
+    ]
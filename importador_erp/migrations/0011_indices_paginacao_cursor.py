@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0010_agregadocliente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['nome', 'id'], name='cliente_nome_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contratolocacao',
+            index=models.Index(fields=['data_inicio', 'id'], name='contrato_inicio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contratolocacao',
+            index=models.Index(fields=['valor_aluguel', 'id'], name='contrato_aluguel_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importador_erp', '0011_indices_paginacao_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobimportacao',
+            name='lease_expira_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
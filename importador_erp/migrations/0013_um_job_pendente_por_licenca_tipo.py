@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def falhar_pendentes_duplicados(apps, schema_editor):
+    """Antes da constraint: mantém só o PENDENTE mais antigo de cada licença e tipo."""
+    JobImportacao = apps.get_model('importador_erp', 'JobImportacao')
+    vistos = set()
+    duplicados = []
+    for pk, licenca_id, tipo in (
+        JobImportacao.objects.filter(status='PENDENTE').order_by('data_criacao', 'pk').values_list('pk', 'licenca_id', 'tipo')
+    ):
+        if (licenca_id, tipo) in vistos:
+            duplicados.append(pk)
+        vistos.add((licenca_id, tipo))
+    JobImportacao.objects.filter(pk__in=duplicados).update(
+        status='FALHOU', ultimo_erro='Job duplicado na fila.', data_fim=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('importador_erp', '0012_jobimportacao_lease'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(falhar_pendentes_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='jobimportacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'PENDENTE')), fields=('licenca', 'tipo'), name='um_job_pendente_por_licenca_tipo'),
+        ),
+    ]
@@ -1,7 +1,12 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from datetime import datetime
-from .constantes import TIPOS_CLIENTE_LOCACAO
+from django.utils import timezone
+from django.contrib.auth.models import User
+from .constantes import TIPOS_CLIENTE_LOCACAO, TIPOS_IMPORTACAO, STATUS_IMPORTACAO
 from clientes.models import ClienteLicense
+from . import busca as _busca
 
 # Create your models here.
 class Cliente(models.Model):
@@ -13,9 +18,30 @@ class Cliente(models.Model):
     email = models.EmailField()
     telefone = models.CharField(max_length=15)
     tipo = models.CharField(max_length=20, choices=TIPOS_CLIENTE_LOCACAO)
+    busca = models.TextField(blank=True, default='', editable=False)  # ver importador_erp.busca
+
+    CAMPOS_BUSCA = ('nome', 'email', 'cpf_cnpj', 'telefone')
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['busca'], name='cliente_busca_trgm', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['nome', 'id'], name='cliente_nome_id_idx'),  # paginação por cursor
+        ]
 
     def __str__(self):
         return self.nome
+
+    def atualizar_busca(self):
+        self.busca = _busca.texto_cliente(self.nome, self.email, self.cpf_cnpj, self.telefone)
+
+    def save(self, *args, **kwargs):
+        self.atualizar_busca()
+        campos = kwargs.get('update_fields')
+        if campos is not None and set(campos) & set(self.CAMPOS_BUSCA):
+            kwargs['update_fields'] = {*campos, 'busca'}
+        super().save(*args, **kwargs)
+        if campos is None or 'busca' in kwargs['update_fields']:
+            _busca.atualizar_documentos_de_clientes([self.pk])
     
 class ContratoLocacao(models.Model):
     identificador_contrato = models.IntegerField(unique=True)  # ID do contrato no Superlógica
@@ -43,10 +69,36 @@ class ContratoLocacao(models.Model):
     proprietarios = models.ManyToManyField(Cliente, related_name='contratos_proprietario')
     inquilinos = models.ManyToManyField(Cliente, related_name='contratos_inquilino')
     licenca = models.ForeignKey(ClienteLicense, on_delete=models.CASCADE, related_name='contratos')
+    hash_payload = models.CharField(max_length=64, blank=True, default='')  # sha256 do JSON do Superlógica na última gravação
+    busca = models.TextField(blank=True, default='', editable=False)  # ver importador_erp.busca
+    documento_busca = SearchVectorField(null=True, editable=False)  # busca do contrato + das partes (Postgres)
+
+    CAMPOS_BUSCA = ('nome_do_imovel', 'identificador_contrato', 'status_contrato', 'tipo_imovel', 'tipo_contrato')
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['busca'], name='contrato_busca_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['documento_busca'], name='contrato_documento_gin'),
+            # paginação por cursor nas ordenações mais usadas da lista
+            models.Index(fields=['data_inicio', 'id'], name='contrato_inicio_id_idx'),
+            models.Index(fields=['valor_aluguel', 'id'], name='contrato_aluguel_id_idx'),
+        ]
 
     def __str__(self):
         return f"Contrato {self.id} - {self.proprietarios.first().nome}"
 
+    def atualizar_busca(self):
+        self.busca = _busca.texto_contrato(*(getattr(self, campo) for campo in self.CAMPOS_BUSCA))
+
+    def save(self, *args, **kwargs):
+        self.atualizar_busca()
+        campos = kwargs.get('update_fields')
+        if campos is not None and set(campos) & set(self.CAMPOS_BUSCA):
+            kwargs['update_fields'] = {*campos, 'busca'}
+        super().save(*args, **kwargs)
+        if campos is None or 'busca' in kwargs['update_fields']:
+            _busca.atualizar_documentos([self.pk])
+
     def numero_inquilinos(self):
         return self.inquilinos.count()
     
@@ -60,3 +112,126 @@ class ContratoLocacao(models.Model):
         elif self.data_inicio >= hoje:
             self.status_contrato = "Vigente"
         self.save()
+
+class AgregadoCliente(models.Model):
+    """
+    Contratos de cada Cliente por papel (inquilino/proprietário): quantidade, aluguel
+    somado, ativos/inativos e início mais recente. Mantido pelo import e pelos signals
+    (ver importador_erp.agregados) para a lista de clientes ordenar e filtrar em
+    colunas indexadas, sem agregar os dois M2M a cada request.
+    """
+    cliente = models.OneToOneField(Cliente, on_delete=models.CASCADE, primary_key=True, related_name='agregado')
+    contratos_inquilino = models.PositiveIntegerField(default=0)
+    contratos_proprietario = models.PositiveIntegerField(default=0)
+    contratos_ativos = models.PositiveIntegerField(default=0)  # soma dos dois papéis
+    contratos_inativos = models.PositiveIntegerField(default=0)
+    aluguel_inquilino = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    aluguel_proprietario = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    aluguel_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ultimo_inicio = models.DateField(null=True, blank=True)
+    data_ult_modificacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['contratos_inquilino', 'contratos_proprietario'], name='agregado_contratos_idx'),
+            models.Index(fields=['contratos_proprietario'], name='agregado_prop_idx'),
+            models.Index(fields=['aluguel_total'], name='agregado_aluguel_idx'),
+            models.Index(fields=['contratos_ativos'], name='agregado_ativos_idx'),
+            models.Index(fields=['ultimo_inicio'], name='agregado_inicio_idx'),
+        ]
+
+    def __str__(self):
+        return f"Agregado de {self.cliente_id}"
+
+class JobImportacao(models.Model):
+    """
+    Fila de importações do ERP, consumida pelo comando `manage.py importador_worker`.
+    As constraints parciais garantem no máximo um job EXECUTANDO por licença e um
+    PENDENTE por licença e tipo; o lease
+    (lease_expira_em) diz se o worker que o executa ainda está vivo.
+    """
+    licenca = models.ForeignKey(ClienteLicense, on_delete=models.CASCADE, related_name='jobs_importacao')
+    tipo = models.CharField(max_length=20, choices=TIPOS_IMPORTACAO)
+    status = models.CharField(max_length=20, choices=STATUS_IMPORTACAO, default='PENDENTE')
+    criado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    paginas = models.PositiveIntegerField(default=0)
+    linhas = models.PositiveIntegerField(default=0)
+    erros = models.PositiveIntegerField(default=0)
+    ultimo_erro = models.TextField(blank=True, default='')
+    resumo = models.JSONField(default=dict, blank=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_inicio = models.DateTimeField(null=True, blank=True)
+    data_fim = models.DateTimeField(null=True, blank=True)
+    data_ult_modificacao = models.DateTimeField(auto_now=True)
+    lease_expira_em = models.DateTimeField(null=True, blank=True)  # renovado pelo worker enquanto o job roda
+
+    class Meta:
+        ordering = ['data_criacao']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['licenca'],
+                condition=models.Q(status='EXECUTANDO'),
+                name='um_job_executando_por_licenca',
+            ),
+            models.UniqueConstraint(
+                fields=['licenca', 'tipo'],
+                condition=models.Q(status='PENDENTE'),
+                name='um_job_pendente_por_licenca_tipo',
+            ),
+        ]
+        indexes = [models.Index(fields=['status', 'data_criacao'])]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.licenca.license_name} ({self.status})"
+
+    def linhas_por_segundo(self) -> float:
+        if not self.data_inicio:
+            return 0.0
+        fim = self.data_fim or timezone.now()
+        segundos = (fim - self.data_inicio).total_seconds()
+        return round(self.linhas / segundos, 2) if segundos > 0 else 0.0
+
+class CheckpointImportacao(models.Model):
+    """
+    Última página confirmada de um import em andamento (por licença e endpoint).
+    Existe só enquanto o import não termina sem falhas; serve para retomá-lo.
+    """
+    licenca = models.ForeignKey(ClienteLicense, on_delete=models.CASCADE, related_name='checkpoints_importacao')
+    endpoint = models.CharField(max_length=50)
+    itens_por_pagina = models.PositiveSmallIntegerField()
+    ultima_pagina = models.PositiveIntegerField(default=0)
+    data_inicio = models.DateTimeField()  # início do import que criou o checkpoint
+    data_ult_modificacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['licenca', 'endpoint'], name='checkpoint_por_licenca_endpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.licenca.license_name}/{self.endpoint} - página {self.ultima_pagina}"
+
+
+class ItemRejeitado(models.Model):
+    """
+    Dead-letter dos imports: item do Superlógica que não pôde ser gravado, com o JSON
+    bruto e o erro. O resto da página é gravado normalmente; estes itens são
+    reprocessados com `manage.py reprocessar_rejeitados` (ou no próximo import em que o
+    item vier válido).
+    """
+    licenca = models.ForeignKey(ClienteLicense, on_delete=models.CASCADE, related_name='itens_rejeitados')
+    endpoint = models.CharField(max_length=50)  # "contratos", "proprietarios"
+    identificador = models.CharField(max_length=50, blank=True, default='')  # id do item no Superlógica, se houver
+    payload = models.JSONField()
+    erro = models.TextField()
+    tentativas = models.PositiveIntegerField(default=1)
+    resolvido_em = models.DateTimeField(null=True, blank=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_ult_modificacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['licenca', 'endpoint', 'identificador'])]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.identificador or '?'} ({self.licenca})"
+
@@ -0,0 +1,83 @@
+# importador_erp/orquestrador.py
+"""
+Importação de todas as licenças com integração ativa, em paralelo.
+
+Cada licença roda num processo separado (isolamento de falhas e de memória), passando
+pela mesma fila de JobImportacao do worker — ou seja, uma licença que já tem import
+executando é pulada em vez de rodar duas vezes.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+
+
+# Este módulo é importado pelos processos filhos (spawn) antes do django.setup():
+# imports de models ficam dentro das funções.
+
+def _inicializar_processo():
+    import django
+    django.setup()
+
+
+def importar_licenca(license_id: int, tipo: str, max_rps: float | None) -> dict:
+    """Executa (no processo filho) o import de uma licença e devolve o status do job."""
+    from clientes.models import ClienteLicense
+    from . import jobs
+
+    try:
+        licenca = ClienteLicense.objects.get(pk=license_id)
+        job = jobs.enfileirar(licenca, tipo)
+        if not jobs.reservar(job):
+            return {"licenca": licenca.license_name, "status": "OCUPADA", "job": job.pk}
+        return jobs.status_json(jobs.executar(job, max_rps=max_rps))
+    except Exception as e:
+        return {"licenca_id": license_id, "status": "FALHOU", "ultimo_erro": str(e)}
+    finally:
+        connections.close_all()
+
+
+def importar_todas(
+    tipo: str = "CONTRATOS",
+    processos: int = 4,
+    max_rps: float | None = None,
+    licencas: list[str] | None = None,
+    ao_terminar=None,
+) -> dict:
+    """
+    Importa todas as licenças com LicenseIntegration ativa usando no máximo `processos`
+    imports simultâneos, cada um limitado a `max_rps` requisições/s. Devolve um resumo
+    consolidado com o resultado de cada licença.
+    """
+    from integrador.models import LicenseIntegration
+
+    qs = LicenseIntegration.objects.filter(is_active=True, license__isnull=False)
+    if licencas:
+        qs = qs.filter(license__license_name__in=licencas)
+    license_ids = list(qs.values_list("license_id", flat=True))
+
+    # conexões herdadas não podem ser compartilhadas com os filhos
+    connections.close_all()
+
+    resultados = []
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=_inicializar_processo) as pool:
+        futuros = [pool.submit(importar_licenca, license_id, tipo, max_rps) for license_id in license_ids]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            if ao_terminar:
+                ao_terminar(resultado)
+
+    total = {"licencas": len(license_ids), "concluidas": 0, "falhas": 0, "ocupadas": 0, "paginas": 0, "linhas": 0, "erros": 0}
+    for r in resultados:
+        status = r.get("status")
+        if status == "CONCLUIDO":
+            total["concluidas"] += 1
+        elif status == "OCUPADA":
+            total["ocupadas"] += 1
+        else:
+            total["falhas"] += 1
+        for chave in ("paginas", "linhas", "erros"):
+            total[chave] += r.get(chave, 0)
+    return {"total": total, "licencas": resultados}
@@ -0,0 +1,283 @@
+# importador_erp/paginacao.py
+"""
+Paginação por cursor (keyset) para as listas grandes (clientes, contratos, tickets).
+
+Em vez de OFFSET + COUNT(*), o link de cada página leva os valores da ordenação do
+último (ou do primeiro) item, e a página seguinte começa dali com um WHERE
+"(a, b, pk) depois de (va, vb, vpk)" escrito por extenso. A página 500 custa o mesmo
+que a primeira. O pk entra sempre como desempate, para a ordem ser estável.
+
+A ordenação é a que a view já monta (nomes de campo/anotação, "-campo" ou
+F(...).asc()/desc() com nulls_first/nulls_last). Sem posição de nulos explícita vale a
+do Postgres (asc: nulos no fim; desc: no começo), que é a que os índices btree
+atendem; ela é aplicada explicitamente para o sqlite se comportar igual.
+
+O total é opcional e só é calculado se o template usar paginator.count: no Postgres
+vem da estimativa do planejador (EXPLAIN), com contagem exata quando a estimativa é
+pequena.
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, OrderBy, Q
+from django.utils.functional import cached_property
+
+ULTIMA = "ultima"  # valor de ?cursor= para a última página
+LIMITE_CONTAGEM_EXATA = 10_000  # abaixo disso (pela estimativa) o COUNT(*) exato é barato
+_SALT = "importador_erp.paginacao"
+
+
+class Chave:
+    """Um item da ordenação: campo/anotação, sentido e posição dos nulos."""
+
+    def __init__(self, nome: str, desc: bool, nulos_primeiro: bool, nulavel: bool = True):
+        self.nome = nome
+        self.desc = desc
+        self.nulos_primeiro = nulos_primeiro
+        self.nulavel = nulavel
+        # caminhos com relação (agregado__aluguel_total) são anotados para ler o valor
+        self.alias = "cursor_" + nome.replace("__", "_") if "__" in nome else None
+
+    def invertida(self) -> "Chave":
+        return Chave(self.nome, not self.desc, not self.nulos_primeiro, self.nulavel)
+
+    def ordem(self) -> OrderBy:
+        nulos = {"nulls_first": True} if self.nulos_primeiro else {"nulls_last": True}
+        return F(self.nome).desc(**nulos) if self.desc else F(self.nome).asc(**nulos)
+
+    def depois(self, valor) -> Q | None:
+        """Linhas que vêm depois de `valor` nesta chave (None: nenhuma)."""
+        nulos = Q(**{f"{self.nome}__isnull": True})
+        if valor is None:
+            return ~nulos if self.nulos_primeiro else None
+        maior = Q(**{f"{self.nome}__{'lt' if self.desc else 'gt'}": valor})
+        return maior if self.nulos_primeiro or not self.nulavel else maior | nulos
+
+    def limite(self, valor) -> Q | None:
+        """Faixa "a partir de `valor`" (inclusive), quando dá para escrever sem OR."""
+        if valor is None or (self.nulavel and not self.nulos_primeiro):
+            return None
+        return Q(**{f"{self.nome}__{'lte' if self.desc else 'gte'}": valor})
+
+    def igual(self, valor) -> Q:
+        if valor is None:
+            return Q(**{f"{self.nome}__isnull": True})
+        return Q(**{self.nome: valor})
+
+    def valor(self, obj):
+        if self.alias:
+            return getattr(obj, self.alias)
+        try:
+            return getattr(obj, self.nome)
+        except ObjectDoesNotExist:
+            return None
+
+
+def _nulavel(qs, nome: str) -> bool:
+    """Só campos do próprio model declarados sem null são tratados como não nulos."""
+    if nome in qs.query.annotations:
+        return True
+    try:
+        return qs.model._meta.get_field(nome).null
+    except FieldDoesNotExist:
+        return True
+
+
+def chaves_da_ordenacao(qs) -> list[Chave]:
+    """Chaves da ordenação do queryset, terminando no pk (desempate)."""
+    pk = qs.model._meta.pk.name
+    chaves = []
+    for item in qs.query.order_by or qs.model._meta.ordering:
+        if isinstance(item, str):
+            if item == "?":
+                raise ValueError("ordenação aleatória não pode ser paginada por cursor")
+            desc = item.startswith("-")
+            nome, nulos_primeiro = item.lstrip("-"), desc
+        elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+            nome, desc = item.expression.name, item.descending
+            nulos_primeiro = bool(item.nulls_first) if (item.nulls_first or item.nulls_last) else desc
+        else:
+            raise ValueError(f"ordenação não suportada na paginação por cursor: {item!r}")
+        if nome in ("pk", pk):
+            chaves.append(Chave("pk", desc, desc, nulavel=False))
+            return chaves  # o pk já é único: o resto da ordenação nunca desempata
+        chaves.append(Chave(nome, desc, nulos_primeiro, _nulavel(qs, nome)))
+    desc = chaves[-1].desc if chaves else False
+    chaves.append(Chave("pk", desc, desc, nulavel=False))  # nulos no padrão: casa com o índice lido de trás
+    return chaves
+
+
+def _depois_de(chaves: list[Chave], valores: list) -> Q:
+    """(k1, k2, ..., pk) depois de (v1, v2, ..., vpk), por extenso."""
+    condicoes = []
+    anteriores_iguais = Q()
+    for chave, valor in zip(chaves, valores):
+        depois = chave.depois(valor)
+        if depois is not None:
+            condicoes.append(anteriores_iguais & depois)
+        anteriores_iguais &= chave.igual(valor)
+    if not condicoes:
+        return Q(pk__in=[])
+    resultado = reduce(or_, condicoes)
+    # redundante, mas sem ele o Postgres não enxerga no OR uma faixa do índice da 1ª chave
+    limite = chaves[0].limite(valores[0])
+    return limite & resultado if limite is not None else resultado
+
+
+def _serializavel(valor):
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()  # com microssegundos: o DjangoJSONEncoder corta
+    if isinstance(valor, (Decimal, uuid.UUID)):
+        return str(valor)
+    return valor
+
+
+def _cursor(direcao: str, chaves: list[Chave], obj) -> str:
+    return signing.dumps(
+        {"d": direcao, "v": [_serializavel(c.valor(obj)) for c in chaves]}, salt=_SALT, compress=True
+    )
+
+
+def _ler_cursor(cursor: str, chaves: list[Chave]) -> tuple[str, list | None]:
+    """(direção, valores); cursor vazio, inválido ou de outra ordenação volta à primeira página."""
+    if cursor == ULTIMA:
+        return "antes", None
+    if not cursor:
+        return "depois", None
+    try:
+        dados = signing.loads(cursor, salt=_SALT)
+        direcao, valores = dados["d"], dados["v"]
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return "depois", None
+    if direcao not in ("depois", "antes") or not isinstance(valores, list) or len(valores) != len(chaves):
+        return "depois", None
+    return direcao, valores
+
+
+def estimar_total(qs) -> tuple[int, bool]:
+    """(total, é_estimativa): estimativa do planejador no Postgres, COUNT(*) se for pequena."""
+    qs = qs.order_by()
+    if connections[qs.db].vendor == "postgresql":
+        plano = json.loads(qs.explain(format="json"))
+        if isinstance(plano, list):
+            plano = plano[0]
+        linhas = int(plano["Plan"]["Plan Rows"])
+        if linhas >= LIMITE_CONTAGEM_EXATA:
+            return linhas, True
+    return qs.count(), False
+
+
+class PaginadorCursor:
+    """Faz o papel do Paginator no contexto: só o total (preguiçoso, opcional)."""
+
+    def __init__(self, qs, contar: bool = True):
+        self._qs = qs
+        self.contar = contar
+
+    @cached_property
+    def _total(self) -> tuple[int | None, bool]:
+        return estimar_total(self._qs) if self.contar else (None, False)
+
+    @property
+    def count(self) -> int | None:
+        return self._total[0]
+
+    @property
+    def estimado(self) -> bool:
+        return self._total[1]
+
+
+class PaginaCursor:
+    """Página no lugar de django.core.paginator.Page (has_next/has_previous + cursores)."""
+
+    def __init__(self, object_list, paginator, cursor_anterior=None, cursor_proxima=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor_anterior = cursor_anterior
+        self.cursor_proxima = cursor_proxima
+        self.cursor_ultima = ULTIMA
+
+    def has_next(self) -> bool:
+        return self.cursor_proxima is not None
+
+    def has_previous(self) -> bool:
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def __repr__(self):
+        return f"<PaginaCursor: {len(self)} itens>"
+
+
+def paginar(qs, tamanho: int, cursor: str = "", contar: bool = True) -> PaginaCursor:
+    """
+    Página de `tamanho` itens a partir de `cursor` (de PaginaCursor.cursor_proxima,
+    cursor_anterior ou ULTIMA). Uma query para os itens (tamanho + 1, para saber se
+    há mais) e nenhuma para o total enquanto ele não for lido.
+    """
+    chaves = chaves_da_ordenacao(qs)
+    paginador = PaginadorCursor(qs, contar)
+    direcao, valores = _ler_cursor(cursor, chaves)
+
+    # "antes" percorre a ordem invertida a partir do cursor e desinverte no fim
+    percurso = [c.invertida() for c in chaves] if direcao == "antes" else chaves
+    pagina = qs.order_by(*(c.ordem() for c in percurso))
+    anotacoes = {c.alias: F(c.nome) for c in chaves if c.alias}
+    if anotacoes:
+        pagina = pagina.annotate(**anotacoes)
+    if valores is not None:
+        try:
+            pagina = pagina.filter(_depois_de(percurso, valores))
+        except (ValidationError, ValueError, TypeError):
+            return paginar(qs, tamanho, "", contar)  # cursor adulterado
+
+    itens = list(pagina[: tamanho + 1])
+    mais = len(itens) > tamanho
+    itens = itens[:tamanho]
+    if not itens:
+        return PaginaCursor(itens, paginador)
+    if direcao == "antes":
+        itens.reverse()
+        tem_anterior, tem_proxima = mais, valores is not None
+    else:
+        tem_anterior, tem_proxima = valores is not None, mais
+    return PaginaCursor(
+        itens,
+        paginador,
+        cursor_anterior=_cursor("antes", chaves, itens[0]) if tem_anterior else None,
+        cursor_proxima=_cursor("depois", chaves, itens[-1]) if tem_proxima else None,
+    )
+
+
+class PaginacaoCursorMixin:
+    """
+    Para ListView: troca o Paginator (?page=N) pela paginação por cursor (?cursor=).
+    No contexto, page_obj é uma PaginaCursor e paginator um PaginadorCursor; com
+    contar_total = False o total nem é oferecido.
+    """
+
+    parametro_cursor = "cursor"
+    contar_total = True
+
+    def paginate_queryset(self, queryset, page_size):
+        pagina = paginar(
+            queryset, page_size, self.request.GET.get(self.parametro_cursor) or "", contar=self.contar_total
+        )
+        return pagina.paginator, pagina, pagina.object_list, pagina.has_other_pages()
@@ -0,0 +1,339 @@
+# importador_erp/services.py
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from integrador import http_client
+from integrador.cache_respostas import CacheRespostas
+from integrador.circuito import CLASSE_IMPORTACAO, Circuito
+from integrador.ratelimit import OrcamentoLicenca, contar_429
+from integrador.models import LicenseIntegration
+from .ingest import MapaClientes, salvar_contratos, salvar_proprietarios
+from .models import CheckpointImportacao, ItemRejeitado
+
+logger = logging.getLogger(__name__)
+
+ITENS_POR_PAGINA = 50
+
+# contadores de salvar_contratos somados página a página
+RESUMO_CONTRATOS = (
+    "contratos", "criados", "atualizados", "ignorados", "rejeitados",
+    "clientes_cache_acertos", "clientes_cache_faltas",
+    "vinculos_adicionados", "vinculos_removidos",
+)
+
+# contadores de salvar_proprietarios somados página a página
+RESUMO_PROPRIETARIOS = ("criados", "atualizados", "inalterados", "rejeitados")
+
+
+def imobiliaria_headers(access_token: str) -> dict:
+    return {
+        "Accept": "application/json",
+        "Content-Type": "application/x-www-form-urlencoded",
+        "app_token": settings.INTEGRADOR_APP_TOKEN,   # do .env
+        "access_token": access_token,                  # do banco (decrypt automático)
+    }
+
+
+def iterar_paginas(
+    endpoint: str,
+    headers: dict,
+    itens_por_pagina: int = ITENS_POR_PAGINA,
+    concorrencia: int = 1,
+    pagina_inicial: int = 1,
+    orcamento: OrcamentoLicenca | None = None,
+    circuito: Circuito | None = None,
+    cache: CacheRespostas | None = None,
+) -> Iterator[tuple[int, list[dict] | None]]:
+    """
+    Percorre pagina=1,2,3… (ou a partir de `pagina_inicial`) de um endpoint da API de imobiliárias e devolve
+    (numero_pagina, itens) em ordem, parando no primeiro 'data' vazio.
+
+    Com concorrencia > 1, mantém até N páginas sendo baixadas à frente da que está
+    sendo consumida; no máximo N páginas ficam em memória ao mesmo tempo.
+    `orcamento` aplica os token buckets compartilhados (global, da licença e o
+    max_rps do import, ver integrador.ratelimit) antes de cada requisição, e
+    `circuito` falha na hora (CircuitoAberto) enquanto o Superlógica estiver fora do ar.
+
+    Com `cache`, as requisições são condicionais e páginas sabidamente iguais às já
+    gravadas são entregues como (numero_pagina, None), sem decodificar o JSON; chame
+    cache.confirmar(pagina) na transação que grava cada página baixada.
+    """
+    url = f"{settings.SUPERLOGICA_IMOBILIARIA_API.rstrip('/')}/{endpoint}"
+    def buscar(pagina: int) -> tuple[list[dict] | None, int]:
+        params = {"pagina": pagina, "itensPorPagina": itens_por_pagina}
+        entrada = cache.ler(pagina) if cache else None
+        resp = http_client.get(url, params=params, headers={**headers, **CacheRespostas.condicionais(entrada)})
+        respostas_429 = contar_429(resp)
+        if CacheRespostas.inalterada(entrada, resp):
+            return None, respostas_429
+        resp.raise_for_status()
+        data = resp.json()["data"]
+        if cache and data:
+            cache.pendente(pagina, CacheRespostas.entrada_de(resp, len(data)))
+        return data, respostas_429
+
+    pool = ThreadPoolExecutor(max_workers=max(concorrencia, 1), thread_name_prefix=f"pag-{endpoint}")
+    pendentes: deque[tuple[int, Future]] = deque()
+    proxima = pagina_inicial
+
+    def agendar() -> bool:
+        # orçamento e circuito usam o banco: são consultados aqui, na thread principal, e não em buscar()
+        nonlocal proxima
+        sonda = circuito.antes() if circuito else False
+        if orcamento:
+            orcamento.aguardar()
+        pendentes.append((proxima, pool.submit(buscar, proxima)))
+        proxima += 1
+        return sonda
+
+    def completar():
+        while len(pendentes) < max(concorrencia, 1):
+            agendar()
+
+    try:
+        if not agendar():  # sendo sonda do circuito, as demais só saem depois dela
+            completar()
+
+        while pendentes:
+            pagina, futuro = pendentes.popleft()
+            try:
+                data, respostas_429 = futuro.result()
+            except Exception as e:
+                if circuito:
+                    circuito.registrar(erro=e)
+                raise
+            if circuito:
+                circuito.sucesso()
+            if orcamento:
+                orcamento.registrar(respostas_429)
+            if data is not None and not data:
+                return
+            # agenda as próximas antes de entregar esta, para sobrepor rede e gravação
+            completar()
+            yield pagina, data
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _importar_paginado(
+    integracao: LicenseIntegration,
+    endpoint: str,
+    gravar: Callable[[list[dict]], dict],
+    resumo: dict,
+    progresso: Callable[[dict], None] | None = None,
+    max_rps: float | None = None,
+    retomar: bool = True,
+    usar_cache: bool = True,
+) -> CheckpointImportacao:
+    """
+    Laço comum dos imports: busca as páginas de `endpoint`, grava cada uma com `gravar`
+    (que devolve contadores a somar no resumo) e, na mesma transação, avança o
+    CheckpointImportacao da licença.
+
+    O checkpoint só avança enquanto todas as páginas anteriores foram gravadas; com
+    `retomar`, um import interrompido recomeça da página seguinte à última confirmada.
+    Um import que termina sem falhas apaga o checkpoint. Retorna o checkpoint usado
+    (com data_inicio do import original).
+
+    Com `usar_cache`, páginas que o Superlógica confirma iguais às da última gravação
+    (ver integrador.cache_respostas) não são decodificadas nem gravadas de novo; elas
+    só contam em resumo["paginas_inalteradas"]. A entrada do cache é gravada na mesma
+    transação da página, e só se nenhum item dela foi rejeitado. Sem `retomar` (import
+    completo) o cache não pula nenhuma página, só é regravado.
+    """
+    licenca = integracao.license
+    ckpt = CheckpointImportacao.objects.filter(licenca=licenca, endpoint=endpoint).first()
+    if ckpt and (not retomar or ckpt.itens_por_pagina != integracao.import_page_size):
+        ckpt.delete()
+        ckpt = None
+    if ckpt:
+        resumo["retomado_da_pagina"] = ckpt.ultima_pagina + 1
+    else:
+        ckpt = CheckpointImportacao.objects.create(
+            licenca=licenca,
+            endpoint=endpoint,
+            itens_por_pagina=integracao.import_page_size,
+            data_inicio=timezone.now(),
+        )
+
+    orcamento = OrcamentoLicenca(licenca.id, max_rps)
+    cache = CacheRespostas.para(licenca.id, endpoint, integracao.import_page_size, renovar=not retomar) if usar_cache else None
+    paginas = iterar_paginas(
+        endpoint,
+        imobiliaria_headers(integracao.access_token),
+        itens_por_pagina=integracao.import_page_size,
+        concorrencia=integracao.import_concurrency,
+        pagina_inicial=ckpt.ultima_pagina + 1,
+        orcamento=orcamento,
+        circuito=Circuito(licenca.id, CLASSE_IMPORTACAO),
+        cache=cache,
+    )
+    contiguo = True
+    for pagina, itens in paginas:
+        resumo["paginas"] += 1
+        if itens is None:
+            resumo["paginas_inalteradas"] += 1
+            if contiguo:
+                CheckpointImportacao.objects.filter(pk=ckpt.pk).update(ultima_pagina=pagina)
+        else:
+            try:
+                with transaction.atomic():
+                    r = gravar(itens)
+                    if contiguo:
+                        CheckpointImportacao.objects.filter(pk=ckpt.pk).update(ultima_pagina=pagina)
+                    if cache and r.get("rejeitados"):
+                        cache.descartar(pagina)  # os rejeitados precisam voltar no próximo import
+                    elif cache:
+                        cache.confirmar(pagina)
+            except Exception:
+                logger.exception("Falha ao gravar a página %s de %s de %s", pagina, endpoint, licenca.license_name)
+                resumo["falhas"] += len(itens)
+                contiguo = False
+                if cache:
+                    cache.descartar(pagina)
+            else:
+                for chave, valor in r.items():
+                    resumo[chave] += valor
+        resumo["espera_rate_limit_s"] = round(orcamento.espera_total, 2)
+        resumo["respostas_429"] = orcamento.respostas_429
+        if progresso:
+            progresso(resumo)
+
+    if contiguo:
+        ckpt.delete()
+    return ckpt
+
+
+def importar_contratos(
+    integracao: LicenseIntegration,
+    progresso: Callable[[dict], None] | None = None,
+    max_rps: float | None = None,
+    retomar: bool = True,
+    usar_cache: bool = True,
+) -> dict:
+    """
+    Importa os contratos da licença página a página: cada página é gravada na sua
+    própria transação (salvar_contratos) e descartada antes de buscar a próxima.
+    Retorna apenas contadores; `progresso`, se informado, recebe-os a cada página.
+
+    Contratos sem mudança desde o último import são ignorados (ver hash_payload) e
+    entram na taxa_ignorados do resumo. Contratos inválidos vão para ItemRejeitado
+    (resumo["rejeitados"]) sem impedir a gravação do resto da página. Um import concluído sem falhas avança
+    last_synced_at; um import interrompido é retomado do checkpoint (ver _importar_paginado).
+    """
+    licenca = integracao.license
+    mapa = MapaClientes()
+    resumo = {
+        "paginas": 0, "paginas_inalteradas": 0, "contratos": 0, "criados": 0, "atualizados": 0, "ignorados": 0, "rejeitados": 0, "falhas": 0,
+        "clientes_cache_acertos": 0, "clientes_cache_faltas": 0, "vinculos_adicionados": 0, "vinculos_removidos": 0,
+        "ultima_sincronizacao": integracao.last_synced_at.isoformat() if integracao.last_synced_at else None,
+    }
+
+    def gravar(itens: list[dict]) -> dict:
+        try:
+            r = salvar_contratos(itens, licenca, mapa=mapa)
+        except Exception:
+            mapa.limpar()  # a página foi revertida; o mapa pode ter pks que não existem mais
+            raise
+        return {chave: r[chave] for chave in RESUMO_CONTRATOS}
+
+    def ao_progredir(resumo: dict):
+        resumo["taxa_ignorados"] = round(100 * resumo["ignorados"] / resumo["contratos"], 1) if resumo["contratos"] else 0.0
+        if progresso:
+            progresso(resumo)
+
+    ckpt = _importar_paginado(integracao, "contratos", gravar, resumo, ao_progredir, max_rps, retomar, usar_cache)
+
+    if not resumo["falhas"]:
+        integracao.last_synced_at = ckpt.data_inicio
+        integracao.save(update_fields=["last_synced_at"])
+    return resumo
+
+
+def importar_proprietarios(
+    integracao: LicenseIntegration,
+    progresso: Callable[[dict], None] | None = None,
+    max_rps: float | None = None,
+    retomar: bool = True,
+    usar_cache: bool = True,
+) -> dict:
+    """
+    Mesma ideia de importar_contratos, para /proprietarios. "importados" conta os
+    proprietários gravados, separados em criados/atualizados/inalterados.
+    """
+    resumo = {
+        "paginas": 0, "paginas_inalteradas": 0, "importados": 0, "criados": 0, "atualizados": 0,
+        "inalterados": 0, "rejeitados": 0, "falhas": 0,
+    }
+
+    def gravar(itens: list[dict]) -> dict:
+        r = salvar_proprietarios(itens, integracao.license)
+        return {"importados": r["proprietarios"], **{chave: r[chave] for chave in RESUMO_PROPRIETARIOS}}
+
+    _importar_paginado(
+        integracao,
+        "proprietarios",
+        gravar,
+        resumo,
+        progresso,
+        max_rps,
+        retomar,
+        usar_cache,
+    )
+    return resumo
+
+
+def reprocessar_rejeitados(
+    licencas: list[str] | None = None,
+    endpoint: str | None = None,
+    lote: int = 500,
+) -> dict:
+    """
+    Tenta gravar de novo os ItemRejeitado pendentes, com o payload guardado (sem baixar
+    nada do Superlógica). Os que passarem são marcados como resolvidos; os que falharem
+    de novo continuam pendentes, com o erro e as tentativas atualizados.
+    """
+    from clientes.models import ClienteLicense
+
+    pendentes = ItemRejeitado.objects.filter(resolvido_em__isnull=True)
+    if licencas:
+        pendentes = pendentes.filter(licenca__license_name__in=licencas)
+    if endpoint:
+        pendentes = pendentes.filter(endpoint=endpoint)
+
+    resumo = {"processados": 0, "resolvidos": 0, "pendentes": 0}
+    antes = pendentes.count()
+    grupos = pendentes.values_list("licenca_id", "endpoint").distinct().order_by()
+    for licenca_id, ep in list(grupos):
+        licenca = ClienteLicense.objects.get(pk=licenca_id)
+        mapa = MapaClientes()
+        qs = pendentes.filter(licenca_id=licenca_id, endpoint=ep).order_by("pk")
+        # só os que já existiam: rejeitados criados durante o reprocessamento ficam para a próxima
+        qs = qs.filter(pk__lte=qs.aggregate(m=Max("pk"))["m"] or 0)
+        ultimo_pk = 0
+        while True:
+            bloco = list(qs.filter(pk__gt=ultimo_pk).values_list("pk", "payload")[:lote])
+            if not bloco:
+                break
+            ultimo_pk = bloco[-1][0]
+            itens = [payload for _, payload in bloco]
+            if ep == "contratos":
+                salvar_contratos(itens, licenca, mapa=mapa)
+            elif ep == "proprietarios":
+                salvar_proprietarios(itens, licenca)
+            else:
+                logger.warning("Endpoint sem reprocessamento: %s", ep)
+                break
+            resumo["processados"] += len(bloco)
+
+    resumo["pendentes"] = pendentes.count()
+    resumo["resolvidos"] = max(antes - resumo["pendentes"], 0)
+    return resumo
+
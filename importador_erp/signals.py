@@ -0,0 +1,79 @@
+# importador_erp/signals.py (registrado em apps.py ready())
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from integrador.cache_respostas import CacheRespostas
+
+from . import agregados, busca
+from .models import Cliente, ContratoLocacao
+
+
+@receiver(m2m_changed, sender=ContratoLocacao.proprietarios.through)
+@receiver(m2m_changed, sender=ContratoLocacao.inquilinos.through)
+def contrato_partes_alteradas(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Vínculos mudados fora do import (admin, .set()/.add()/.clear()): refaz o documento
+    de busca dos contratos e o agregado dos clientes afetados. O import sincroniza
+    direto nas tabelas intermediárias e faz o mesmo em sincronizar_vinculos.
+    """
+    lado = "cliente_id" if reverse else "contratolocacao_id"
+    outro = "contratolocacao_id" if reverse else "cliente_id"
+    if action == "pre_clear":
+        # no post_clear os vínculos já não existem: guarda quem vai sair
+        instance._vinculos_antes_do_clear = list(
+            sender.objects.filter(**{lado: instance.pk}).values_list(outro, flat=True)
+        )
+        return
+    if action == "post_clear":
+        outros = getattr(instance, "_vinculos_antes_do_clear", ())
+    elif action in ("post_add", "post_remove"):
+        outros = pk_set or ()
+    else:
+        return
+    contratos, clientes = (outros, [instance.pk]) if reverse else ([instance.pk], outros)
+    busca.atualizar_documentos(contratos)
+    agregados.atualizar_agregados(clientes)
+
+
+@receiver(post_save, sender=ContratoLocacao)
+def contrato_salvo(sender, instance, created, **kwargs):
+    """Aluguel, datas e ativo entram no agregado das partes (um contrato novo ainda não tem partes)."""
+    if not created:
+        agregados.atualizar_agregados(agregados.clientes_dos_contratos([instance.pk]))
+
+
+@receiver(pre_delete, sender=ContratoLocacao)
+def contrato_vai_ser_apagado(sender, instance, **kwargs):
+    instance._clientes_antes_do_delete = agregados.clientes_dos_contratos([instance.pk])
+
+
+@receiver(post_delete, sender=ContratoLocacao)
+def contrato_apagado(sender, instance, **kwargs):
+    """Além do agregado, esquece o cache de páginas: sem isso o próximo import pularia o contrato."""
+    agregados.atualizar_agregados(getattr(instance, "_clientes_antes_do_delete", ()))
+    CacheRespostas.invalidar(instance.licenca_id, "contratos")
+
+
+@receiver(pre_delete, sender=Cliente)
+def cliente_vai_ser_apagado(sender, instance, **kwargs):
+    contratos = set()
+    for through in (ContratoLocacao.proprietarios.through, ContratoLocacao.inquilinos.through):
+        contratos.update(through.objects.filter(cliente_id=instance.pk).values_list("contratolocacao_id", flat=True))
+    instance._licencas_antes_do_delete = set(
+        ContratoLocacao.objects.filter(pk__in=contratos).values_list("licenca_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Cliente)
+def cliente_apagado(sender, instance, **kwargs):
+    """
+    Esquece o cache de páginas só das licenças em que o cliente aparecia (contratos e
+    proprietários). Cliente não guarda a licença: sem contratos, a origem só pode ter
+    sido um /proprietarios, e só esse endpoint é invalidado.
+    """
+    licencas = getattr(instance, "_licencas_antes_do_delete", set())
+    for licenca_id in licencas:
+        CacheRespostas.invalidar(licenca_id, "contratos")
+        CacheRespostas.invalidar(licenca_id, "proprietarios")
+    if not licencas:
+        CacheRespostas.invalidar(endpoint="proprietarios")
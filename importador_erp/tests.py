@@ -1,3 +1,557 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import requests
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clientes.models import ClienteLicense
+from integrador.models import LicenseIntegration, PageCacheEntry, RateLimitBucket
+from integrador.simulador import contrato_sintetico, proprietario_sintetico
+from . import busca, ingest, jobs, paginacao, services
+from .ingest import salvar_contratos, salvar_proprietarios
+from .models import AgregadoCliente, CheckpointImportacao, Cliente, ContratoLocacao, ItemRejeitado, JobImportacao
+
+
+def criar_licenca(nome: str) -> ClienteLicense:
+    usuario = User.objects.create(username=nome)
+    return ClienteLicense.objects.create(cliente=usuario.pessoa, license_name=nome)
+
+
+def contratos(n: int, inicio: int = 0) -> list[dict]:
+    return [contrato_sintetico(i) for i in range(inicio, inicio + n)]
+
+
+def voltar_ate_o_comeco(qs, tamanho: int) -> list[int]:
+    """Pks da última página até a primeira, seguindo cursor_anterior."""
+    pks, cursor = [], paginacao.ULTIMA
+    while cursor is not None:
+        pagina = paginacao.paginar(qs, tamanho, cursor, contar=False)
+        pks[:0] = [c.pk for c in pagina]
+        cursor = pagina.cursor_anterior
+    return pks
+
+
+class ContarQueriesMixin:
+    def contar_queries(self, func) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx)
+
+
+class SalvarContratosTests(ContarQueriesMixin, TestCase):
+    def setUp(self):
+        self.licenca = criar_licenca("lic-a")
+
+    def test_cria_atualiza_e_ignora_inalterados(self):
+        itens = contratos(6)
+        r = salvar_contratos(itens, self.licenca)
+        self.assertEqual((r["criados"], r["atualizados"], r["ignorados"], r["rejeitados"]), (6, 0, 0, 0))
+        self.assertEqual(ContratoLocacao.objects.filter(licenca=self.licenca).count(), 6)
+        # contrato_sintetico: 3 contratos por proprietário, um inquilino por contrato
+        self.assertEqual(Cliente.objects.count(), 2 + 6)
+
+        itens[0] = {**itens[0], "vl_aluguel_con": "1234.56"}
+        r = salvar_contratos(itens, self.licenca)
+        self.assertEqual((r["criados"], r["atualizados"], r["ignorados"]), (0, 1, 5))
+        contrato = ContratoLocacao.objects.get(identificador_contrato=itens[0]["id_contrato_con"])
+        self.assertEqual(str(contrato.valor_aluguel), "1234.56")
+
+        r = salvar_contratos(itens, self.licenca)
+        self.assertEqual((r["criados"], r["atualizados"], r["ignorados"]), (0, 0, 6))
+
+    def test_queries_por_bloco_e_nao_por_item(self):
+        poucos = self.contar_queries(lambda: salvar_contratos(contratos(5), self.licenca))
+        self.assertLess(poucos, 40)
+        # 30 contratos cabem num INSERT só também no sqlite (limite de 999 parâmetros)
+        with self.assertNumQueries(poucos):
+            salvar_contratos(contratos(30, inicio=300), self.licenca)
+
+        # página inteira inalterada: só a consulta dos existentes e a limpeza dos rejeitados
+        itens = contratos(30, inicio=300)
+        inalterados = self.contar_queries(lambda: salvar_contratos(itens[:5], self.licenca))
+        with self.assertNumQueries(inalterados):
+            salvar_contratos(itens, self.licenca)
+
+    def test_nao_toma_contrato_de_outra_licenca(self):
+        outra = criar_licenca("lic-b")
+        salvar_contratos(contratos(3), self.licenca)
+
+        r = salvar_contratos(contratos(4), outra)
+
+        self.assertEqual((r["criados"], r["atualizados"], r["ignorados"], r["rejeitados"]), (1, 0, 0, 3))
+        self.assertEqual(ContratoLocacao.objects.filter(licenca=self.licenca).count(), 3)
+        self.assertEqual(ContratoLocacao.objects.filter(licenca=outra).count(), 1)
+        rejeitados = ItemRejeitado.objects.filter(licenca=outra, endpoint="contratos", resolvido_em__isnull=True)
+        self.assertEqual(sorted(rejeitados.values_list("identificador", flat=True)), ["1", "2", "3"])
+        self.assertIn("outra licença", rejeitados.first().erro)
+
+
+class SalvarProprietariosTests(ContarQueriesMixin, TestCase):
+    def setUp(self):
+        self.licenca = criar_licenca("lic-a")
+
+    def test_cria_atualiza_e_mantem_inalterados(self):
+        itens = [proprietario_sintetico(i) for i in range(5)]
+        r = salvar_proprietarios(itens, self.licenca)
+        self.assertEqual((r["criados"], r["atualizados"], r["inalterados"], r["rejeitados"]), (5, 0, 0, 0))
+
+        itens[0] = {**itens[0], "st_email_pes": "novo@exemplo.com.br"}
+        itens[1] = {**itens[1], "st_celular_pes": ""}  # vazio não apaga o que já está gravado
+        r = salvar_proprietarios(itens, self.licenca)
+        self.assertEqual((r["criados"], r["atualizados"], r["inalterados"]), (0, 1, 4))
+        self.assertEqual(Cliente.objects.get(identificador_pessoa=itens[0]["id_pessoa_pes"]).email, "novo@exemplo.com.br")
+        self.assertTrue(Cliente.objects.get(identificador_pessoa=itens[1]["id_pessoa_pes"]).telefone)
+
+    def test_queries_por_bloco_e_nao_por_item(self):
+        novos = self.contar_queries(lambda: salvar_proprietarios([proprietario_sintetico(i) for i in range(5)], self.licenca))
+        with self.assertNumQueries(novos):
+            salvar_proprietarios([proprietario_sintetico(i) for i in range(100, 180)], self.licenca)
+
+        alterados = [{**proprietario_sintetico(i), "st_nome_pes": f"Outro {i}"} for i in range(100, 180)]
+        atualizar = self.contar_queries(lambda: salvar_proprietarios(alterados[:5], self.licenca))
+        alterados = [{**p, "st_nome_pes": p["st_nome_pes"] + " Jr"} for p in alterados]
+        with self.assertNumQueries(atualizar):
+            salvar_proprietarios(alterados, self.licenca)
+
+    def test_item_sem_identificador_vai_para_rejeitados(self):
+        itens = [proprietario_sintetico(i) for i in range(3)] + [{"st_nome_pes": "Sem id"}]
+        r = salvar_proprietarios(itens, self.licenca)
+        self.assertEqual((r["criados"], r["rejeitados"]), (3, 1))
+        self.assertEqual(ItemRejeitado.objects.filter(endpoint="proprietarios", resolvido_em__isnull=True).count(), 1)
+
+
+def resposta(status: int, corpo=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = "http://superlogica.test/contratos"
+    resp._content = json.dumps(corpo).encode() if corpo is not None else b""
+    return resp
+
+
+class APIFalsa:
+    """
+    /contratos com `total` contratos sintéticos. `falhar_em` é o número de uma página que
+    responde 500 (uma vez); `alterar` troca campos de contratos (por id_contrato_con);
+    `pedidas` registra as páginas pedidas.
+    """
+
+    def __init__(self, total: int, falhar_em: int | None = None, alterar: dict[str, dict] | None = None):
+        self.total = total
+        self.falhar_em = falhar_em
+        self.alterar = alterar or {}
+        self.pedidas: list[int] = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        pagina, por_pagina = int(params["pagina"]), int(params["itensPorPagina"])
+        self.pedidas.append(pagina)
+        if pagina == self.falhar_em:
+            self.falhar_em = None
+            return resposta(500, {"error": "indisponível"})
+        inicio = (pagina - 1) * por_pagina
+        itens = contratos(max(min(por_pagina, self.total - inicio), 0), inicio)
+        itens = [{**c, **self.alterar.get(c["id_contrato_con"], {})} for c in itens]
+        return resposta(200, {"data": itens})
+
+
+class ImportacaoRetomadaTests(TestCase):
+    def setUp(self):
+        self.licenca = criar_licenca("lic-a")
+        self.integracao = LicenseIntegration.objects.create(
+            license=self.licenca, access_token="token", import_concurrency=1, import_page_size=5,
+        )
+
+    def importar(self, api: APIFalsa) -> dict:
+        with mock.patch("integrador.http_client.get", api.get):
+            return services.importar_contratos(self.integracao, usar_cache=False)
+
+    def checkpoint(self) -> CheckpointImportacao | None:
+        return CheckpointImportacao.objects.filter(licenca=self.licenca, endpoint="contratos").first()
+
+    def test_retoma_da_pagina_que_falhou(self):
+        with self.assertRaises(requests.HTTPError):
+            self.importar(APIFalsa(total=20, falhar_em=3))
+        self.assertEqual(self.checkpoint().ultima_pagina, 2)
+        self.assertEqual(ContratoLocacao.objects.count(), 10)
+
+        api = APIFalsa(total=20)
+        resumo = self.importar(api)
+
+        self.assertEqual(resumo["retomado_da_pagina"], 3)
+        self.assertEqual(api.pedidas, [3, 4, 5])  # 5 é a página vazia que encerra
+        self.assertEqual(ContratoLocacao.objects.count(), 20)
+        self.assertIsNone(self.checkpoint())
+        self.integracao.refresh_from_db()
+        self.assertIsNotNone(self.integracao.last_synced_at)
+
+    def test_checkpoint_so_avanca_por_paginas_contiguas(self):
+        salvar = services.salvar_contratos
+
+        def falhar_na_pagina_2(itens, licenca, mapa=None):
+            if itens[0]["id_contrato_con"] == "6":  # primeiro contrato da página 2
+                raise RuntimeError("banco indisponível")
+            return salvar(itens, licenca, mapa=mapa)
+
+        with mock.patch.object(services, "salvar_contratos", falhar_na_pagina_2), self.assertLogs(services.logger, "ERROR"):
+            resumo = self.importar(APIFalsa(total=20))
+
+        # as páginas 3 e 4 foram gravadas, mas o checkpoint para antes do buraco
+        self.assertEqual(resumo["falhas"], 5)
+        self.assertEqual(ContratoLocacao.objects.count(), 15)
+        self.assertEqual(self.checkpoint().ultima_pagina, 1)
+        self.integracao.refresh_from_db()
+        self.assertIsNone(self.integracao.last_synced_at)
+
+        api = APIFalsa(total=20)
+        resumo = self.importar(api)
+        self.assertEqual(resumo["retomado_da_pagina"], 2)
+        self.assertEqual(api.pedidas, [2, 3, 4, 5])
+        self.assertEqual((resumo["criados"], resumo["ignorados"]), (5, 10))
+        self.assertIsNone(self.checkpoint())
+
+    def test_max_rps_passa_pelo_token_bucket_da_licenca(self):
+        api = APIFalsa(total=10)
+        with mock.patch("integrador.http_client.get", api.get):
+            services.importar_contratos(self.integracao, max_rps=20, usar_cache=False)
+
+        # 3 requisições sem rajada: as duas últimas esperam o bucket (banco, entre processos)
+        bucket = RateLimitBucket.objects.get(key=f"licenca:{self.licenca.pk}:max_rps")
+        self.assertEqual((bucket.base_rate, bucket.capacity), (20, 1))
+        self.assertEqual(bucket.wait_count, 2)
+
+
+class RejeitadosTests(TestCase):
+    def setUp(self):
+        self.licenca = criar_licenca("lic-a")
+
+    def pendentes(self):
+        return ItemRejeitado.objects.filter(licenca=self.licenca, endpoint="contratos", resolvido_em__isnull=True)
+
+    def test_linha_ruim_nao_derruba_a_pagina(self):
+        itens = contratos(6)
+        itens[1] = {**itens[1], "inquilinos": [{"st_nomeinquilino": "Sem id", "st_cnpj_pes": ""}]}
+        itens[4] = {**itens[4], "dt_fim_con": "31/31/2029"}
+
+        r = salvar_contratos(itens, self.licenca)
+
+        self.assertEqual((r["criados"], r["rejeitados"]), (4, 2))
+        self.assertEqual(
+            sorted(ContratoLocacao.objects.values_list("identificador_contrato", flat=True)), [1, 3, 4, 6]
+        )
+        erros = dict(self.pendentes().values_list("identificador", "erro"))
+        self.assertEqual(sorted(erros), ["2", "5"])
+        self.assertIn("ident_pessoa", erros["2"])
+        self.assertIn("data_fim", erros["5"])
+
+    def test_reprocessar_resolve_o_que_passou_a_valer(self):
+        itens = contratos(3)
+        itens[0] = {**itens[0], "dt_inicio_con": "99/99/2021"}
+        itens[2] = {**itens[2], "dt_inicio_con": ""}
+        salvar_contratos(itens, self.licenca)
+        self.assertEqual(self.pendentes().count(), 2)
+
+        # corrige o payload guardado de um deles; o outro continua inválido
+        corrigido = self.pendentes().get(identificador="1")
+        corrigido.payload = contrato_sintetico(0)
+        corrigido.save(update_fields=["payload"])
+
+        resumo = services.reprocessar_rejeitados(licencas=["lic-a"])
+
+        self.assertEqual((resumo["processados"], resumo["resolvidos"], resumo["pendentes"]), (2, 1, 1))
+        self.assertTrue(ContratoLocacao.objects.filter(identificador_contrato=1).exists())
+        self.assertEqual(list(self.pendentes().values_list("identificador", flat=True)), ["3"])
+        corrigido.refresh_from_db()
+        self.assertIsNotNone(corrigido.resolvido_em)
+        self.assertEqual(self.pendentes().get().tentativas, 2)
+
+
+class BuscaTests(TestCase):
+    def test_consulta_so_leva_palavras(self):
+        # dígitos e termos com pontuação não casam por prefixo: ficam no LIKE
+        self.assertIsNone(busca.consulta("123.456.789 joao@gmail.com"))
+        self.assertEqual(busca.consulta("João 1234 apto12").source_expressions[1].value, "joao:* & apto12:*")
+
+    def test_acha_pedaco_do_meio_do_documento_e_do_nome(self):
+        licenca = criar_licenca("lic-a")
+        itens = contratos(3)
+        itens[1] = {**itens[1], "inquilinos": [{"id_pessoa_pes": "77", "st_nomeinquilino": "Ana Dasilva", "st_cnpj_pes": "123.456.789-01"}]}
+        salvar_contratos(itens, licenca)
+
+        for q in ("456.789", "silva", "ana 6789"):
+            achados = busca.buscar_contratos(ContratoLocacao.objects.all(), q)
+            self.assertEqual([c.identificador_contrato for c in achados], [2], q)
+
+
+@skipUnless(connection.vendor == "postgresql", "documento de busca (tsvector) só existe no Postgres")
+class BuscaPostgresTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        itens = contratos(4)
+        itens[0] = {**itens[0], "st_imovel_imo": "Residencial Silva"}  # peso A
+        itens[1] = {**itens[1], "inquilinos": [{"id_pessoa_pes": "71", "st_nomeinquilino": "Maria Silva", "st_cnpj_pes": ""}]}  # peso B
+        itens[2] = {**itens[2], "inquilinos": [{"id_pessoa_pes": "72", "st_nomeinquilino": "Ana Dasilva", "st_cnpj_pes": "123.456.789-01"}]}
+        salvar_contratos(itens, criar_licenca("lic-a"))
+
+    def buscar(self, q: str) -> list[tuple[int, float]]:
+        achados = busca.buscar_contratos(ContratoLocacao.objects.all(), q).order_by("-relevancia", "identificador_contrato")
+        return [(c.identificador_contrato, c.relevancia) for c in achados]
+
+    def test_contrato_pesa_mais_que_cliente_e_substring_vem_por_ultimo(self):
+        achados = self.buscar("silva")
+        self.assertEqual([i for i, _ in achados], [1, 2, 3])
+        (_, a), (_, b), (_, c) = achados
+        self.assertGreater(a, b)
+        self.assertGreater(b, 0)
+        self.assertEqual(c, 0)  # "dasilva" só casa por substring
+
+    def test_prefixo_e_substring_juntos(self):
+        self.assertEqual([i for i, _ in self.buscar("resid")], [1])
+        self.assertEqual([i for i, _ in self.buscar("456.789")], [3])
+        self.assertEqual([i for i, _ in self.buscar("ana 6789")], [3])
+        self.assertEqual(self.buscar("inexistente"), [])
+
+    def test_paginacao_por_relevancia_nao_repete_nem_pula(self):
+        # mais contratos com "silva" em pesos/quantidades diferentes: relevâncias quebradas e empatadas
+        itens = contratos(12, inicio=10)
+        for n, item in enumerate(itens):
+            item["st_imovel_imo"] = "Silva " * (n % 3 + 1) + f"Casa {n % 2}"
+        salvar_contratos(itens, ClienteLicense.objects.get(license_name="lic-a"))
+
+        qs = busca.buscar_contratos(ContratoLocacao.objects.all(), "silva").order_by("-relevancia", "-data_inicio")
+        esperado = [c.pk for c in qs.order_by("-relevancia", "-data_inicio", "-pk")]
+        self.assertEqual(len(esperado), 15)
+        ida, cursor = [], ""
+        while cursor is not None:
+            pagina = paginacao.paginar(qs, 4, cursor, contar=False)
+            ida.extend(c.pk for c in pagina)
+            cursor = pagina.cursor_proxima
+        self.assertEqual(ida, esperado)
+        self.assertEqual(voltar_ate_o_comeco(qs, 4), esperado)
+
+
+class PaginacaoCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # nomes repetidos (empate) e agregados ausentes/nulos em várias posições
+        datas = [None, date(2024, 1, 1), date(2024, 1, 1), None, date(2023, 5, 1), "sem", date(2024, 1, 1)] * 2
+        for i, inicio in enumerate(datas):
+            cliente = Cliente.objects.create(
+                identificador_pessoa=i, nome=f"Cliente {i % 4}", email=f"c{i}@exemplo.com", tipo="Inquilino",
+            )
+            if inicio != "sem":
+                AgregadoCliente.objects.create(
+                    cliente=cliente, ultimo_inicio=inicio, aluguel_total=Decimal(100 * (i % 3)),
+                )
+
+    def test_ida_e_volta_batem_com_a_lista_ordenada(self):
+        ordenacoes = [
+            (("nome",), ("nome", "pk")),
+            (("-agregado__ultimo_inicio", "nome"), (F("agregado__ultimo_inicio").desc(nulls_first=True), "nome", "pk")),
+            (("agregado__ultimo_inicio",), (F("agregado__ultimo_inicio").asc(nulls_last=True), "pk")),
+            (
+                (F("agregado__aluguel_total").desc(nulls_last=True), "nome"),
+                (F("agregado__aluguel_total").desc(nulls_last=True), "nome", "pk"),
+            ),
+            (
+                (F("agregado__ultimo_inicio").asc(nulls_first=True), "-nome"),
+                (F("agregado__ultimo_inicio").asc(nulls_first=True), "-nome", "-pk"),
+            ),
+        ]
+        for ordem, explicita in ordenacoes:
+            with self.subTest(ordem=ordem):
+                qs = Cliente.objects.order_by(*ordem)
+                esperado = list(Cliente.objects.order_by(*explicita).values_list("pk", flat=True))
+
+                # ida página a página; voltar de cada uma dá exatamente a anterior
+                ida, cursor = [], ""
+                while cursor is not None:
+                    pagina = paginacao.paginar(qs, 3, cursor, contar=False)
+                    if ida:
+                        voltou = paginacao.paginar(qs, 3, pagina.cursor_anterior, contar=False)
+                        self.assertEqual([c.pk for c in voltou], ida[-1])
+                    ida.append([c.pk for c in pagina])
+                    cursor = pagina.cursor_proxima
+
+                self.assertEqual([pk for pagina in ida for pk in pagina], esperado)
+                self.assertEqual(voltar_ate_o_comeco(qs, 3), esperado)
+
+
+class CachePaginasTests(TestCase):
+    def setUp(self):
+        self.licenca = criar_licenca("lic-a")
+        self.integracao = LicenseIntegration.objects.create(
+            license=self.licenca, access_token="token", import_concurrency=1, import_page_size=5,
+        )
+
+    def importar(self, api: APIFalsa, **kwargs) -> dict:
+        with mock.patch("integrador.http_client.get", api.get):
+            return services.importar_contratos(self.integracao, **kwargs)
+
+    def entradas(self) -> list[int]:
+        return sorted(PageCacheEntry.objects.filter(license=self.licenca).values_list("page", flat=True))
+
+    def test_reimport_pula_paginas_inalteradas(self):
+        resumo = self.importar(APIFalsa(total=10))
+        self.assertEqual((resumo["criados"], resumo["paginas_inalteradas"]), (10, 0))
+        self.assertEqual(self.entradas(), [1, 2])
+
+        resumo = self.importar(APIFalsa(total=10))
+        self.assertEqual((resumo["paginas_inalteradas"], resumo["contratos"]), (2, 0))
+
+    def test_import_completo_ignora_o_cache(self):
+        self.importar(APIFalsa(total=10))
+
+        resumo = self.importar(APIFalsa(total=10), retomar=False)
+
+        self.assertEqual((resumo["paginas_inalteradas"], resumo["ignorados"]), (0, 10))
+        self.assertEqual(self.entradas(), [1, 2])
+
+    def test_apagar_contrato_invalida_o_cache(self):
+        self.importar(APIFalsa(total=10))
+
+        ContratoLocacao.objects.get(identificador_contrato=3).delete()
+        self.assertEqual(self.entradas(), [])
+
+        resumo = self.importar(APIFalsa(total=10))
+        self.assertEqual((resumo["paginas_inalteradas"], resumo["criados"]), (0, 1))
+        self.assertTrue(ContratoLocacao.objects.filter(identificador_contrato=3).exists())
+
+    def test_apagar_cliente_invalida_so_as_licencas_dele(self):
+        self.importar(APIFalsa(total=10))
+        outra = criar_licenca("lic-b")
+        for licenca, endpoint in ((outra, "contratos"), (outra, "proprietarios"), (self.licenca, "proprietarios")):
+            PageCacheEntry.objects.create(license=licenca, endpoint=endpoint, page_size=5, page=1, body_hash="x", items=5)
+
+        # proprietário sem contratos: a origem só pode ser um /proprietarios, de licença desconhecida
+        Cliente.objects.create(identificador_pessoa=999, nome="Sem contrato", tipo="PROPRIETARIO").delete()
+        self.assertFalse(PageCacheEntry.objects.filter(endpoint="proprietarios").exists())
+        self.assertEqual(self.entradas(), [1, 2])
+        self.assertTrue(PageCacheEntry.objects.filter(license=outra, endpoint="contratos").exists())
+
+        PageCacheEntry.objects.create(license=outra, endpoint="proprietarios", page_size=5, page=1, body_hash="x", items=5)
+        Cliente.objects.get(identificador_pessoa=100000003).delete()  # inquilino do contrato 3, da lic-a
+        self.assertEqual(self.entradas(), [])
+        self.assertEqual(PageCacheEntry.objects.filter(license=outra).count(), 2)
+
+    def test_pagina_com_rejeitado_nao_entra_no_cache(self):
+        resumo = self.importar(APIFalsa(total=10, alterar={"7": {"dt_inicio_con": "99/99/2021"}}))
+        self.assertEqual(resumo["rejeitados"], 1)
+        self.assertEqual(self.entradas(), [1])
+
+        # o rejeitado volta a ser tentado no próximo import (a página 2 é baixada e gravada)
+        resumo = self.importar(APIFalsa(total=10))
+        self.assertEqual((resumo["paginas_inalteradas"], resumo["criados"]), (1, 1))
+        self.assertEqual(self.entradas(), [1, 2])
+        self.assertFalse(ItemRejeitado.objects.filter(resolvido_em__isnull=True).exists())
+
+    def test_pagina_revertida_nao_entra_no_cache(self):
+        salvar = services.salvar_contratos
+
+        def falhar_na_pagina_2(itens, licenca, mapa=None):
+            r = salvar(itens, licenca, mapa=mapa)
+            if itens[0]["id_contrato_con"] == "6":
+                raise RuntimeError("banco indisponível")
+            return r
+
+        with mock.patch.object(services, "salvar_contratos", falhar_na_pagina_2), self.assertLogs(services.logger, "ERROR"):
+            self.importar(APIFalsa(total=10))
+        self.assertEqual(self.entradas(), [1])
+        self.assertEqual(ContratoLocacao.objects.count(), 5)
+
+
+class JobsTests(TestCase):
+    def setUp(self):
+        self.licenca = criar_licenca("lic-a")
+        LicenseIntegration.objects.create(license=self.licenca, access_token="token")
+
+    def test_enfileirar_concorrente_devolve_o_job_da_fila(self):
+        primeiro = jobs.enfileirar(self.licenca, "CONTRATOS")
+        ativo = jobs._ativo
+        # o segundo pedido consultou antes de o primeiro gravar: só a constraint o segura
+        with mock.patch.object(jobs, "_ativo", side_effect=[None, primeiro]) as consulta:
+            segundo = jobs.enfileirar(self.licenca, "CONTRATOS")
+        self.assertEqual(consulta.call_count, 2)
+        self.assertEqual(segundo.pk, primeiro.pk)
+        self.assertEqual(JobImportacao.objects.filter(status="PENDENTE").count(), 1)
+        self.assertEqual(ativo(self.licenca, "CONTRATOS").pk, primeiro.pk)
+        # outro tipo tem a sua própria fila
+        self.assertNotEqual(jobs.enfileirar(self.licenca, "PROPRIETARIOS").pk, primeiro.pk)
+
+    def test_liberar_orfaos_so_libera_lease_vencido(self):
+        vivo = jobs.enfileirar(self.licenca, "CONTRATOS")
+        self.assertTrue(jobs.reservar(vivo))
+        # sem progresso há muito tempo, mas o worker continua renovando o lease
+        JobImportacao.objects.filter(pk=vivo.pk).update(data_ult_modificacao=timezone.now() - timedelta(hours=3))
+        self.assertEqual(jobs.liberar_orfaos(timedelta(minutes=30)), 0)
+
+        JobImportacao.objects.filter(pk=vivo.pk).update(lease_expira_em=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.liberar_orfaos(timedelta(minutes=30)), 1)
+        vivo.refresh_from_db()
+        self.assertEqual(vivo.status, "FALHOU")
+
+    def test_worker_com_job_liberado_para_na_proxima_pagina(self):
+        job = jobs.enfileirar(self.licenca, "CONTRATOS")
+        self.assertTrue(jobs.reservar(job))
+        paginas = []
+
+        def importar(integracao, progresso=None):
+            for pagina in (1, 2, 3):
+                if pagina == 2:  # outro processo liberou o job (lease vencido)
+                    self.liberar(job)
+                progresso({"paginas": pagina, "contratos": 0, "falhas": 0})
+                paginas.append(pagina)
+            return {"paginas": 3, "contratos": 0, "falhas": 0}
+
+        with mock.patch.dict(jobs.IMPORTADORES, {"CONTRATOS": importar}), self.assertLogs(jobs.logger, "ERROR"):
+            job = jobs.executar(job)
+
+        self.assertEqual(paginas, [1])
+        self.assertEqual(job.status, "FALHOU")
+        self.assertEqual(job.ultimo_erro, "Lease do worker vencido; job abandonado.")
+        self.assertEqual(job.erros, 0)  # o fechamento deste worker não sobrescreve o da liberação
+        self.assertIsNone(job.lease_expira_em)
+
+    def test_job_liberado_depois_da_ultima_pagina_nao_volta_a_concluido(self):
+        job = jobs.enfileirar(self.licenca, "CONTRATOS")
+        self.assertTrue(jobs.reservar(job))
+
+        def importar(integracao, progresso=None):
+            progresso({"paginas": 1, "contratos": 5, "falhas": 0})
+            self.liberar(job)  # entre o último progresso e o fechamento
+            return {"paginas": 1, "contratos": 5, "falhas": 0}
+
+        with mock.patch.dict(jobs.IMPORTADORES, {"CONTRATOS": importar}), self.assertLogs(jobs.logger, "WARNING"):
+            job = jobs.executar(job)
+
+        self.assertEqual(job.status, "FALHOU")
+        self.assertEqual(job.ultimo_erro, "Lease do worker vencido; job abandonado.")
+
+    def test_executar_conclui_o_job(self):
+        job = jobs.enfileirar(self.licenca, "CONTRATOS")
+        self.assertTrue(jobs.reservar(job))
+        resumo = {"paginas": 2, "contratos": 7, "falhas": 1}
+
+        with mock.patch.dict(jobs.IMPORTADORES, {"CONTRATOS": lambda integracao, progresso=None: resumo}):
+            job = jobs.executar(job)
+
+        self.assertEqual((job.status, job.paginas, job.linhas, job.erros), ("CONCLUIDO", 2, 7, 1))
+        self.assertIsNotNone(job.data_fim)
+        self.assertIsNone(job.lease_expira_em)
+
+    def test_ativo_prefere_o_pendente(self):
+        executando = jobs.enfileirar(self.licenca, "CONTRATOS")
+        self.assertTrue(jobs.reservar(executando))
+        self.assertEqual(jobs.enfileirar(self.licenca, "CONTRATOS").pk, executando.pk)
+        pendente = JobImportacao.objects.create(licenca=self.licenca, tipo="CONTRATOS")
+        self.assertEqual(jobs._ativo(self.licenca, "CONTRATOS").pk, pendente.pk)
 
-# Create your tests here.
+    def liberar(self, job: JobImportacao):
+        """Vence o lease e roda liberar_orfaos, como outro processo faria."""
+        JobImportacao.objects.filter(pk=job.pk).update(lease_expira_em=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.liberar_orfaos(timedelta(minutes=30)), 1)
@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path("importar/contratos/", views.importar_contratos_meus, name="importar_contratos"),
     path("importar/proprietarios/", views.importar_proprietarios, name="importar_proprietarios"),
+    path("importar/jobs/<int:pk>/", views.status_importacao, name="status_importacao"),
     path("contratos/<int:pk>/", views.contrato_detail, name="contrato_detail"),
 ]
\ No newline at end of file
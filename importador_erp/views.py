@@ -4,16 +4,17 @@ from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from clientes.models import ClienteLicense
 from integrador.models import LicenseIntegration
-import requests
-from django.conf import settings
-from .ingest import salvar_contratos, salvar_proprietarios
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from . import busca, jobs
+from .paginacao import PaginacaoCursorMixin
 
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView
 from django.db.models import Q, Count, Sum, ExpressionWrapper, Value, Case, When, IntegerField, F
 from django.db.models.functions import Now
 from django.shortcuts import render
-from .models import Cliente, ContratoLocacao  # ajuste o import conforme seu app
+from .models import Cliente, ContratoLocacao, JobImportacao  # ajuste o import conforme seu app
 from django.db.models.functions import Coalesce
 from django.db.models import DecimalField
 
@@ -27,34 +28,30 @@ def importar_contratos_meus(request):
 
     if not licencas:
         return HttpResponseNotFound("Usuário sem Licença vinculada")
-    else:
-        integ = LicenseIntegration.objects.get(license_id=licencas[0].id, is_active=True)
-        token = integ.access_token
-        print(token)
 
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/x-www-form-urlencoded",
-            "app_token": settings.INTEGRADOR_APP_TOKEN,   # do .env
-            "access_token": token,      # do banco (decrypt automático)
-        }
-
-        todos_contratos = []
-        pagina = 1
-
-        while True:
-            url = f"http://apps.superlogica.net/imobiliaria/api/contratos?pagina={pagina}&itensPorPagina=50"
-            response = requests.get(url, headers=headers).json()
-
-            if response['data'] != []:
-                todos_contratos.extend(response['data'])
-                pagina += 1
-            else:
-                break
-
-        salvar_contratos(todos_contratos, licencas[0])
+    ativas = licencas.filter(integracao__is_active=True)
+    if not ativas:
+        return HttpResponseNotFound("Licença sem integração ativa")
 
-    return JsonResponse({"licencas": [licenca.license_name for licenca in licencas], "contratos": todos_contratos})
+    # um job por licença; cada importador_worker executa um job por vez, então licenças
+    # diferentes só rodam em paralelo com mais de um worker (reservar_proximo usa skip_locked)
+    enfileirados = [jobs.enfileirar(licenca, "CONTRATOS", usuario=request.user) for licenca in ativas]
+
+    return JsonResponse(
+        {
+            "licencas": [licenca.license_name for licenca in licencas],
+            "jobs": [
+                {
+                    "licenca": job.licenca.license_name,
+                    "job": job.pk,
+                    "status": job.status,
+                    "acompanhar": reverse("status_importacao", args=[job.pk]),
+                }
+                for job in enfileirados
+            ],
+        },
+        status=202,
+    )
 
 def importar_proprietarios(request):
     pessoa = getattr(request.user, "pessoa", None)
@@ -65,32 +62,29 @@ def importar_proprietarios(request):
     if not lic or not getattr(lic, "integracao", None) or not lic.integracao.is_active:
         return HttpResponseNotFound("Licença sem integração ativa")
 
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/x-www-form-urlencoded",
-        "app_token": settings.INTEGRADOR_APP_TOKEN,
-        "access_token": lic.integracao.access_token,  # já vem descriptografado
-    }
+    job = jobs.enfileirar(lic, "PROPRIETARIOS", usuario=request.user)
+    return JsonResponse(
+        {
+            "ok": True,
+            "license_name": lic.license_name,
+            "job": job.pk,
+            "status": job.status,
+            "acompanhar": reverse("status_importacao", args=[job.pk]),
+        },
+        status=202,
+    )
 
-    todos = []
-    pagina = 1
-    base = settings.IMOBILIARIAS_BASE_URL  # ex.: "https://apps.superlogica.net/imobiliaria/api"
-    while True:
-            url = f"http://apps.superlogica.net/imobiliaria/api/proprietarios?pagina={pagina}&itensPorPagina=50"
-            response = requests.get(url, headers=headers).json()
-
-            if response['data'] != []:
-                todos.extend(response['data'])
-                pagina += 1
-            else:
-                break
-    
-    print(todos)
-    proprietarios = salvar_proprietarios(todos)
-    return JsonResponse({"ok": True, "license_name": lic.license_name, "importados": len(proprietarios)})
+@login_required
+def status_importacao(request, pk):
+    job = get_object_or_404(
+        JobImportacao.objects.select_related("licenca"),
+        pk=pk,
+        licenca__cliente__usuario=request.user,
+    )
+    return JsonResponse(jobs.status_json(job))
 
 @method_decorator(login_required, name="dispatch")
-class MeusClientesListView(ListView):
+class MeusClientesListView(PaginacaoCursorMixin, ListView):
     model = Cliente
     template_name = "importador_erp/clientes_lista.html"
     context_object_name = "clientes"
@@ -98,38 +92,25 @@ class MeusClientesListView(ListView):
 
     def get_queryset(self):
         # Zero tipado como Decimal
-        ZERO_DEC = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+        ZERO_DEC = Value(0, output_field=DecimalField(max_digits=14, decimal_places=2))
 
+        # contagens e totais vêm de AgregadoCliente (1:1), sem agregar os M2M por request;
+        # quem ainda não tem linha no agregado aparece com zero
         qs = (
             Cliente.objects.all()
             .annotate(
-                contratos_inq=Count("contratos_inquilino", distinct=True),
-                contratos_prop=Count("contratos_proprietario", distinct=True),
-                total_aluguel_inq=Coalesce(Sum("contratos_inquilino__valor_aluguel"), ZERO_DEC),
-                total_aluguel_prop=Coalesce(Sum("contratos_proprietario__valor_aluguel"), ZERO_DEC),
-            )
-        )
-
-        # total_aluguel = total_inq + total_prop (com output_field decimal)
-        qs = qs.annotate(
-            total_aluguel=ExpressionWrapper(
-                Coalesce(Sum("contratos_inquilino__valor_aluguel"), ZERO_DEC)
-                + Coalesce(Sum("contratos_proprietario__valor_aluguel"), ZERO_DEC),
-                output_field=DecimalField(max_digits=12, decimal_places=2),
+                contratos_inq=Coalesce(F("agregado__contratos_inquilino"), 0),
+                contratos_prop=Coalesce(F("agregado__contratos_proprietario"), 0),
+                total_aluguel=Coalesce(F("agregado__aluguel_total"), ZERO_DEC),
             )
         )
 
         g = self.request.GET
 
-        # Busca textual
+        # Busca textual (nome, email, documento, telefone) na coluna normalizada
         q = g.get("q")
         if q:
-            qs = qs.filter(
-                Q(nome__icontains=q)
-                | Q(email__icontains=q)
-                | Q(cpf_cnpj__icontains=q)
-                | Q(telefone__icontains=q)
-            )
+            qs = busca.filtrar_clientes(qs, q)
 
         # Tipo de cliente
         tipo = g.get("tipo")
@@ -139,88 +120,84 @@ class MeusClientesListView(ListView):
         # Vínculo
         vinculo = g.get("vinculo")  # 'prop' | 'inq' | 'semcontrato'
         if vinculo == "prop":
-            qs = qs.filter(contratos_proprietario__isnull=False)
+            qs = qs.filter(agregado__contratos_proprietario__gt=0)
         elif vinculo == "inq":
-            qs = qs.filter(contratos_inquilino__isnull=False)
+            qs = qs.filter(agregado__contratos_inquilino__gt=0)
         elif vinculo == "semcontrato":
             qs = qs.filter(
-                contratos_proprietario__isnull=True,
-                contratos_inquilino__isnull=True,
+                Q(agregado__isnull=True)
+                | Q(agregado__contratos_inquilino=0, agregado__contratos_proprietario=0)
             )
 
         # Ativo (em qualquer contrato vinculado)
         ativo = g.get("ativo")  # '1' ou '0'
-        if ativo in ("1", "0"):
-            flag = ativo == "1"
-            qs = qs.filter(
-                Q(contratos_inquilino__contrato_ativo=flag)
-                | Q(contratos_proprietario__contrato_ativo=flag)
-            )
-
-        # Status do contrato
+        if ativo == "1":
+            qs = qs.filter(agregado__contratos_ativos__gt=0)
+        elif ativo == "0":
+            qs = qs.filter(agregado__contratos_inativos__gt=0)
+
+        # Filtros por contrato (status, aluguel, início): clientes com algum contrato que
+        # atenda, por subquery nas tabelas intermediárias, sem join que multiplica linhas
+        contratos = Q()
         status_contrato = g.get("status")
         if status_contrato:
-            qs = qs.filter(
-                Q(contratos_inquilino__status_contrato=status_contrato)
-                | Q(contratos_proprietario__status_contrato=status_contrato)
-            )
+            contratos &= Q(status_contrato=status_contrato)
 
         # Faixa de aluguel
         min_aluguel = g.get("min_aluguel")
         max_aluguel = g.get("max_aluguel")
         if min_aluguel:
-            qs = qs.filter(
-                Q(contratos_inquilino__valor_aluguel__gte=min_aluguel)
-                | Q(contratos_proprietario__valor_aluguel__gte=min_aluguel)
-            )
+            contratos &= Q(valor_aluguel__gte=min_aluguel)
         if max_aluguel:
-            qs = qs.filter(
-                Q(contratos_inquilino__valor_aluguel__lte=max_aluguel)
-                | Q(contratos_proprietario__valor_aluguel__lte=max_aluguel)
-            )
+            contratos &= Q(valor_aluguel__lte=max_aluguel)
 
         # Período de início do contrato
         dt_ini = g.get("dt_ini")
         dt_fim = g.get("dt_fim")
         if dt_ini:
-            qs = qs.filter(
-                Q(contratos_inquilino__data_inicio__gte=dt_ini)
-                | Q(contratos_proprietario__data_inicio__gte=dt_ini)
-            )
+            contratos &= Q(data_inicio__gte=dt_ini)
         if dt_fim:
+            contratos &= Q(data_inicio__lte=dt_fim)
+
+        if contratos:
+            ids = ContratoLocacao.objects.filter(contratos).values("pk")
             qs = qs.filter(
-                Q(contratos_inquilino__data_inicio__lte=dt_fim)
-                | Q(contratos_proprietario__data_inicio__lte=dt_fim)
+                Q(pk__in=ContratoLocacao.inquilinos.through.objects.filter(contratolocacao_id__in=ids).values("cliente_id"))
+                | Q(pk__in=ContratoLocacao.proprietarios.through.objects.filter(contratolocacao_id__in=ids).values("cliente_id"))
             )
 
-        # Ordenação
+        # Ordenação (colunas indexadas do agregado)
         ordenar = g.get("ordenar", "nome")
         if ordenar in ("nome", "-nome"):
             qs = qs.order_by(ordenar)
         elif ordenar == "contratos":
-            qs = qs.order_by("contratos_inq", "contratos_prop", "nome")
+            qs = qs.order_by("agregado__contratos_inquilino", "agregado__contratos_proprietario", "nome")
         elif ordenar == "-contratos":
-            qs = qs.order_by("-contratos_inq", "-contratos_prop", "nome")
+            qs = qs.order_by(
+                F("agregado__contratos_inquilino").desc(nulls_last=True),
+                F("agregado__contratos_proprietario").desc(nulls_last=True),
+                "nome",
+            )
         elif ordenar == "aluguel":
-            qs = qs.order_by("total_aluguel")
+            qs = qs.order_by("agregado__aluguel_total", "nome")
         elif ordenar == "-aluguel":
-            qs = qs.order_by("-total_aluguel")
+            qs = qs.order_by(F("agregado__aluguel_total").desc(nulls_last=True), "nome")
         else:
             qs = qs.order_by("nome")
 
-        return qs.distinct()
+        return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         qs = self.request.GET.copy()
-        qs.pop("page", None)
+        qs.pop("cursor", None)
         ctx["querystring"] = qs.urlencode()
         # Se quiser popular o select de tipos dinamicamente:
         ctx["choices_tipo"] = getattr(self.model, "TIPOS_CLIENTE_LOCACAO", None)
         return ctx
 
 @method_decorator(login_required, name="dispatch")
-class ContratosLocacaoListView(ListView):
+class ContratosLocacaoListView(PaginacaoCursorMixin, ListView):
     model = ContratoLocacao
     template_name = "importador_erp/contratos_lista.html"
     context_object_name = "contratos"
@@ -244,22 +221,10 @@ class ContratosLocacaoListView(ListView):
 
         g = self.request.GET
 
-        # Busca textual (imóvel, id contrato, status, tipo, cliente relacionado)
+        # Busca textual (imóvel, id contrato, status, tipo, cliente relacionado), com relevância
         q = g.get("q")
         if q:
-            qs = qs.filter(
-                Q(nome_do_imovel__icontains=q)
-                | Q(identificador_contrato__icontains=q)
-                | Q(status_contrato__icontains=q)
-                | Q(tipo_imovel__icontains=q)
-                | Q(tipo_contrato__icontains=q)
-                | Q(inquilinos__nome__icontains=q)
-                | Q(proprietarios__nome__icontains=q)
-                | Q(inquilinos__email__icontains=q)
-                | Q(proprietarios__email__icontains=q)
-                | Q(inquilinos__cpf_cnpj__icontains=q)
-                | Q(proprietarios__cpf_cnpj__icontains=q)
-            )
+            qs = busca.buscar_contratos(qs, q)
 
         # Ativo
         ativo = g.get("ativo")  # '1' ou '0'
@@ -335,9 +300,11 @@ class ContratosLocacaoListView(ListView):
         if prop_nome:
             qs = qs.filter(proprietarios__nome__icontains=prop_nome)
 
-        # Ordenação
-        ordenar = g.get("ordenar", "-data_inicio")
-        if ordenar in ("data_inicio", "-data_inicio", "data_fim", "-data_fim",
+        # Ordenação (com busca, o padrão é a relevância)
+        ordenar = g.get("ordenar") or ("relevancia" if q else "-data_inicio")
+        if ordenar == "relevancia" and q:
+            qs = qs.order_by("-relevancia", "-data_inicio")
+        elif ordenar in ("data_inicio", "-data_inicio", "data_fim", "-data_fim",
                        "valor_aluguel", "-valor_aluguel", "nome_do_imovel", "-nome_do_imovel"):
             qs = qs.order_by(ordenar)
         elif ordenar in ("situacao", "-situacao"):
@@ -350,7 +317,7 @@ class ContratosLocacaoListView(ListView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         qs = self.request.GET.copy()
-        qs.pop("page", None)
+        qs.pop("cursor", None)
         ctx["querystring"] = qs.urlencode()
         return ctx
     
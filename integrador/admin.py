@@ -1,6 +1,18 @@
 # integrador/admin.py
 from django.contrib import admin
-from .models import LicenseIntegration
+from .models import CircuitBreakerState, LicenseIntegration, RateLimitBucket
 
 # Register your models here.
 admin.site.register(LicenseIntegration)
+
+
+@admin.register(RateLimitBucket)
+class RateLimitBucketAdmin(admin.ModelAdmin):
+    list_display = ("key", "rate", "base_rate", "tokens", "wait_count", "total_wait_seconds", "throttle_count", "updated_at")
+
+
+@admin.register(CircuitBreakerState)
+class CircuitBreakerStateAdmin(admin.ModelAdmin):
+    list_display = ("key", "state", "failures", "open_count", "changed_at", "last_failure_at", "last_error")
+    list_filter = ("state",)
+
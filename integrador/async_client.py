@@ -0,0 +1,155 @@
+# integrador/async_client.py
+"""
+Contraparte asyncio do SuperlogicaClient, para chamadas com muito fan-out
+(verificar centenas de licenças ao mesmo tempo).
+
+As requisições usam a mesma sessão com pool/retry de integrador.http_client, rodando
+num pool de threads próprio do tamanho do semáforo que limita quantas ficam em voo
+(ver Concorrencia). Assim as esperas de rede se sobrepõem sem adicionar dependência
+de cliente HTTP assíncrono.
+Pode ser usado de management commands (asyncio.run) e de views async do Django.
+
+Aqui não há paginação: os imports paginam por importador_erp.services.iterar_paginas,
+que passa pelo orçamento (integrador.ratelimit) e pelo circuito. Também não há
+decodificação de JSON em streaming: as respostas do healthcheck são pequenas e são
+lidas inteiras.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Iterable
+
+from asgiref.sync import sync_to_async
+
+from clientes.models import ClienteLicense
+from integrador import http_client
+from integrador.circuito import CLASSE_HEALTHCHECK, Circuito, CircuitoAberto
+from integrador.models import LicenseIntegration
+from integrador.ratelimit import OrcamentoLicenca, contar_429
+from integrador.services import SuperlogicaClient
+
+logger = logging.getLogger(__name__)
+
+CONCORRENCIA_PADRAO = 10
+
+
+class Concorrencia:
+    """
+    Semáforo + pool de threads do mesmo tamanho. O asyncio.to_thread usaria o executor
+    padrão do loop (min(32, cpus + 4) threads, dividido com o resto do processo), que
+    viraria o teto real com `n` maior. Use com `with` (ou fechar()) para soltar as threads.
+    """
+
+    def __init__(self, n: int = CONCORRENCIA_PADRAO):
+        self.semaforo = asyncio.Semaphore(n)
+        self.executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="superlogica-async")
+
+    async def rodar(self, func, *args, **kwargs):
+        async with self.semaforo:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def fechar(self):
+        self.executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class AsyncSuperlogicaClient:
+    def __init__(self, cliente_license: ClienteLicense, limite: Concorrencia | None = None):
+        self.sync = SuperlogicaClient(cliente_license)
+        self.lic = cliente_license
+        self.license_name = cliente_license.license_name
+        # compartilhe a mesma Concorrencia entre clientes para um teto global
+        self.limite = limite or Concorrencia()
+
+    auth_headers = staticmethod(SuperlogicaClient.auth_headers)
+
+    async def get(self, url: str, **kwargs):
+        return await self.limite.rodar(http_client.get, url, **kwargs)
+
+    async def _integracao(self) -> LicenseIntegration | None:
+        return await LicenseIntegration.objects.filter(license=self.lic, is_active=True).afirst()
+
+    async def verificar_conexao(
+        self, salvar: bool = True, integracao: LicenseIntegration | None = None
+    ) -> tuple[bool, dict | None]:
+        """
+        Mesmo contrato de SuperlogicaClient.verificar_conexao. Passe `integracao` já
+        carregada para evitar a consulta (a varredura em lote faz isso).
+        """
+        obj = integracao or await self._integracao()
+        if not obj or not obj.access_token:
+            return False, {"error": "Licença não conectada ou sem token salvo."}
+        circuito = Circuito(self.lic.id, CLASSE_HEALTHCHECK)
+        try:
+            await sync_to_async(circuito.antes)()
+            orcamento = OrcamentoLicenca(self.lic.id)
+            await orcamento.aaguardar()
+            resp = await self.get(self.sync.healthcheck_url(), headers=self.auth_headers(obj.access_token))
+            await sync_to_async(circuito.registrar)(resp)
+            await sync_to_async(orcamento.registrar)(contar_429(resp))
+            ok, payload = self.sync.interpretar_healthcheck(resp)
+            if salvar:
+                campos = self.sync.registrar_verificacao(obj, ok, payload)
+                await sync_to_async(obj.save)(update_fields=campos)
+            return ok, payload
+        except CircuitoAberto as e:
+            return False, {"error": str(e), "circuito": "ABERTO"}
+        except Exception as e:
+            await sync_to_async(circuito.registrar)(erro=e)
+            logger.exception("Falha ao verificar conexão com %s", self.license_name)
+            return False, {"error": str(e)}
+
+
+async def verificar_varias(licencas: Iterable[ClienteLicense], concorrencia: int = CONCORRENCIA_PADRAO) -> dict[int, tuple[bool, dict | None]]:
+    """Verifica várias licenças em paralelo com no máximo `concorrencia` requisições em voo."""
+    licencas = list(licencas)
+    with Concorrencia(concorrencia) as limite:
+        resultados = await asyncio.gather(
+            *(AsyncSuperlogicaClient(lic, limite).verificar_conexao() for lic in licencas)
+        )
+    return {lic.id: r for lic, r in zip(licencas, resultados)}
+
+
+async def varrer_conexoes(concorrencia: int = CONCORRENCIA_PADRAO, licencas: list[str] | None = None) -> dict:
+    """
+    Verifica todas as LicenseIntegration ativas com token, no máximo `concorrencia` em
+    voo, e grava o resultado de todas num único bulk_update (last_verified_at,
+    last_check_ok, last_check_error). Devolve {"total", "ok", "falhas", "licencas"}.
+    """
+    qs = (
+        LicenseIntegration.objects.filter(is_active=True, license__isnull=False, access_token__isnull=False)
+        .exclude(access_token="")
+        .select_related("license")
+    )
+    if licencas:
+        qs = qs.filter(license__license_name__in=licencas)
+    integracoes = [i async for i in qs]
+
+    with Concorrencia(concorrencia) as limite:
+        resultados = await asyncio.gather(*(
+            AsyncSuperlogicaClient(i.license, limite).verificar_conexao(salvar=False, integracao=i)
+            for i in integracoes
+        ))
+
+    campos = None
+    for integracao, (ok, payload) in zip(integracoes, resultados):
+        campos = SuperlogicaClient.registrar_verificacao(integracao, ok, payload)
+    if campos:
+        await sync_to_async(LicenseIntegration.objects.bulk_update)(integracoes, campos, batch_size=500)
+
+    return {
+        "total": len(integracoes),
+        "ok": sum(1 for i in integracoes if i.last_check_ok),
+        "falhas": sum(1 for i in integracoes if not i.last_check_ok),
+        "licencas": [
+            {"licenca": i.license.license_name, "ok": i.last_check_ok, "erro": i.last_check_error}
+            for i in integracoes
+        ],
+    }
+
@@ -0,0 +1,126 @@
+# integrador/cache_respostas.py
+"""
+Cache das páginas já importadas do Superlógica, por licença, endpoint, itensPorPagina e
+página, guardado no banco (PageCacheEntry).
+
+Para cada página guardamos ETag, Last-Modified e o sha256 do corpo. Na próxima busca
+enviamos If-None-Match/If-Modified-Since; se a API responder 304, ou responder 200
+com o mesmo corpo (API sem suporte a requisição condicional), a página é marcada como
+inalterada e nem o JSON é decodificado.
+
+A entrada de uma página só é gravada por confirmar(), que deve ser chamado dentro da
+transação que gravou a página: se a gravação for revertida, a entrada também é, e a
+página é baixada de novo no próximo import. Páginas com itens rejeitados não devem ser
+confirmadas. Um import completo (sem retomar) ignora as entradas existentes e as
+regrava; apagar contratos/clientes invalida o cache (ver importador_erp.signals).
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+
+from integrador.models import PageCacheEntry
+
+
+class CacheRespostas:
+    def __init__(self, license_id: int, endpoint: str, itens_por_pagina: int, renovar: bool = False):
+        self.license_id = license_id
+        self.endpoint = endpoint
+        self.itens_por_pagina = itens_por_pagina
+        # carregado de uma vez aqui (thread principal): ler() roda nas threads de download
+        self._entradas: dict[int, dict] = {} if renovar else self._carregar()
+        self._pendentes: dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def para(cls, license_id: int, endpoint: str, itens_por_pagina: int, renovar: bool = False) -> "CacheRespostas | None":
+        """
+        None quando o cache está desligado (SUPERLOGICA_CACHE_PAGINAS=False). Com
+        `renovar`, nenhuma página é considerada inalterada (import completo).
+        """
+        if not settings.SUPERLOGICA_CACHE_PAGINAS:
+            return None
+        return cls(license_id, endpoint, itens_por_pagina, renovar)
+
+    def _filtro(self) -> dict:
+        return {"license_id": self.license_id, "endpoint": self.endpoint, "page_size": self.itens_por_pagina}
+
+    def _carregar(self) -> dict[int, dict]:
+        return {
+            e.page: {"etag": e.etag, "last_modified": e.last_modified, "hash": e.body_hash, "itens": e.items}
+            for e in PageCacheEntry.objects.filter(**self._filtro())
+        }
+
+    def ler(self, pagina: int) -> dict | None:
+        return self._entradas.get(pagina)
+
+    @staticmethod
+    def condicionais(entrada: dict | None) -> dict:
+        """Headers de requisição condicional para a entrada (vazio se não houver)."""
+        headers = {}
+        if entrada and entrada.get("etag"):
+            headers["If-None-Match"] = entrada["etag"]
+        if entrada and entrada.get("last_modified"):
+            headers["If-Modified-Since"] = entrada["last_modified"]
+        return headers
+
+    @staticmethod
+    def inalterada(entrada: dict | None, resp) -> bool:
+        """True se `resp` confirma que a página é a mesma já gravada (304 ou corpo idêntico)."""
+        if not entrada:
+            return False
+        if resp.status_code == 304:
+            return True
+        return resp.status_code == 200 and hashlib.sha256(resp.content).hexdigest() == entrada["hash"]
+
+    @staticmethod
+    def entrada_de(resp, itens: int) -> dict:
+        return {
+            "etag": resp.headers.get("ETag") or "",
+            "last_modified": resp.headers.get("Last-Modified") or "",
+            "hash": hashlib.sha256(resp.content).hexdigest(),
+            "itens": itens,
+        }
+
+    def pendente(self, pagina: int, entrada: dict):
+        """Guarda a entrada da página baixada até a gravação dela ser confirmada."""
+        with self._lock:
+            self._pendentes[pagina] = entrada
+
+    def confirmar(self, pagina: int):
+        """Grava a entrada da página; chame dentro da transação que gravou a página."""
+        with self._lock:
+            entrada = self._pendentes.pop(pagina, None)
+        if entrada is None:
+            return
+        PageCacheEntry.objects.bulk_create(
+            [PageCacheEntry(
+                **self._filtro(),
+                page=pagina,
+                etag=entrada["etag"],
+                last_modified=entrada["last_modified"],
+                body_hash=entrada["hash"],
+                items=entrada["itens"],
+            )],
+            update_conflicts=True,
+            unique_fields=["license", "endpoint", "page_size", "page"],
+            update_fields=["etag", "last_modified", "body_hash", "items", "updated_at"],
+        )
+        self._entradas[pagina] = entrada
+
+    def descartar(self, pagina: int):
+        """Esquece a página (gravação falhou ou teve rejeitados): ela é baixada de novo na próxima vez."""
+        with self._lock:
+            self._pendentes.pop(pagina, None)
+        self._entradas.pop(pagina, None)
+        PageCacheEntry.objects.filter(**self._filtro(), page=pagina).delete()
+
+    @staticmethod
+    def invalidar(license_id: int | None = None, endpoint: str | None = None) -> int:
+        """Apaga as entradas (de uma licença/endpoint, ou todas): o próximo import relê tudo."""
+        qs = PageCacheEntry.objects.all()
+        if license_id is not None:
+            qs = qs.filter(license_id=license_id)
+        if endpoint is not None:
+            qs = qs.filter(endpoint=endpoint)
+        return qs.delete()[0]
@@ -0,0 +1,125 @@
+# integrador/circuito.py
+"""
+Circuit breaker por licença e classe de endpoint (importação, healthcheck, oauth) para
+as chamadas ao Superlógica. O estado fica em CircuitBreakerState, compartilhado entre
+processos como o token bucket de integrador/ratelimit.py.
+
+    FECHADO      chamadas normais; SUPERLOGICA_CIRCUITO_FALHAS falhas seguidas abrem o circuito
+    ABERTO       falha na hora (CircuitoAberto) por SUPERLOGICA_CIRCUITO_ESPERA segundos
+    MEIO_ABERTO  uma única chamada de sonda passa: sucesso fecha, falha reabre
+
+Só conta como falha o que indica Superlógica fora do ar: erro de conexão, timeout e
+5xx (depois dos retries do http_client). 4xx e 429 não abrem o circuito.
+"""
+import logging
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from integrador.models import CircuitBreakerState
+
+logger = logging.getLogger(__name__)
+
+CLASSE_IMPORTACAO = "importacao"
+CLASSE_HEALTHCHECK = "healthcheck"
+CLASSE_OAUTH = "oauth"
+
+
+class CircuitoAberto(Exception):
+    def __init__(self, circuito: "Circuito", tentar_em: float):
+        self.circuito = circuito
+        self.tentar_em = max(tentar_em, 0.0)
+        super().__init__(
+            f"Superlógica indisponível ({circuito.classe}): circuito aberto, "
+            f"nova tentativa em {self.tentar_em:.0f}s."
+        )
+
+
+def eh_falha_upstream(erro: BaseException | None = None, status_code: int | None = None) -> bool:
+    if erro is not None:
+        if isinstance(erro, requests.HTTPError) and erro.response is not None:
+            return erro.response.status_code >= 500
+        return isinstance(erro, (requests.ConnectionError, requests.Timeout))
+    return status_code is not None and status_code >= 500
+
+
+class Circuito:
+    def __init__(self, license_id: int, classe: str):
+        self.classe = classe
+        self.key = f"licenca:{license_id}:{classe}"
+
+    def antes(self) -> bool:
+        """
+        Chame antes de cada requisição; levanta CircuitoAberto se ela não deve sair.
+        Devolve True se esta requisição é a sonda do meio aberto (espere o resultado
+        dela antes de disparar outras).
+        """
+        atual = CircuitBreakerState.objects.filter(key=self.key).values_list("state", "changed_at").first()
+        if not atual or atual[0] == "FECHADO":
+            return False
+        estado, desde = atual
+        espera = settings.SUPERLOGICA_CIRCUITO_ESPERA
+        restante = espera - (timezone.now() - desde).total_seconds()
+        if restante > 0:
+            raise CircuitoAberto(self, restante)
+        # fim da espera (ou sonda anterior abandonada): só um chamador vira a sonda
+        virou_sonda = CircuitBreakerState.objects.filter(key=self.key, state=estado, changed_at=desde).update(
+            state="MEIO_ABERTO", changed_at=timezone.now()
+        )
+        if not virou_sonda:
+            raise CircuitoAberto(self, espera)
+        logger.info("Circuito %s meio aberto: enviando sonda", self.key)
+        return True
+
+    def sucesso(self):
+        fechou = CircuitBreakerState.objects.filter(key=self.key).filter(~Q(state="FECHADO") | Q(failures__gt=0)).update(
+            state="FECHADO", failures=0, changed_at=timezone.now()
+        )
+        if fechou:
+            logger.info("Circuito %s fechado", self.key)
+
+    def falha(self, erro: BaseException | str):
+        agora = timezone.now()
+        with transaction.atomic():
+            c, _ = CircuitBreakerState.objects.select_for_update().get_or_create(key=self.key)
+            c.failures += 1
+            c.last_failure_at = agora
+            c.last_error = str(erro)[:255]
+            if c.state == "MEIO_ABERTO" or (c.state == "FECHADO" and c.failures >= settings.SUPERLOGICA_CIRCUITO_FALHAS):
+                c.state = "ABERTO"
+                c.changed_at = agora
+                c.open_count += 1
+                logger.warning("Circuito %s aberto após %s falhas: %s", self.key, c.failures, c.last_error)
+            c.save()
+
+    def registrar(self, resp: requests.Response | None = None, erro: BaseException | None = None):
+        """Classifica o resultado de uma chamada (resposta ou exceção) e atualiza o circuito."""
+        if erro is not None:
+            if eh_falha_upstream(erro):
+                self.falha(erro)
+            elif not isinstance(erro, CircuitoAberto):
+                self.sucesso()
+        elif eh_falha_upstream(status_code=resp.status_code):
+            self.falha(f"HTTP {resp.status_code}")
+        else:
+            self.sucesso()
+
+
+def estados_da_licenca(license_id: int) -> list[dict]:
+    """Circuitos conhecidos da licença, para o JSON de saúde."""
+    espera = settings.SUPERLOGICA_CIRCUITO_ESPERA
+    agora = timezone.now()
+    estados = []
+    for c in CircuitBreakerState.objects.filter(key__startswith=f"licenca:{license_id}:").order_by("key"):
+        estados.append({
+            "classe": c.key.rsplit(":", 1)[-1],
+            "estado": c.state,
+            "falhas": c.failures,
+            "desde": c.changed_at.isoformat(),
+            "ultimo_erro": c.last_error,
+            "tentar_em_s": round(max(espera - (agora - c.changed_at).total_seconds(), 0), 1) if c.state == "ABERTO" else 0,
+        })
+    return estados
@@ -0,0 +1,70 @@
+# integrador/http_client.py
+"""
+Sessão HTTP compartilhada para todas as chamadas ao Superlógica.
+
+Uma requests.Session por processo, com pool de conexões por host (keep-alive, sem
+novo handshake TCP+TLS a cada página), timeouts padrão de conexão/leitura e retry
+com backoff exponencial em 429/5xx, respeitando o header Retry-After.
+"""
+import os
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+STATUS_RETRY = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_sessao: requests.Session | None = None
+_pid: int | None = None
+
+
+def _criar_sessao() -> requests.Session:
+    retry = Retry(
+        total=settings.SUPERLOGICA_MAX_RETRIES,
+        backoff_factor=settings.SUPERLOGICA_RETRY_BACKOFF,
+        status_forcelist=STATUS_RETRY,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),  # POST (troca de code) não é idempotente
+        respect_retry_after_header=True,
+        raise_on_status=False,  # esgotadas as tentativas, devolve a última resposta
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.SUPERLOGICA_POOL_HOSTS,
+        pool_maxsize=settings.SUPERLOGICA_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def sessao() -> requests.Session:
+    """Sessão do processo atual (recriada após fork, p.ex. workers do gunicorn)."""
+    global _sessao, _pid
+    pid = os.getpid()
+    if _sessao is None or _pid != pid:
+        with _lock:
+            if _sessao is None or _pid != pid:
+                _sessao = _criar_sessao()
+                _pid = pid
+    return _sessao
+
+
+def timeout_padrao() -> tuple[float, float]:
+    return (settings.SUPERLOGICA_CONNECT_TIMEOUT, settings.SUPERLOGICA_READ_TIMEOUT)
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", timeout_padrao())
+    return sessao().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
@@ -0,0 +1,89 @@
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from integrador import models
+from integrador.models import EncryptedTextField, LicenseIntegration
+
+
+def _from_db_value_legado(self, value, expression, connection):
+    """Implementação original: um Fernet novo e um decrypt por linha carregada."""
+    if value is None or value == '':
+        return value
+    key = settings.INTEGRADOR_ENCRYPTION_KEY
+    if isinstance(key, str):
+        key = key.encode()
+    try:
+        return Fernet(key).decrypt(value.encode()).decode()
+    except InvalidToken:
+        return None
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mede o carregamento de LicenseIntegration com e sem o cache de decifragem (dados descartados ao final)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=10_000)
+        parser.add_argument("--repeticoes", type=int, default=3)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._medir(opts["linhas"], opts["repeticoes"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _medir(self, n, repeticoes):
+        LicenseIntegration.objects.bulk_create(
+            [LicenseIntegration(access_token=f"token-{i:06d}", is_active=False) for i in range(n)],
+            batch_size=1000,
+        )
+        qs = LicenseIntegration.objects.filter(license__isnull=True, access_token__isnull=False)
+
+        def medir(limpar_cache=False):
+            tempos = []
+            for _ in range(repeticoes):
+                if limpar_cache:
+                    models._decifrar.cache_clear()
+                t = time.perf_counter()
+                linhas = list(qs.all())
+                tempos.append(time.perf_counter() - t)
+            return min(tempos) * 1000, linhas
+
+        atual = EncryptedTextField.from_db_value
+        EncryptedTextField.from_db_value = _from_db_value_legado
+        try:
+            legado, linhas_legado = medir()
+        finally:
+            EncryptedTextField.from_db_value = atual
+        frio, _ = medir(limpar_cache=True)
+        quente, linhas = medir()
+
+        if [i.access_token for i in linhas] != [i.access_token for i in linhas_legado]:
+            raise CommandError("Tokens decifrados divergem da implementação original.")
+
+        # preparar para salvar sem alterar o token: antes cifrava de novo, agora reaproveita o cifrado
+        campo = LicenseIntegration._meta.get_field("access_token")
+        t = time.perf_counter()
+        for i in linhas:
+            campo.get_prep_value(str(i.access_token))
+        salvar_legado = (time.perf_counter() - t) * 1000
+        t = time.perf_counter()
+        cifrados = [campo.get_prep_value(i.access_token) for i in linhas]
+        salvar = (time.perf_counter() - t) * 1000
+        if cifrados != [i.access_token.cifrado for i in linhas]:
+            raise CommandError("Token inalterado foi cifrado de novo.")
+
+        self.stdout.write(f"{len(linhas)} integrações carregadas, tokens idênticos aos da implementação original.")
+        self.stdout.write(f"implementação original: {legado:8.1f} ms")
+        self.stdout.write(f"cache frio:             {frio:8.1f} ms ({legado / frio:.1f}x)")
+        self.stdout.write(f"cache quente:           {quente:8.1f} ms ({legado / quente:.1f}x)")
+        self.stdout.write(f"salvar sem mudança: {salvar_legado:.1f} ms -> {salvar:.1f} ms (cifrado preservado)")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from integrador.services import rotacionar_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Recifra os access_token com a INTEGRADOR_ENCRYPTION_KEY atual. Antes, mova a chave "
+        "anterior para INTEGRADOR_OLD_ENCRYPTION_KEYS; depois de rodar, ela pode ser removida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500, help="Linhas lidas/gravadas por vez.")
+        parser.add_argument("--dry-run", action="store_true", help="Só conta, sem gravar.")
+
+    def handle(self, *args, **opts):
+        def progresso(r):
+            self.stderr.write(f"{r['lidos']}/{r['total']} lidos, {r['recifrados']} recifrados")
+
+        r = rotacionar_tokens(lote=opts["lote"], aplicar=not opts["dry_run"], progresso=progresso)
+
+        if r["ilegiveis"]:
+            self.stderr.write(self.style.WARNING(
+                f"{len(r['ilegiveis'])} tokens não decifram com nenhuma chave (ids: {r['ilegiveis'][:20]})."
+            ))
+        verbo = "seriam recifrados" if opts["dry_run"] else "recifrados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{r['total']} tokens: {r['recifrados']} {verbo}, {r['ja_atuais']} já na chave atual."
+        ))
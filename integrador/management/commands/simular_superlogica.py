@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from integrador.simulador import Simulador
+
+
+class Command(BaseCommand):
+    help = "Sobe um Superlógica simulado (contratos, proprietários, OAuth e healthcheck) para testes de carga."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--porta", type=int, default=8765)
+        parser.add_argument("--contratos", type=int, default=1000)
+        parser.add_argument("--proprietarios", type=int, default=300)
+        parser.add_argument("--latencia-ms", type=float, default=0)
+        parser.add_argument("--jitter-ms", type=float, default=0)
+        parser.add_argument("--taxa-erro", type=float, default=0, help="Fração das requisições que recebem 503.")
+        parser.add_argument("--taxa-429", type=float, default=0, help="Fração das requisições que recebem 429.")
+        parser.add_argument("--gravacoes", help="Diretório com contratos.json/proprietarios.json gravados da API.")
+        parser.add_argument("--id-inicial", type=int, default=1)
+        parser.add_argument("--sem-etag", action="store_true", help="Simula API sem ETag/304.")
+
+    def handle(self, *args, **opts):
+        sim = Simulador(
+            contratos=opts["contratos"],
+            proprietarios=opts["proprietarios"],
+            latencia_ms=opts["latencia_ms"],
+            jitter_ms=opts["jitter_ms"],
+            taxa_erro=opts["taxa_erro"],
+            taxa_429=opts["taxa_429"],
+            gravacoes=opts["gravacoes"],
+            id_inicial=opts["id_inicial"],
+            etag=not opts["sem_etag"],
+        )
+        base = sim.iniciar(opts["host"], opts["porta"])
+        self.stdout.write(f"Superlógica simulado em {base}")
+        self.stdout.write(f"  SUPERLOGICA_API_BASE={base}")
+        self.stdout.write(f"  SUPERLOGICA_IMOBILIARIA_API={base}/imobiliaria/api")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sim.parar()
+            self.stdout.write(f"{sim.requisicoes} requisições atendidas ({sim.erros} com erro simulado).")
@@ -0,0 +1,27 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from integrador.async_client import CONCORRENCIA_PADRAO, varrer_conexoes
+
+
+class Command(BaseCommand):
+    help = "Verifica a conexão de todas as licenças integradas e grava o status (para agendar no cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA_PADRAO,
+                            help="Máximo de verificações simultâneas.")
+        parser.add_argument("--licenca", action="append", dest="licencas", help="Restringe a esta licença (repetível).")
+        parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+
+    def handle(self, *args, **opts):
+        resumo = asyncio.run(varrer_conexoes(opts["concorrencia"], opts["licencas"]))
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(resumo, ensure_ascii=False, indent=2))
+            return
+        for r in resumo["licencas"]:
+            if not r["ok"]:
+                self.stderr.write(self.style.WARNING(f"{r['licenca']}: falhou ({r['erro']})"))
+        self.stdout.write(f"{resumo['total']} licenças verificadas: {resumo['ok']} ok, {resumo['falhas']} com falha.")
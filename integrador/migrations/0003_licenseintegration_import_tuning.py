@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrador', '0002_remove_licenseintegration_license_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='licenseintegration',
+            name='import_concurrency',
+            field=models.PositiveSmallIntegerField(default=4),
+        ),
+        migrations.AddField(
+            model_name='licenseintegration',
+            name='import_page_size',
+            field=models.PositiveSmallIntegerField(default=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrador', '0003_licenseintegration_import_tuning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='licenseintegration',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
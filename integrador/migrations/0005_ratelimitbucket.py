@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrador', '0004_licenseintegration_last_synced_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('tokens', models.FloatField()),
+                ('capacity', models.FloatField()),
+                ('rate', models.FloatField()),
+                ('base_rate', models.FloatField()),
+                ('updated_at', models.DateTimeField()),
+                ('total_wait_seconds', models.FloatField(default=0)),
+                ('wait_count', models.PositiveIntegerField(default=0)),
+                ('throttle_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrador', '0005_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='licenseintegration',
+            name='last_check_error',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='licenseintegration',
+            name='last_check_ok',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+    ]
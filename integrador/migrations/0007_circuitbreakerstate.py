@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrador', '0006_licenseintegration_last_check'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CircuitBreakerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('state', models.CharField(choices=[('FECHADO', 'Fechado'), ('ABERTO', 'Aberto'), ('MEIO_ABERTO', 'Meio aberto')], default='FECHADO', max_length=20)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, default='', max_length=255)),
+                ('open_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_onboardingstate'),
+        ('integrador', '0007_circuitbreakerstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=50)),
+                ('page_size', models.PositiveSmallIntegerField()),
+                ('page', models.PositiveIntegerField()),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=100)),
+                ('body_hash', models.CharField(max_length=64)),
+                ('items', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('license', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clientes.clientelicense')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('license', 'endpoint', 'page_size', 'page'), name='page_cache_por_pagina')],
+            },
+        ),
+    ]
@@ -1,42 +1,165 @@
+import logging
+from functools import lru_cache
+
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+logger = logging.getLogger(__name__)
 
 # Create your models here.
-def _get_fernet():
-    key = settings.INTEGRADOR_ENCRYPTION_KEY
-    if isinstance(key, str):
-        key = key.encode()
-    return Fernet(key)
+CACHE_DECIFRADOS = 16_384  # máximo de tokens decifrados mantidos em memória por processo
+
+
+def _chaves() -> tuple[bytes, ...]:
+    """
+    Chave atual (cifra e decifra) seguida das anteriores de INTEGRADOR_OLD_ENCRYPTION_KEYS
+    (só decifram). INTEGRADOR_ENCRYPTION_KEY também aceita várias chaves separadas por vírgula.
+    """
+    chaves = []
+    for key in [settings.INTEGRADOR_ENCRYPTION_KEY, *getattr(settings, "INTEGRADOR_OLD_ENCRYPTION_KEYS", [])]:
+        if isinstance(key, bytes):
+            key = key.decode()
+        chaves += [k.strip().encode() for k in key.split(",") if k.strip()]
+    return tuple(dict.fromkeys(chaves))
+
+
+@lru_cache(maxsize=8)
+def _fernet_para(chaves: tuple[bytes, ...]) -> MultiFernet:
+    return MultiFernet([Fernet(k) for k in chaves])
+
+
+def _get_fernet() -> MultiFernet:
+    """Instância única por processo para o conjunto de chaves atual."""
+    return _fernet_para(_chaves())
+
+
+class TextoDecifrado(str):
+    """Texto vindo do banco, que lembra o próprio cifrado para não cifrar de novo ao salvar."""
+    cifrado: str
+
+
+@lru_cache(maxsize=CACHE_DECIFRADOS)
+def _decifrar(chaves: tuple[bytes, ...], cifrado: str) -> TextoDecifrado | None:
+    try:
+        texto = TextoDecifrado(_fernet_para(chaves).decrypt(cifrado.encode()).decode())
+    except InvalidToken:
+        # nenhuma chave conhecida decifra: inclua a chave antiga em INTEGRADOR_OLD_ENCRYPTION_KEYS
+        logger.warning("Token cifrado com chave desconhecida; configure INTEGRADOR_OLD_ENCRYPTION_KEYS.")
+        return None
+    texto.cifrado = cifrado
+    return texto
+
+
+def recifrar(texto: TextoDecifrado) -> TextoDecifrado | None:
+    """
+    Mesmo texto cifrado com a chave atual, ou None se já estiver nela. Salvar o
+    retorno grava o novo cifrado (get_prep_value usa .cifrado).
+    """
+    chaves = _chaves()
+    try:
+        Fernet(chaves[0]).extract_timestamp(texto.cifrado.encode())  # só confere a assinatura
+        return None
+    except InvalidToken:
+        pass
+    novo = TextoDecifrado(texto)
+    novo.cifrado = _fernet_para(chaves).rotate(texto.cifrado.encode()).decode()
+    return novo
+
 
 class EncryptedTextField(models.TextField):
     def from_db_value(self, value, expression, connection):
         if value is None or value == '':
             return value
-        f = _get_fernet()
-        try:
-            return f.decrypt(value.encode()).decode()
-        except InvalidToken:
-            # Se a chave mudou e você precisa migrar, capture aqui.
-            return None
+        return _decifrar(_chaves(), value)
 
     def get_prep_value(self, value):
         if value is None or value == '':
             return value
-        f = _get_fernet()
-        return f.encrypt(str(value).encode()).decode()
+        if isinstance(value, TextoDecifrado):
+            return value.cifrado  # valor não mudou desde a leitura
+        return _get_fernet().encrypt(str(value).encode()).decode()
 
 class LicenseIntegration(models.Model):
     license = models.OneToOneField('clientes.ClienteLicense', null=True, blank=True, on_delete=models.CASCADE, related_name='integracao')
     access_token = EncryptedTextField(blank=True, null=True)
     connected_at = models.DateTimeField(blank=True, null=True)
     last_verified_at = models.DateTimeField(blank=True, null=True)
+    # resultado da última verificação (lido pelo perfil em vez de checar ao vivo)
+    last_check_ok = models.BooleanField(blank=True, null=True)
+    last_check_error = models.CharField(max_length=255, blank=True, default='')
+    last_synced_at = models.DateTimeField(blank=True, null=True)  # último import de contratos sem falhas
     is_active = models.BooleanField(default=True)
+    # ajuste fino da paginação dos imports (requisições simultâneas / itensPorPagina)
+    import_concurrency = models.PositiveSmallIntegerField(default=4)
+    import_page_size = models.PositiveSmallIntegerField(default=50)
 
     class Meta:
         verbose_name = "Integração de Licença"
         verbose_name_plural = "Integrações de Licenças"
 
     def __str__(self):
-        return f"{self.license} (ativo={self.is_active})"
\ No newline at end of file
+        return f"{self.license} (ativo={self.is_active})"
+
+class RateLimitBucket(models.Model):
+    """Estado de um token bucket compartilhado entre processos (ver integrador/ratelimit.py)."""
+    key = models.CharField(max_length=100, unique=True)  # "global" ou "licenca:<id>"
+    tokens = models.FloatField()
+    capacity = models.FloatField()
+    rate = models.FloatField()        # tokens/s atual (reduzida após 429)
+    base_rate = models.FloatField()   # tokens/s configurada
+    updated_at = models.DateTimeField()
+    total_wait_seconds = models.FloatField(default=0)
+    wait_count = models.PositiveIntegerField(default=0)
+    throttle_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} ({self.rate:.2f}/{self.base_rate:.2f} req/s)"
+
+
+ESTADOS_CIRCUITO = (
+    ('FECHADO', 'Fechado'),
+    ('ABERTO', 'Aberto'),
+    ('MEIO_ABERTO', 'Meio aberto'),
+)
+
+
+class CircuitBreakerState(models.Model):
+    """Estado de um circuit breaker por licença e classe de endpoint (ver integrador/circuito.py)."""
+    key = models.CharField(max_length=100, unique=True)  # "licenca:<id>:<classe>"
+    state = models.CharField(max_length=20, choices=ESTADOS_CIRCUITO, default='FECHADO')
+    failures = models.PositiveIntegerField(default=0)  # falhas consecutivas
+    changed_at = models.DateTimeField(default=timezone.now)  # última troca de estado
+    last_failure_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.CharField(max_length=255, blank=True, default='')
+    open_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} ({self.state})"
+
+
+
+class PageCacheEntry(models.Model):
+    """
+    ETag/hash da última versão gravada de uma página de import (ver
+    integrador/cache_respostas.py). Fica no mesmo banco que os dados importados e é
+    gravada na mesma transação que a página.
+    """
+    license = models.ForeignKey('clientes.ClienteLicense', on_delete=models.CASCADE, related_name='+')
+    endpoint = models.CharField(max_length=50)
+    page_size = models.PositiveSmallIntegerField()
+    page = models.PositiveIntegerField()
+    etag = models.CharField(max_length=255, blank=True, default='')
+    last_modified = models.CharField(max_length=100, blank=True, default='')
+    body_hash = models.CharField(max_length=64)
+    items = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['license', 'endpoint', 'page_size', 'page'], name='page_cache_por_pagina'),
+        ]
+
+    def __str__(self):
+        return f"{self.license_id}/{self.endpoint}/{self.page_size}-{self.page}"
@@ -0,0 +1,162 @@
+# integrador/ratelimit.py
+"""
+Token bucket por licença e global para a API do Superlógica, compartilhado entre
+processos (workers do gunicorn, importador_worker, importar_licencas) via banco:
+cada bucket é uma linha de RateLimitBucket atualizada com select_for_update.
+
+Quando chegam 429, a taxa do bucket cai pela metade (até MIN_FATOR da taxa base) e
+volta a subir aos poucos a cada resposta sem throttle (AIMD). O tempo de espera na
+fila fica acumulado em total_wait_seconds/wait_count de cada bucket.
+
+Chame só da thread principal e fora de transações longas: cada chamada abre e fecha
+a sua própria transação curta.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from integrador.models import RateLimitBucket
+
+MIN_FATOR = 0.1        # taxa mínima = 10% da base
+RECUPERACAO = 0.05     # cada resposta ok devolve 5% da taxa base
+CHAVE_GLOBAL = "global"
+
+
+class TokenBucket:
+    def __init__(self, key: str, rate: float, capacity: float):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+
+    def _tentar(self) -> float:
+        """Consome 1 token se houver; senão devolve quantos segundos esperar."""
+        agora = timezone.now()
+        with transaction.atomic():
+            b, _ = RateLimitBucket.objects.select_for_update().get_or_create(
+                key=self.key,
+                defaults={
+                    "tokens": self.capacity, "capacity": self.capacity,
+                    "rate": self.rate, "base_rate": self.rate, "updated_at": agora,
+                },
+            )
+            if b.base_rate != self.rate or b.capacity != self.capacity:
+                # configuração mudou: respeita a nova base, mantendo a redução proporcional
+                b.rate = self.rate * min(b.rate / b.base_rate, 1.0) if b.base_rate else self.rate
+                b.base_rate, b.capacity = self.rate, self.capacity
+            decorrido = max((agora - b.updated_at).total_seconds(), 0.0)
+            b.tokens = min(b.capacity, b.tokens + decorrido * b.rate)
+            b.updated_at = agora
+            espera = 0.0
+            if b.tokens >= 1:
+                b.tokens -= 1
+            else:
+                espera = (1 - b.tokens) / b.rate
+            b.save(update_fields=["tokens", "rate", "base_rate", "capacity", "updated_at"])
+        return espera
+
+    def acquire(self) -> float:
+        """Bloqueia até conseguir um token; devolve o tempo total esperado (s)."""
+        esperado = 0.0
+        while True:
+            espera = self._tentar()
+            if not espera:
+                break
+            time.sleep(espera)
+            esperado += espera
+        if esperado:
+            RateLimitBucket.objects.filter(key=self.key).update(
+                total_wait_seconds=F("total_wait_seconds") + esperado,
+                wait_count=F("wait_count") + 1,
+            )
+        return esperado
+
+    async def aacquire(self) -> float:
+        """acquire() para código async: espera com asyncio.sleep, sem prender thread."""
+        esperado = 0.0
+        tentar = sync_to_async(self._tentar)
+        while True:
+            espera = await tentar()
+            if not espera:
+                break
+            await asyncio.sleep(espera)
+            esperado += espera
+        if esperado:
+            await RateLimitBucket.objects.filter(key=self.key).aupdate(
+                total_wait_seconds=F("total_wait_seconds") + esperado,
+                wait_count=F("wait_count") + 1,
+            )
+        return esperado
+
+    def throttled(self, vezes: int = 1):
+        with transaction.atomic():
+            b = RateLimitBucket.objects.select_for_update().filter(key=self.key).first()
+            if b is None:
+                return
+            b.rate = max(b.base_rate * MIN_FATOR, b.rate / (2 ** vezes))
+            b.tokens = 0
+            b.throttle_count += vezes
+            b.save(update_fields=["rate", "tokens", "throttle_count"])
+
+    def ok(self):
+        RateLimitBucket.objects.filter(key=self.key, rate__lt=F("base_rate")).update(
+            rate=Least(F("base_rate"), F("rate") + F("base_rate") * RECUPERACAO)
+        )
+
+
+class OrcamentoLicenca:
+    """
+    Buckets global + da licença, com o tempo de espera acumulado nesta execução.
+    `max_rps` (ex.: --rps do importar_licencas) acrescenta um bucket da licença sem
+    rajada, que espaça as requisições em no máximo max_rps por segundo.
+    """
+
+    def __init__(self, license_id: int, max_rps: float | None = None):
+        burst = settings.SUPERLOGICA_RATE_BURST
+        self.buckets = [
+            TokenBucket(key, rate, burst)
+            for key, rate in (
+                (CHAVE_GLOBAL, settings.SUPERLOGICA_RATE_GLOBAL),
+                (f"licenca:{license_id}", settings.SUPERLOGICA_RATE_LICENCA),
+            )
+            if rate > 0
+        ]
+        if max_rps:
+            self.buckets.append(TokenBucket(f"licenca:{license_id}:max_rps", max_rps, 1))
+        self.espera_total = 0.0
+        self.respostas_429 = 0
+
+    def aguardar(self) -> float:
+        espera = sum(b.acquire() for b in self.buckets)
+        self.espera_total += espera
+        return espera
+
+    async def aaguardar(self) -> float:
+        espera = 0.0
+        for b in self.buckets:
+            espera += await b.aacquire()
+        self.espera_total += espera
+        return espera
+
+    def registrar(self, respostas_429: int):
+        """Informa quantos 429 uma requisição recebeu (inclusive os absorvidos pelo retry)."""
+        if respostas_429:
+            self.respostas_429 += respostas_429
+            for b in self.buckets:
+                b.throttled(respostas_429)
+        else:
+            for b in self.buckets:
+                b.ok()
+
+
+def contar_429(resp) -> int:
+    """Conta os 429 de uma resposta, incluindo as tentativas refeitas pelo urllib3."""
+    retries = getattr(getattr(resp, "raw", None), "retries", None)
+    historico = getattr(retries, "history", None) or ()
+    n = sum(1 for h in historico if getattr(h, "status", None) == 429)
+    return n + (1 if resp.status_code == 429 else 0)
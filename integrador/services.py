@@ -3,12 +3,14 @@ import base64
 import logging
 from urllib.parse import urlencode
 
-import requests
 from django.conf import settings
 from django.urls import reverse
 from django.utils import timezone
 
-from integrador.models import LicenseIntegration
+from integrador import http_client
+from integrador.circuito import CLASSE_HEALTHCHECK, CLASSE_OAUTH, Circuito, CircuitoAberto
+from integrador.models import LicenseIntegration, recifrar
+from integrador.ratelimit import OrcamentoLicenca, contar_429
 from clientes.models import ClienteLicense  # import absoluto
 
 logger = logging.getLogger(__name__)
@@ -46,9 +48,16 @@ class SuperlogicaClient:
             "Accept": "application/json",
         }
         data = {"code": code, "grant_type": "authorization_code"}
-        resp = requests.post(token_url, headers=headers, data=data, timeout=20)
-        if resp.status_code == 405 or (resp.status_code >= 400 and "GET" in (resp.text or "").upper()):
-            resp = requests.get(token_url, headers=headers, params=data, timeout=20)
+        circuito = Circuito(self.lic.id, CLASSE_OAUTH)
+        circuito.antes()
+        try:
+            resp = http_client.post(token_url, headers=headers, data=data)
+            if resp.status_code == 405 or (resp.status_code >= 400 and "GET" in (resp.text or "").upper()):
+                resp = http_client.get(token_url, headers=headers, params=data)
+        except Exception as e:
+            circuito.registrar(erro=e)
+            raise
+        circuito.registrar(resp)
         resp.raise_for_status()
         payload = resp.json()
         access_token = payload.get("access_token")
@@ -69,22 +78,90 @@ class SuperlogicaClient:
     def auth_headers(access_token: str) -> dict:
         return {"Authorization": f"Bearer {access_token}", "Accept": "application/json"}
 
+    @staticmethod
+    def interpretar_healthcheck(resp) -> tuple[bool, dict]:
+        ok = 200 <= resp.status_code < 300
+        payload = (
+            resp.json()
+            if (resp.headers.get("Content-Type", "") or "").startswith("application/json")
+            else {"status_code": resp.status_code}
+        )
+        return ok, payload
+
+    @staticmethod
+    def registrar_verificacao(obj: LicenseIntegration, ok: bool, payload: dict | None) -> list[str]:
+        """Preenche o status da verificação em `obj` (sem salvar); devolve os campos alterados."""
+        erro = ""
+        if not ok:
+            erro = str((payload or {}).get("error") or (payload or {}).get("msg") or payload or "falha")
+        obj.last_verified_at = timezone.now()
+        obj.last_check_ok = ok
+        obj.last_check_error = erro[:255]
+        return ["last_verified_at", "last_check_ok", "last_check_error"]
+
+    def healthcheck_url(self) -> str:
+        return f"{self.api_base}{settings.SUPERLOGICA_HEALTHCHECK_PATH}"
+
     def verificar_conexao(self) -> tuple[bool, dict | None]:
         obj = LicenseIntegration.objects.filter(license=self.lic, is_active=True).first()
         if not obj or not obj.access_token:
             return False, {"error": "Licença não conectada ou sem token salvo."}
-        url = f"{self.api_base}{settings.SUPERLOGICA_HEALTHCHECK_PATH}"
+        circuito = Circuito(self.lic.id, CLASSE_HEALTHCHECK)
         try:
-            resp = requests.get(url, headers=self.auth_headers(obj.access_token), timeout=20)
-            ok = 200 <= resp.status_code < 300
-            payload = (
-                resp.json()
-                if (resp.headers.get("Content-Type", "") or "").startswith("application/json")
-                else {"status_code": resp.status_code}
-            )
-            obj.last_verified_at = timezone.now()
-            obj.save(update_fields=["last_verified_at"])
+            circuito.antes()
+            orcamento = OrcamentoLicenca(self.lic.id)
+            orcamento.aguardar()
+            resp = http_client.get(self.healthcheck_url(), headers=self.auth_headers(obj.access_token))
+            circuito.registrar(resp)
+            orcamento.registrar(contar_429(resp))
+            ok, payload = self.interpretar_healthcheck(resp)
+            obj.save(update_fields=self.registrar_verificacao(obj, ok, payload))
             return ok, payload
+        except CircuitoAberto as e:
+            return False, {"error": str(e), "circuito": "ABERTO"}
         except Exception as e:
+            circuito.registrar(erro=e)
             logger.exception("Falha ao verificar conexão com %s", self.license_name)
             return False, {"error": str(e)}
+
+
+def rotacionar_tokens(lote: int = 500, aplicar: bool = True, progresso=None) -> dict:
+    """
+    Recifra com a chave atual todos os access_token cifrados com chaves antigas, em
+    streaming: lê com iterator(chunk_size=lote) e grava cada lote com bulk_update,
+    sem carregar a tabela inteira. Tokens que nenhuma chave decifra são só contados.
+    `progresso(resumo)` é chamado a cada lote.
+    """
+    qs = (
+        LicenseIntegration.objects.filter(access_token__isnull=False)
+        .exclude(access_token="")
+        .only("pk", "access_token")
+        .order_by("pk")
+    )
+    resumo = {"total": qs.count(), "lidos": 0, "recifrados": 0, "ja_atuais": 0, "ilegiveis": [], "aplicado": aplicar}
+
+    def gravar(pendentes):
+        if pendentes and aplicar:
+            LicenseIntegration.objects.bulk_update(pendentes, ["access_token"], batch_size=lote)
+        resumo["recifrados"] += len(pendentes)
+        if progresso:
+            progresso(resumo)
+
+    pendentes = []
+    for obj in qs.iterator(chunk_size=lote):
+        resumo["lidos"] += 1
+        if obj.access_token is None:
+            resumo["ilegiveis"].append(obj.pk)  # não sobrescreve: a chave pode aparecer depois
+            continue
+        novo = recifrar(obj.access_token)
+        if novo is None:
+            resumo["ja_atuais"] += 1
+            continue
+        obj.access_token = novo
+        pendentes.append(obj)
+        if len(pendentes) >= lote:
+            gravar(pendentes)
+            pendentes = []
+    gravar(pendentes)
+    return resumo
+
@@ -0,0 +1,243 @@
+# integrador/simulador.py
+"""
+Servidor local que imita os endpoints do Superlógica usados pelo projeto, para testes
+de carga do import sem tocar na API real:
+
+    GET  <qualquer prefixo>/contratos?pagina=&itensPorPagina=      (importador_erp)
+    GET  <qualquer prefixo>/proprietarios?pagina=&itensPorPagina=  (importador_erp)
+    POST /oauth/access_token/                                       (SuperlogicaClient)
+    GET  caminho de SUPERLOGICA_HEALTHCHECK_PATH                    (verificar_conexao)
+
+Os dados vêm de gravações (JSON salvos da API: lista de itens ou {"data": [...]}) ou
+são sintéticos e determinísticos, gerados página a página (100k contratos não ficam
+em memória). Latência, taxa de erro 5xx/429 e quantidade de itens são configuráveis.
+As páginas levam ETag e respondem 304 a If-None-Match (desligável com etag=False).
+
+Para apontar o projeto para o simulador:
+    SUPERLOGICA_API_BASE=http://127.0.0.1:8765
+    SUPERLOGICA_IMOBILIARIA_API=http://127.0.0.1:8765/imobiliaria/api
+"""
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SIMULADO = "token-simulado"
+TOKEN_INVALIDO = "invalido"  # access_token que o simulador recusa (401)
+
+
+def contrato_sintetico(n: int, id_inicial: int = 1) -> dict:
+    """Contrato nº `n` (a partir de 0) no formato de /contratos; o mesmo `n` gera sempre o mesmo item."""
+    rnd = random.Random(n)
+    ident = id_inicial + n
+    dono = id_inicial + n // 3  # 3 contratos por proprietário, para exercitar o cache de clientes
+    inicio = f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/{rnd.randint(2015, 2024)}"
+    fim = f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/{rnd.randint(2025, 2030)} 00:00:00"
+    return {
+        "id_contrato_con": str(ident),
+        "st_imovel_imo": f"Imóvel {ident}",
+        "st_endereco_imo": f"Rua {rnd.randint(1, 999)}, {rnd.randint(1, 3000)}",
+        "dt_inicio_con": inicio,
+        "dt_fim_con": fim,
+        "dt_ultimoreajuste_con": inicio,
+        "vl_aluguel_con": f"{rnd.randint(800, 15000)}.{rnd.randint(0, 99):02d}",
+        "tx_adm_con": str(rnd.choice([6, 8, 10])),
+        "tx_locacao_con": "100",
+        "vl_venda_imo": f"{rnd.randint(150, 2500) * 1000}.00",
+        "fl_garantia_con": rnd.choice(["0", "1", "3"]),
+        "st_tipo_imo": str(rnd.randint(1, 31)),
+        "id_tipo_con": rnd.choice(["1", "2", "3"]),
+        "fl_status_con": rnd.choice(["0", "1", "2"]),
+        "fl_ativo_con": rnd.choice(["0", "1", "1", "1"]),
+        "fl_renovacaoautomatica_con": rnd.choice(["0", "1"]),
+        "proprietarios_beneficiarios": [{
+            "id_pessoa_pes": str(dono),
+            "st_nome_pes": f"Proprietário {dono}",
+            "st_cnpj_pes": f"{dono % 10**11:011d}",
+        }],
+        "inquilinos": [{
+            "id_pessoa_pes": str(id_inicial + 10**8 + n),
+            "st_nomeinquilino": f"Inquilino {n}",
+            "st_cnpj_pes": f"{(n * 7919) % 10**11:011d}",
+        }],
+    }
+
+
+def proprietario_sintetico(n: int, id_inicial: int = 1) -> dict:
+    """Item nº `n` de /proprietarios."""
+    ident = id_inicial + n
+    return {
+        "id_pessoa_pes": str(ident),
+        "st_nome_pes": f"Proprietário {ident}",
+        "st_cnpj_pes": f"{ident % 10**11:011d}",
+        "st_rg_pes": str(ident % 10**9),
+        "st_sexo_pes": "MF"[n % 2],
+        "st_email_pes": f"proprietario{ident}@exemplo.com.br",
+        "st_celular_pes": f"119{ident % 10**8:08d}",
+    }
+
+
+class Colecao:
+    """Itens de um endpoint: de uma gravação ou gerados sob demanda."""
+
+    def __init__(self, total: int = 0, gerador=None, itens: list[dict] | None = None):
+        self.itens = itens
+        self.total = len(itens) if itens is not None else total
+        self.gerador = gerador
+
+    @classmethod
+    def de_arquivo(cls, caminho: Path) -> "Colecao":
+        dados = json.loads(Path(caminho).read_text(encoding="utf-8"))
+        return cls(itens=dados["data"] if isinstance(dados, dict) else dados)
+
+    def pagina(self, pagina: int, itens_por_pagina: int) -> list[dict]:
+        inicio = (max(pagina, 1) - 1) * itens_por_pagina
+        fim = min(inicio + itens_por_pagina, self.total)
+        if self.itens is not None:
+            return self.itens[inicio:fim]
+        return [self.gerador(n) for n in range(inicio, fim)]
+
+
+class Simulador:
+    """
+    Configuração e estado do servidor. Os atributos podem ser alterados com o servidor
+    rodando (o benchmark troca `contratos` entre uma rodada e outra).
+    """
+
+    def __init__(
+        self,
+        contratos: int = 1000,
+        proprietarios: int = 300,
+        latencia_ms: float = 0,
+        jitter_ms: float = 0,
+        taxa_erro: float = 0,
+        taxa_429: float = 0,
+        gravacoes: str | Path | None = None,
+        id_inicial: int = 1,
+        semente: int = 42,
+        etag: bool = True,
+    ):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.id_inicial = id_inicial
+        self.etag = etag  # False simula uma API sem requisição condicional
+        self.colecoes = {
+            "contratos": Colecao(contratos, lambda n: contrato_sintetico(n, self.id_inicial)),
+            "proprietarios": Colecao(proprietarios, lambda n: proprietario_sintetico(n, self.id_inicial)),
+        }
+        if gravacoes:
+            for arquivo in Path(gravacoes).glob("*.json"):
+                if arquivo.stem in self.colecoes:
+                    self.colecoes[arquivo.stem] = Colecao.de_arquivo(arquivo)
+        self._rnd = random.Random(semente)
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self.erros = 0
+        self._servidor: ThreadingHTTPServer | None = None
+
+    @property
+    def contratos(self) -> int:
+        return self.colecoes["contratos"].total
+
+    @contratos.setter
+    def contratos(self, total: int):
+        self.colecoes["contratos"].total = total
+
+    # ---- decisões por requisição ----
+    def _sortear(self) -> tuple[float, int | None]:
+        with self._lock:
+            self.requisicoes += 1
+            espera = max(self.latencia_ms + self._rnd.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+            r = self._rnd.random()
+            status = 503 if r < self.taxa_erro else 429 if r < self.taxa_erro + self.taxa_429 else None
+            if status:
+                self.erros += 1
+        return espera, status
+
+    def responder(self, metodo: str, url: str, headers) -> tuple[int, dict, dict | bytes | None]:
+        """(status, headers extras, corpo JSON — já serializado ou None sem corpo) para uma requisição."""
+        espera, erro = self._sortear()
+        if espera:
+            time.sleep(espera)
+        if erro == 429:
+            return 429, {"Retry-After": "1"}, {"error": "rate limit"}
+        if erro:
+            return erro, {}, {"error": "indisponível"}
+
+        partes = urlsplit(url)
+        caminho = partes.path.rstrip("/")
+        params = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+
+        if caminho.endswith("/oauth/access_token"):
+            return 200, {}, {"access_token": TOKEN_SIMULADO, "token_type": "Bearer"}
+
+        if caminho == urlsplit(settings.SUPERLOGICA_HEALTHCHECK_PATH).path.rstrip("/"):
+            if TOKEN_INVALIDO in (headers.get("Authorization") or ""):
+                return 401, {}, {"msg": "token inválido"}
+            return 200, {}, {"data": []}
+
+        endpoint = caminho.rsplit("/", 1)[-1]
+        if metodo == "GET" and endpoint in self.colecoes:
+            if headers.get("access_token") in (None, "", TOKEN_INVALIDO):
+                return 401, {}, {"msg": "access_token inválido"}
+            pagina = int(params.get("pagina") or 1)
+            itens_por_pagina = int(params.get("itensPorPagina") or 50)
+            corpo = json.dumps({"data": self.colecoes[endpoint].pagina(pagina, itens_por_pagina)}, ensure_ascii=False).encode()
+            if not self.etag:
+                return 200, {}, corpo
+            etag = f'"{hashlib.sha256(corpo).hexdigest()[:32]}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, None
+            return 200, {"ETag": etag}, corpo
+
+        return 404, {}, {"error": f"rota não simulada: {caminho}"}
+
+    # ---- servidor ----
+    def iniciar(self, host: str = "127.0.0.1", porta: int = 0) -> str:
+        """Sobe o servidor numa thread e devolve a URL base (porta 0 = qualquer porta livre)."""
+        simulador = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como a API real
+
+            def _tratar(self):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                if tamanho:
+                    self.rfile.read(tamanho)
+                status, extras, corpo = simulador.responder(self.command, self.path, self.headers)
+                dados = corpo if isinstance(corpo, bytes) else json.dumps(corpo, ensure_ascii=False).encode() if corpo is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                for k, v in extras.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(dados)
+
+            do_GET = do_POST = _tratar
+
+            def log_message(self, formato, *args):
+                logger.debug(formato, *args)
+
+        self._servidor = ThreadingHTTPServer((host, porta), Handler)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def parar(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
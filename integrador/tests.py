@@ -1,3 +1,343 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from cryptography.fernet import Fernet
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clientes.models import ClienteLicense
+from . import http_client
+from .async_client import AsyncSuperlogicaClient, varrer_conexoes
+from .circuito import CLASSE_IMPORTACAO, Circuito, CircuitoAberto
+from .models import CircuitBreakerState, LicenseIntegration, TextoDecifrado
+
+CHAVE_A = Fernet.generate_key().decode()
+CHAVE_B = Fernet.generate_key().decode()
+
+
+def cifrado_no_banco(pk: int) -> str | None:
+    """access_token como está gravado (sem passar pelo from_db_value)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT access_token FROM integrador_licenseintegration WHERE id = %s", [pk])
+        return cursor.fetchone()[0]
+
+
+def gravar_cifrado(pk: int, cifrado: str):
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE integrador_licenseintegration SET access_token = %s WHERE id = %s", [cifrado, pk])
+
+
+@override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_A, INTEGRADOR_OLD_ENCRYPTION_KEYS=[])
+class EncryptedTextFieldTests(TestCase):
+    def setUp(self):
+        self.integracao = LicenseIntegration.objects.create(access_token="segredo")
+
+    def test_valor_lido_e_nao_alterado_grava_o_mesmo_cifrado(self):
+        cifrado = cifrado_no_banco(self.integracao.pk)
+        self.assertNotEqual(cifrado, "segredo")
+
+        obj = LicenseIntegration.objects.get(pk=self.integracao.pk)
+        self.assertIsInstance(obj.access_token, TextoDecifrado)
+        self.assertEqual(obj.access_token, "segredo")
+        obj.save()
+
+        self.assertEqual(cifrado_no_banco(obj.pk), cifrado)
+
+    def test_str_novo_e_cifrado_de_novo(self):
+        cifrado = cifrado_no_banco(self.integracao.pk)
+        obj = LicenseIntegration.objects.get(pk=self.integracao.pk)
+
+        obj.access_token = "segredo"  # mesmo texto, mas str comum: cifra outra vez
+        obj.save()
+        recifrado = cifrado_no_banco(obj.pk)
+        self.assertNotEqual(recifrado, cifrado)
+        self.assertEqual(Fernet(CHAVE_A).decrypt(recifrado.encode()).decode(), "segredo")
+
+        obj.access_token = "outro"
+        obj.save()
+        self.assertEqual(Fernet(CHAVE_A).decrypt(cifrado_no_banco(obj.pk).encode()).decode(), "outro")
+        self.assertEqual(LicenseIntegration.objects.get(pk=obj.pk).access_token, "outro")
+
+    def test_token_ilegivel_vira_none_com_aviso(self):
+        gravar_cifrado(self.integracao.pk, Fernet(CHAVE_B).encrypt(b"de outra chave").decode())
+
+        with self.assertLogs("integrador.models", "WARNING") as logs:
+            obj = LicenseIntegration.objects.get(pk=self.integracao.pk)
+
+        self.assertIsNone(obj.access_token)
+        self.assertIn("INTEGRADOR_OLD_ENCRYPTION_KEYS", logs.output[0])
+
+    def test_cache_de_decifrados_e_por_conjunto_de_chaves(self):
+        pk = self.integracao.pk
+        self.assertEqual(LicenseIntegration.objects.get(pk=pk).access_token, "segredo")  # entra no LRU
+
+        # a chave A saiu: o texto já decifrado com ela não pode voltar do cache
+        with override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_B), self.assertLogs("integrador.models", "WARNING"):
+            self.assertIsNone(LicenseIntegration.objects.get(pk=pk).access_token)
+
+        with override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_B, INTEGRADOR_OLD_ENCRYPTION_KEYS=[CHAVE_A]):
+            self.assertEqual(LicenseIntegration.objects.get(pk=pk).access_token, "segredo")
+
+
+class RotacionarChaveTests(TestCase):
+    def setUp(self):
+        with override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_A, INTEGRADOR_OLD_ENCRYPTION_KEYS=[]):
+            self.antigos = [LicenseIntegration.objects.create(access_token=f"antigo-{i}") for i in range(3)]
+        with override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_B, INTEGRADOR_OLD_ENCRYPTION_KEYS=[]):
+            self.atual = LicenseIntegration.objects.create(access_token="atual")
+        self.ilegivel = LicenseIntegration.objects.create(access_token="x")
+        gravar_cifrado(self.ilegivel.pk, Fernet(Fernet.generate_key()).encrypt(b"perdido").decode())
+        self.cifrados = {o.pk: cifrado_no_banco(o.pk) for o in [*self.antigos, self.atual, self.ilegivel]}
+
+    def rotacionar(self, *args) -> tuple[str, str]:
+        saida, erros = StringIO(), StringIO()
+        with (
+            override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_B, INTEGRADOR_OLD_ENCRYPTION_KEYS=[CHAVE_A]),
+            self.assertLogs("integrador.models", "WARNING"),  # o token ilegível
+        ):
+            call_command("rotacionar_chave", "--lote", "2", *args, stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+
+    def test_recifra_so_o_que_esta_em_chave_antiga(self):
+        saida, erros = self.rotacionar()
+
+        for obj in self.antigos:
+            cifrado = cifrado_no_banco(obj.pk)
+            self.assertNotEqual(cifrado, self.cifrados[obj.pk])
+            self.assertEqual(Fernet(CHAVE_B).decrypt(cifrado.encode()).decode(), obj.access_token)
+        self.assertEqual(cifrado_no_banco(self.atual.pk), self.cifrados[self.atual.pk])
+        self.assertEqual(cifrado_no_banco(self.ilegivel.pk), self.cifrados[self.ilegivel.pk])
+        self.assertIn("5 tokens: 3 recifrados, 1 já na chave atual", saida)
+        self.assertIn(f"ids: [{self.ilegivel.pk}]", erros)
+
+        # depois da rotação a chave antiga pode sair
+        with override_settings(INTEGRADOR_ENCRYPTION_KEY=CHAVE_B, INTEGRADOR_OLD_ENCRYPTION_KEYS=[]):
+            self.assertEqual(LicenseIntegration.objects.get(pk=self.antigos[0].pk).access_token, "antigo-0")
+
+    def test_dry_run_nao_grava(self):
+        saida, erros = self.rotacionar("--dry-run")
+
+        self.assertEqual({pk: cifrado_no_banco(pk) for pk in self.cifrados}, self.cifrados)
+        self.assertIn("3 seriam recifrados", saida)
+        self.assertIn(f"ids: [{self.ilegivel.pk}]", erros)
+
+
+def resposta(status: int) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    return resp
+
+
+@override_settings(SUPERLOGICA_CIRCUITO_FALHAS=3, SUPERLOGICA_CIRCUITO_ESPERA=30)
+class CircuitoTests(TestCase):
+    def setUp(self):
+        self.circuito = Circuito(1, CLASSE_IMPORTACAO)
+
+    def estado(self) -> CircuitBreakerState:
+        return CircuitBreakerState.objects.get(key=self.circuito.key)
+
+    def abrir(self):
+        with self.assertLogs("integrador.circuito", "WARNING"):
+            for _ in range(3):
+                self.circuito.registrar(resposta(503))
+
+    def passar_espera(self):
+        CircuitBreakerState.objects.filter(key=self.circuito.key).update(
+            changed_at=timezone.now() - timedelta(seconds=31)
+        )
+
+    def test_abre_depois_de_falhas_seguidas(self):
+        self.circuito.registrar(erro=requests.ConnectionError("recusada"))
+        self.circuito.registrar(erro=requests.Timeout("lento"))
+        self.assertEqual((self.estado().state, self.estado().failures), ("FECHADO", 2))
+        self.assertFalse(self.circuito.antes())
+
+        with self.assertLogs("integrador.circuito", "WARNING"):
+            self.circuito.registrar(resposta(502))
+
+        self.assertEqual((self.estado().state, self.estado().open_count), ("ABERTO", 1))
+        with self.assertRaises(CircuitoAberto) as ctx:
+            self.circuito.antes()
+        self.assertGreater(ctx.exception.tentar_em, 25)
+
+    def test_sucesso_zera_as_falhas(self):
+        self.circuito.registrar(resposta(500))
+        self.circuito.registrar(resposta(500))
+        self.circuito.registrar(resposta(200))
+        self.circuito.registrar(resposta(500))
+        self.assertEqual((self.estado().state, self.estado().failures), ("FECHADO", 1))
+
+    def test_4xx_e_429_nao_contam_como_falha(self):
+        for _ in range(5):
+            self.circuito.registrar(resposta(429))
+            self.circuito.registrar(resposta(404))
+            self.circuito.registrar(erro=requests.HTTPError(response=resposta(401)))
+        self.assertFalse(CircuitBreakerState.objects.filter(key=self.circuito.key, failures__gt=0).exists())
+        self.assertFalse(self.circuito.antes())
+
+    def test_meio_aberto_deixa_passar_uma_sonda_so(self):
+        self.abrir()
+        self.passar_espera()
+
+        with self.assertLogs("integrador.circuito", "INFO"):
+            self.assertTrue(self.circuito.antes())  # esta é a sonda
+        self.assertEqual(self.estado().state, "MEIO_ABERTO")
+        with self.assertRaises(CircuitoAberto):
+            self.circuito.antes()  # as outras esperam o resultado dela
+
+        with self.assertLogs("integrador.circuito", "INFO"):
+            self.circuito.registrar(resposta(200))
+        self.assertEqual((self.estado().state, self.estado().failures), ("FECHADO", 0))
+        self.assertFalse(self.circuito.antes())
+
+    def test_sonda_que_falha_reabre_na_hora(self):
+        self.abrir()
+        self.passar_espera()
+        with self.assertLogs("integrador.circuito", "INFO"):
+            self.assertTrue(self.circuito.antes())
+
+        with self.assertLogs("integrador.circuito", "WARNING"):
+            self.circuito.registrar(erro=requests.ConnectionError("ainda fora"))
+
+        self.assertEqual((self.estado().state, self.estado().open_count), ("ABERTO", 2))
+        with self.assertRaises(CircuitoAberto):
+            self.circuito.antes()
+
+    def test_sonda_abandonada_libera_outra_depois_da_espera(self):
+        self.abrir()
+        self.passar_espera()
+        with self.assertLogs("integrador.circuito", "INFO"):
+            self.assertTrue(self.circuito.antes())
+        # o processo da sonda morreu sem registrar nada
+        self.passar_espera()
+        with self.assertLogs("integrador.circuito", "INFO"):
+            self.assertTrue(self.circuito.antes())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Responde na ordem os status de server.roteiro ((status, headers)); depois, 200."""
+
+    def responder(self):
+        self.server.pedidos.append(self.command)
+        status, headers = self.server.roteiro.pop(0) if self.server.roteiro else (200, {})
+        self.send_response(status)
+        for nome, valor in headers.items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    do_GET = do_POST = responder
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(SUPERLOGICA_MAX_RETRIES=3, SUPERLOGICA_RETRY_BACKOFF=0)
+class HttpClientTests(SimpleTestCase):
+    def setUp(self):
+        # sessão nova a cada teste, criada com as settings acima
+        patcher = mock.patch.object(http_client, "_sessao", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.servidor.roteiro, self.servidor.pedidos = [], []
+        threading.Thread(target=self.servidor.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        self.url = f"http://127.0.0.1:{self.servidor.server_port}/contratos"
+
+    def test_get_refaz_em_5xx_e_429(self):
+        self.servidor.roteiro = [(500, {}), (503, {}), (429, {})]
+        resp = http_client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.servidor.pedidos, ["GET"] * 4)
+
+    def test_get_respeita_retry_after(self):
+        self.servidor.roteiro = [(429, {"Retry-After": "1"})]
+        inicio = time.monotonic()
+        resp = http_client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.9)
+        self.assertEqual(len(self.servidor.pedidos), 2)
+
+    def test_esgotadas_as_tentativas_devolve_a_ultima_resposta(self):
+        self.servidor.roteiro = [(502, {})] * 5
+        self.assertEqual(http_client.get(self.url).status_code, 502)
+        self.assertEqual(len(self.servidor.pedidos), 4)  # 1 + 3 retries
+
+    def test_post_nao_e_refeito(self):
+        self.servidor.roteiro = [(503, {}), (429, {})]
+        self.assertEqual(http_client.post(self.url, data={"code": "x"}).status_code, 503)
+        self.assertEqual(self.servidor.pedidos, ["POST"])
+
+    @override_settings(SUPERLOGICA_CONNECT_TIMEOUT=2.5, SUPERLOGICA_READ_TIMEOUT=7.0)
+    def test_timeout_padrao(self):
+        with mock.patch.object(requests.Session, "request", return_value=resposta(200)) as request:
+            http_client.get(self.url)
+            http_client.post(self.url, timeout=1)
+        self.assertEqual(request.call_args_list[0].kwargs["timeout"], (2.5, 7.0))
+        self.assertEqual(request.call_args_list[1].kwargs["timeout"], 1)  # explícito vence
+
+
+class VarrerConexoesTests(TestCase):
+    def setUp(self):
+        self.chamadas = []
+
+    def criar(self, nome: str, access_token: str = "token", **campos) -> LicenseIntegration:
+        usuario = User.objects.create(username=nome)
+        licenca = ClienteLicense.objects.create(cliente=usuario.pessoa, license_name=nome)
+        return LicenseIntegration.objects.create(license=licenca, access_token=access_token, **campos)
+
+    def varrer(self) -> dict:
+        chamadas = self.chamadas
+
+        async def verificar(cliente, salvar=True, integracao=None):
+            # cliente falso: licenças "ruim-*" falham, as demais respondem ok
+            chamadas.append((cliente.license_name, salvar))
+            if cliente.license_name.startswith("ruim"):
+                return False, {"error": "token expirado"}
+            return True, {}
+
+        with mock.patch.object(AsyncSuperlogicaClient, "verificar_conexao", verificar):
+            return async_to_sync(varrer_conexoes)(concorrencia=3)
+
+    def test_grava_o_resultado_de_todas_de_uma_vez(self):
+        ok = self.criar("boa-1")
+        ruim = self.criar("ruim-1", last_check_ok=True)
+        self.criar("inativa", is_active=False)
+        self.criar("sem-token", access_token="")
+
+        resumo = self.varrer()
+
+        self.assertEqual((resumo["total"], resumo["ok"], resumo["falhas"]), (2, 1, 1))
+        self.assertEqual(sorted(self.chamadas), [("boa-1", False), ("ruim-1", False)])  # sem save por licença
+        ok.refresh_from_db()
+        ruim.refresh_from_db()
+        self.assertEqual((ok.last_check_ok, ok.last_check_error), (True, ""))
+        self.assertEqual((ruim.last_check_ok, ruim.last_check_error), (False, "token expirado"))
+        self.assertIsNotNone(ok.last_verified_at)
+        self.assertIsNotNone(ruim.last_verified_at)
+
+    def test_queries_nao_crescem_com_o_numero_de_licencas(self):
+        for i in range(2):
+            self.criar(f"boa-{i}")
+        with CaptureQueriesContext(connection) as poucas:
+            self.varrer()
+        for i in range(2, 8):
+            self.criar(f"boa-{i}")
+        self.criar("ruim-1")
+
+        with self.assertNumQueries(len(poucas)):
+            resumo = self.varrer()
+        self.assertEqual(resumo["total"], 9)
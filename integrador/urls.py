@@ -7,6 +7,7 @@ urlpatterns = [
     path('conectar/licenca/<int:license_id>/', views.iniciar_autorizacao, name='start_license'),   # se você também mantiver o fluxo OAuth
     path('callback/', views.callback_autorizacao, name='callback'),
     path('verificar/licenca/<int:license_id>/', views.verificar_conexao_view, name='verificar_license'),
+    path('verificar/minhas/', views.verificar_minhas_conexoes, name='verificar_minhas'),
 
     # <<< NOVAS >>>
     path('token/licenca/<int:license_id>/', views.definir_access_token, name='definir_token'),
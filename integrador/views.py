@@ -9,6 +9,8 @@ from django.contrib import messages
 from integrador.models import LicenseIntegration
 from clientes.models import ClienteLicense
 from .services import SuperlogicaClient
+from .circuito import estados_da_licenca
+from .async_client import verificar_varias
 
 # tentar usar o helper de state, se você tiver criado conforme o blueprint
 try:
@@ -131,4 +133,27 @@ def desconectar_license(request, license_id: int):
 def verificar_conexao_view(request, license_id: int):
     lic = get_object_or_404(ClienteLicense, id=license_id)
     ok, payload = SuperlogicaClient(lic).verificar_conexao()
-    return JsonResponse({"ok": ok, "data": payload}, status=200 if ok else 400)
\ No newline at end of file
+    return JsonResponse(
+        {"ok": ok, "data": payload, "circuitos": estados_da_licenca(lic.id)},
+        status=200 if ok else 400,
+    )
+
+
+# --- verificar todas as licenças do usuário de uma vez (async, em paralelo) ---
+@require_GET
+async def verificar_minhas_conexoes(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"ok": False, "error": "login necessário"}, status=401)
+    licencas = [
+        lic async for lic in ClienteLicense.objects.filter(cliente__usuario=user, integracao__is_active=True)
+    ]
+    resultados = await verificar_varias(licencas)
+    return JsonResponse({
+        "ok": all(ok for ok, _ in resultados.values()),
+        "licencas": [
+            {"id": lic.id, "license_name": lic.license_name, "ok": resultados[lic.id][0], "data": resultados[lic.id][1]}
+            for lic in licencas
+        ],
+    })
+
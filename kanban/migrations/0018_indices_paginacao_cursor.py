@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importador_erp', '0011_indices_paginacao_cursor'),
+        ('kanban', '0017_rename_clientes_associado_card_clientes_associados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['data_criacao', 'id'], name='card_criacao_id_idx'),
+        ),
+    ]
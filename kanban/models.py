@@ -64,6 +64,9 @@ class Card(models.Model):
     clientes_associados = models.ManyToManyField(Cliente, blank=True, related_name='cards')
     contratos_locacao = models.ManyToManyField(ContratoLocacao, blank=True, related_name='cards')
 
+    class Meta:
+        indexes = [models.Index(fields=['data_criacao', 'id'], name='card_criacao_id_idx')]  # paginação por cursor
+
     def __str__(self):
         return self.titulo
     
@@ -12,6 +12,8 @@ from django.db.models import Prefetch
 from django.db.models import Max, Q, Count
 from .models import Pipeline, Etapa, Card, Tarefa, PipelinePropriedade, Propriedade, Checklist, ChecklistItem, Comentario, STATUS_TAREFA, STATUS_ETAPA, TIPOS_PROPRIEDADE
 from .forms import ChecklistForm, ChecklistItemFormSet, ChecklistItemForm
+from importador_erp import busca
+from importador_erp.paginacao import PaginacaoCursorMixin
 from importador_erp.models import Cliente, ContratoLocacao
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView
@@ -634,7 +636,7 @@ def card_update_assign(request, card_id):
     return render(request, "kanban/partials/badge_assign.html", {"card": card})
 
 @method_decorator(login_required, name="dispatch")
-class TicketListView(ListView):
+class TicketListView(PaginacaoCursorMixin, ListView):
     model = Card
     template_name = "kanban/tickets_list.html"
     context_object_name = "cards"
@@ -733,7 +735,7 @@ class TicketListView(ListView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         qs = self.request.GET.copy()
-        qs.pop("page", None)
+        qs.pop("cursor", None)
         ctx["querystring"] = qs.urlencode()
 
         # dados para selects
@@ -894,12 +896,7 @@ def card_buscar_clientes(request, card_id):
     q = (request.GET.get("q") or "").strip()
     qs = Cliente.objects.all()
     if q:
-        qs = qs.filter(
-            Q(nome__icontains=q) |
-            Q(email__icontains=q) |
-            Q(cpf_cnpj__icontains=q) |
-            Q(telefone__icontains=q)
-        )
+        qs = busca.filtrar_clientes(qs, q)  # nome, email, documento, telefone
     qs = qs.order_by("nome")[:20]  # limita 20 para não pesar
     return render(request, "kanban/partials/busca_resultados_clientes.html", {"resultados": qs, "card_id": card_id})
 
@@ -909,16 +906,10 @@ def card_buscar_contratos(request, card_id):
     q = (request.GET.get("q") or "").strip()
     qs = ContratoLocacao.objects.all()
     if q:
-        qs = qs.filter(
-            Q(nome_do_imovel__icontains=q) |
-            Q(identificador_contrato__icontains=q) |
-            Q(status_contrato__icontains=q) |
-            Q(tipo_imovel__icontains=q) |
-            Q(tipo_contrato__icontains=q) |
-            Q(inquilinos__nome__icontains=q) |
-            Q(proprietarios__nome__icontains=q)
-        )
-    qs = qs.distinct().order_by("-data_inicio")[:20]
+        # mesma busca textual da lista de contratos, mais relevantes primeiro
+        qs = busca.buscar_contratos(qs, q).order_by("-relevancia", "-data_inicio")[:20]
+    else:
+        qs = qs.order_by("-data_inicio")[:20]
     return render(request, "kanban/partials/busca_resultados_contratos.html", {"resultados": qs, "card_id": card_id})
 
 @login_required